@@ -0,0 +1,97 @@
+"""Hit latency and disk usage of the CacheMiddleware storage backends.
+
+Usage: poetry run python benchmarks/cache_storage.py [--entries 100000]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+import hishel
+from httpcore import Request, Response
+
+from scrapework.cache_storage import SQLiteCache, SQLiteCacheStorage
+
+
+def build_page(i: int) -> bytes:
+    rows = "".join(
+        f"<tr><td>Item {i}-{row}</td><td>{row * 3.14:.2f}</td></tr>"
+        for row in range(100)
+    )
+    return f"<html><body><h1>Page {i}</h1><table>{rows}</table></body></html>".encode()
+
+
+def build_exchange(i: int):
+    url = f"http://example.com/page/{i}"
+    request = Request(b"GET", url)
+    response = Response(
+        200, headers=[(b"Content-Type", b"text/html")], content=build_page(i)
+    )
+    response.read()
+    return f"key-{i}", response, request
+
+
+def disk_usage(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+def measure(label: str, storage: hishel.BaseStorage, entries: int, path: str) -> None:
+    start = time.perf_counter()
+    for i in range(entries):
+        storage.store(*build_exchange(i))
+    store_elapsed = time.perf_counter() - start
+
+    keys = [f"key-{random.randrange(entries)}" for _ in range(min(entries, 10_000))]
+    start = time.perf_counter()
+    for key in keys:
+        assert storage.retrieve(key) is not None
+    hit_latency = (time.perf_counter() - start) / len(keys)
+
+    print(
+        f"{label:<14} store {store_elapsed:8.2f}s  "
+        f"hit {hit_latency * 1e6:8.1f}us  "
+        f"disk {disk_usage(path) / 1024 / 1024:8.1f} MiB"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=100_000)
+    entries = parser.parse_args().entries
+
+    pickle = hishel.PickleSerializer()
+    backends: list[tuple[str, Callable[[str], hishel.BaseStorage]]] = [
+        (
+            "file",
+            lambda path: hishel.FileStorage(serializer=pickle, base_path=Path(path)),
+        ),
+        (
+            "sqlite",
+            lambda path: SQLiteCacheStorage(
+                SQLiteCache(os.path.join(path, "cache.sqlite")), pickle
+            ),
+        ),
+        (
+            "sqlite (raw)",
+            lambda path: SQLiteCacheStorage(
+                SQLiteCache(os.path.join(path, "cache.sqlite"), compression_level=None),
+                pickle,
+            ),
+        ),
+    ]
+
+    for label, build in backends:
+        with tempfile.TemporaryDirectory() as path:
+            measure(label, build(path), entries, path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Throughput of encode_items and the JSON Lines serialization backends.
+
+Usage: poetry run python benchmarks/encode_items.py [--items 1000000]
+"""
+
+import argparse
+import json
+import time
+from dataclasses import asdict, dataclass, is_dataclass
+from typing import Any, Callable, Iterable
+
+from pydantic import BaseModel
+
+from scrapework.handlers import stdlib_json_dumps, iter_encoded_items, json_dumps
+
+
+class Quote(BaseModel):
+    text: str
+    author: str
+    tags: list
+
+
+@dataclass
+class QuoteData:
+    text: str
+    author: str
+    tags: list
+
+
+def legacy_encode_items(items: Any):
+    # encode_items as it was before the single-pass rewrite, for comparison
+    if isinstance(items, BaseModel):
+        items = items.model_dump()
+    elif isinstance(items, Iterable) and all(
+        isinstance(item, BaseModel) for item in items
+    ):
+        items = [item.model_dump() for item in items]
+    elif is_dataclass(items):
+        items = asdict(items)  # type: ignore
+    elif isinstance(items, Iterable) and all(is_dataclass(item) for item in items):
+        items = [asdict(item) for item in items]  # type: ignore
+    if isinstance(items, dict):
+        items = [items]
+    elif isinstance(items, Iterable):
+        items = list(items)
+    return items
+
+
+def build_items(count: int, cls: Callable) -> list:
+    return [
+        cls(text=f"Quote number {i}", author=f"Author {i % 100}", tags=["a", "b"])
+        for i in range(count)
+    ]
+
+
+def measure(label: str, count: int, run: Callable[[], None]) -> None:
+    start = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<40} {elapsed:8.2f}s {count / elapsed:12,.0f} items/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=1_000_000)
+    count = parser.parse_args().items
+
+    for name, cls in [("dict", dict), ("pydantic", Quote), ("dataclass", QuoteData)]:
+        items = build_items(count, cls)
+
+        measure(
+            f"{name}: legacy encode + json",
+            count,
+            lambda: [json.dumps(item).encode() for item in legacy_encode_items(items)],
+        )
+        measure(
+            f"{name}: encode + json",
+            count,
+            lambda: [stdlib_json_dumps(item) for item in iter_encoded_items(items)],
+        )
+        measure(
+            f"{name}: encode + {json_dumps.__module__ or 'json'}",
+            count,
+            lambda: [json_dumps(item) for item in iter_encoded_items(items)],
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Memory and throughput of the slot-based Item against the dict-backed one.
+
+Usage: poetry run python benchmarks/items.py [--items 1000000]
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+from collections.abc import MutableMapping
+from typing import Callable
+
+from scrapework.handlers import iter_encoded_items, json_dumps
+from scrapework.items import Field, Item, ItemBatch
+
+
+class LegacyItem(MutableMapping):
+    # Item as it was before the slot-based layout, for comparison
+    fields = {"text": Field(), "author": Field(), "tags": Field()}
+
+    def __init__(self, *args, **kwargs):
+        self._values = {}
+        if args or kwargs:
+            for k, v in dict(*args, **kwargs).items():
+                self[k] = v
+
+    def __getitem__(self, key):
+        return self._values[key]
+
+    def __setitem__(self, key, value):
+        if key in self.fields:
+            self._values[key] = value
+        else:
+            raise KeyError(f"{self.__class__.__name__} does not support field: {key}")
+
+    def __delitem__(self, key):
+        del self._values[key]
+
+    def __setattr__(self, name, value):
+        if not name.startswith("_"):
+            raise AttributeError(f"Use item[{name!r}] = {value!r} to set field value")
+        super().__setattr__(name, value)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def copy(self):
+        return self.__class__(self)
+
+
+class Quote(Item):
+    text = Field()
+    author = Field()
+    tags = Field()
+
+
+def build_items(count: int, cls: Callable) -> list:
+    return [
+        cls(text=f"Quote number {i}", author=f"Author {i % 100}", tags=["a", "b"])
+        for i in range(count)
+    ]
+
+
+def measure(label: str, count: int, run: Callable[[], object]) -> None:
+    start = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<40} {elapsed:8.2f}s {count / elapsed:12,.0f} items/s")
+
+
+def measure_memory(label: str, count: int, build: Callable[[], object]) -> None:
+    gc.collect()
+    tracemalloc.start()
+    kept = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    print(f"{label:<40} {size / count:8.0f} bytes/item")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=1_000_000)
+    count = parser.parse_args().items
+
+    for name, cls in [("legacy", LegacyItem), ("slots", Quote)]:
+        items = build_items(count, cls)
+        measure_memory(f"{name}: memory", count, lambda: build_items(count, cls))
+        measure(f"{name}: create", count, lambda: build_items(count, cls))
+        measure(f"{name}: read field", count, lambda: [i["author"] for i in items])
+        measure(f"{name}: copy", count, lambda: [i.copy() for i in items])
+        measure(
+            f"{name}: encode + {json_dumps.__module__ or 'json'}",
+            count,
+            # Legacy items were encoded with dict(item)
+            lambda: [
+                json_dumps(dict(item) if cls is LegacyItem else item)
+                for item in iter_encoded_items(items)
+            ],
+        )
+
+    items = build_items(count, Quote)
+    measure("batch: build", count, lambda: ItemBatch.from_items(items))
+    batch = ItemBatch.from_items(items)
+    measure(
+        f"batch: encode + {json_dumps.__module__ or 'json'}",
+        count,
+        lambda: [json_dumps(item) for item in iter_encoded_items(batch)],
+    )
+
+
+if __name__ == "__main__":
+    main()
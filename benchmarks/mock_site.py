@@ -0,0 +1,169 @@
+"""Local HTTP server serving a synthetic, reproducible site for benchmarks.
+
+Pages live at `/page/<n>` and `/` serves page 0. Every
+page links to the next one, so the whole site is reachable, plus `fanout`
+pages picked at random. Links, bodies and failures are derived from `seed`
+and the page number, so two runs with the same config serve the same site.
+
+Usage: poetry run python benchmarks/mock_site.py [--pages 1000] [--port 8000]
+"""
+
+import argparse
+import random
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator, Optional, Tuple
+
+WORDS = (
+    "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod "
+    "tempor incididunt ut labore et dolore magna aliqua"
+).split()
+
+
+@dataclass
+class SiteConfig:
+    pages: int = 1000
+    # Random links per page, on top of the link to the next page
+    fanout: int = 10
+    # Seconds to wait before answering, per request
+    latency: float = 0.0
+    # Approximate size of a page body in bytes
+    body_size: int = 10_000
+    # Share of pages answering 500
+    error_rate: float = 0.0
+    seed: int = 0
+
+
+class Site:
+    def __init__(self, config: SiteConfig) -> None:
+        self.config = config
+        self.render = lru_cache(maxsize=config.pages)(self.build_page)
+
+    def rng(self, page: int) -> random.Random:
+        return random.Random(self.config.seed * 1_000_003 + page)
+
+    def links(self, page: int) -> list:
+        rng = self.rng(page)
+        links = [(page + 1) % self.config.pages]
+        links += [rng.randrange(self.config.pages) for _ in range(self.config.fanout)]
+        return links
+
+    def is_error(self, page: int) -> bool:
+        return self.rng(-page - 1).random() < self.config.error_rate
+
+    def build_page(self, page: int) -> bytes:
+        rng = self.rng(page)
+        links = "".join(
+            f'<li><a href="/page/{link}">Page {link}</a></li>'
+            for link in self.links(page)
+        )
+        paragraphs = []
+        size = len(links)
+        while size < self.config.body_size:
+            text = " ".join(rng.choice(WORDS) for _ in range(60))
+            paragraphs.append(f"<p>{text}</p>")
+            size += len(text) + 7
+        return (
+            f"<html><head><title>Page {page}</title></head><body>"
+            f"<h1>Page {page}</h1><article>{''.join(paragraphs)}</article>"
+            f"<ul>{links}</ul></body></html>"
+        ).encode()
+
+    def response(self, path: str) -> Tuple[int, bytes]:
+        if path == "/":
+            page = 0
+        elif path.startswith("/page/") and path[6:].isdigit():
+            page = int(path[6:])
+        else:
+            return 404, b"Not found"
+
+        if page >= self.config.pages:
+            return 404, b"Not found"
+        if self.is_error(page):
+            return 500, b"Server error"
+        return 200, self.render(page)
+
+
+def build_handler(site: Site) -> type:
+    class SiteHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body are written separately, avoid delayed ACK stalls
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            if site.config.latency:
+                time.sleep(site.config.latency)
+
+            status, body = site.response(self.path)
+            etag = f'"{zlib.crc32(body):x}"'
+            if status == 200 and self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+            self.send_response(status)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            if status == 200:
+                self.send_header("ETag", etag)
+                self.send_header("Cache-Control", "max-age=3600")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return SiteHandler
+
+
+@contextmanager
+def serve(config: SiteConfig, port: int = 0) -> Iterator[str]:
+    """Serve the site from a background thread, yields its base url."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), build_handler(Site(config)))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--fanout", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--body-size", type=int, default=10_000)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    config = SiteConfig(
+        args.pages,
+        args.fanout,
+        args.latency,
+        args.body_size,
+        args.error_rate,
+        args.seed,
+    )
+    with serve(config, args.port) as url:
+        print(f"Serving {config.pages} pages on {url}, Ctrl+C to stop")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,369 @@
+"""Throughput, latency, memory and CPU of crawls, caching, parsers and handlers.
+
+Crawls run against a local synthetic site, see mock_site.py. Each scenario
+runs in a fresh process, so its peak memory and CPU time are its own.
+Results can be saved as JSON and compared with a previous run; the suite
+exits with status 1 when a scenario regressed by more than `--threshold`.
+
+Usage:
+    poetry run python benchmarks/suite.py --output results.json
+    poetry run python benchmarks/suite.py --compare results.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from importlib.metadata import PackageNotFoundError, version
+from multiprocessing import get_context
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from parsel import Selector
+
+from mock_site import Site, SiteConfig, serve
+from scrapework.cache import CacheMiddleware
+from scrapework.core.collector import MetadataCollector
+from scrapework.core.context import Context
+from scrapework.handlers import JsonLinesFileHandler, ParquetFileHandler
+from scrapework.parsers import ArticleParser
+from scrapework.scraper import Scraper
+
+# (units processed, unit name, latency of each unit in seconds, elapsed seconds,
+#  CPU seconds), covering only the measured part of a scenario
+Sample = Tuple[int, str, List[float], float, float]
+
+
+class BenchScraper(Scraper):
+    name = "bench"
+    retry_backoff = 0.01
+
+    def __init__(self, **args):
+        super().__init__(**args)
+        self.latencies: List[float] = []
+
+    def crawl(self, ctx, url_with_callback):
+        start = time.perf_counter()
+        try:
+            return super().crawl(ctx, url_with_callback)
+        finally:
+            self.latencies.append(time.perf_counter() - start)
+
+    async def acrawl(self, ctx, url_with_callback):
+        start = time.perf_counter()
+        try:
+            return await super().acrawl(ctx, url_with_callback)
+        finally:
+            self.latencies.append(time.perf_counter() - start)
+
+    def extract(self, ctx, selector):
+        for href in selector.css("a::attr(href)").getall():
+            self.to_visit(ctx.urljoin(href))
+        return {
+            "url": str(ctx.request.url),
+            "title": selector.css("title::text").get(),
+            "paragraphs": len(selector.css("p")),
+        }
+
+    def process(self, ctx, items):
+        pass
+
+
+def build_scraper(middlewares: Optional[list] = None) -> BenchScraper:
+    scraper = BenchScraper()
+    scraper.handlers = []
+    scraper.reporters = []
+    scraper.middlewares = middlewares or []
+    return scraper
+
+
+def crawl(url: str, concurrency: Optional[int], middlewares=None) -> Sample:
+    scraper = build_scraper(middlewares)
+    start, cpu = time.perf_counter(), time.process_time()
+    scraper.run([f"{url}/"], concurrency=concurrency)
+    elapsed, cpu = time.perf_counter() - start, time.process_time() - cpu
+    return len(scraper.latencies), "pages", scraper.latencies, elapsed, cpu
+
+
+def scraper_sync(params: Dict[str, Any]) -> Sample:
+    return crawl(params["url"], None)
+
+
+def scraper_async(params: Dict[str, Any]) -> Sample:
+    return crawl(params["url"], params["concurrency"])
+
+
+def cache_warm(params: Dict[str, Any]) -> Sample:
+    with tempfile.TemporaryDirectory() as cache_dir:
+        # Fill the cache, then measure a crawl served from it
+        crawl(params["url"], params["concurrency"], [build_cache(cache_dir)])
+        return crawl(params["url"], params["concurrency"], [build_cache(cache_dir)])
+
+
+def build_cache(cache_dir: str) -> CacheMiddleware:
+    return CacheMiddleware(cache_dir, backend="sqlite", memory_entries=10_000)
+
+
+def measure_units(units: List[Any], unit: str, process: Callable) -> Sample:
+    latencies = []
+    start, cpu = time.perf_counter(), time.process_time()
+    for value in units:
+        begin = time.perf_counter()
+        process(value)
+        latencies.append(time.perf_counter() - begin)
+    elapsed, cpu = time.perf_counter() - start, time.process_time() - cpu
+    return len(units), unit, latencies, elapsed, cpu
+
+
+def site_pages(params: Dict[str, Any]) -> List[str]:
+    site = Site(SiteConfig(**params["site"]))
+    return [site.build_page(page).decode() for page in range(site.config.pages)]
+
+
+def parse_selector(params: Dict[str, Any]) -> Sample:
+    def parse(html: str) -> None:
+        selector = Selector(text=html)
+        selector.css("a::attr(href)").getall()
+        selector.css("p::text").getall()
+
+    return measure_units(site_pages(params), "pages", parse)
+
+
+def parse_article(params: Dict[str, Any]) -> Sample:
+    parser = ArticleParser()
+    ctx = Context(collector=MetadataCollector(), variables={})
+    return measure_units(
+        site_pages(params),
+        "pages",
+        lambda html: parser.extract(ctx, Selector(text=html)),
+    )
+
+
+def item_batches(params: Dict[str, Any]) -> List[List[Dict[str, Any]]]:
+    return [
+        [
+            {"url": f"/page/{page}", "title": f"Page {page}", "rank": row, "ok": True}
+            for row in range(100)
+        ]
+        for page in range(params["site"]["pages"])
+    ]
+
+
+def run_handler(params: Dict[str, Any], build: Callable[[str], Any]) -> Sample:
+    ctx = Context(collector=MetadataCollector(), variables={})
+    batches = item_batches(params)
+    with tempfile.TemporaryDirectory() as path:
+        handler = build(path)
+        count, _, latencies, elapsed, cpu = measure_units(
+            batches, "items", lambda batch: handler.process_items(ctx, batch)
+        )
+        start, close_cpu = time.perf_counter(), time.process_time()
+        handler.close(ctx)
+        elapsed += time.perf_counter() - start
+        cpu += time.process_time() - close_cpu
+    return count * 100, "items", latencies, elapsed, cpu
+
+
+def handler_jsonlines(params: Dict[str, Any]) -> Sample:
+    return run_handler(
+        params, lambda path: JsonLinesFileHandler(os.path.join(path, "items.jsonl"))
+    )
+
+
+def handler_parquet(params: Dict[str, Any]) -> Sample:
+    return run_handler(
+        params, lambda path: ParquetFileHandler(os.path.join(path, "items.parquet"))
+    )
+
+
+SCENARIOS: Dict[str, Callable[[Dict[str, Any]], Sample]] = {
+    "scraper_sync": scraper_sync,
+    "scraper_async": scraper_async,
+    "cache_warm": cache_warm,
+    "parse_selector": parse_selector,
+    "parse_article": parse_article,
+    "handler_jsonlines": handler_jsonlines,
+    "handler_parquet": handler_parquet,
+}
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def run_scenario(name: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Run a scenario, in its own process."""
+    os.chdir(params["workdir"])
+    # Per-page log lines would dominate the figures
+    logging.disable(logging.INFO)
+    count, unit, latencies, elapsed, cpu = SCENARIOS[name](params)
+    return {
+        "name": name,
+        "unit": unit,
+        "count": count,
+        "elapsed": round(elapsed, 4),
+        "throughput": round(count / elapsed, 2) if elapsed else 0.0,
+        "latency_p50_ms": round(percentile(latencies, 0.5) * 1000, 3),
+        "latency_p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "cpu_seconds": round(cpu, 4),
+        "cpu_per_unit_ms": round(cpu / count * 1000, 4) if count else 0.0,
+        "peak_rss_mib": round(peak_rss() / 1024 / 1024, 1),
+    }
+
+
+def peak_rss() -> int:
+    """Peak resident memory of this process in bytes."""
+    # ru_maxrss survives exec on Linux, so spawned processes would report
+    # the peak of their parent, VmHWM is their own
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    # ru_maxrss is in bytes on macOS, KiB elsewhere
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+
+
+def metadata(params: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    try:
+        scrapework_version = version("scrapework")
+    except PackageNotFoundError:
+        scrapework_version = None
+
+    return {
+        "scrapework_version": scrapework_version,
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "site": params["site"],
+        "concurrency": params["concurrency"],
+    }
+
+
+def compare(
+    results: List[Dict[str, Any]], baseline: Dict[str, Any], threshold: float
+) -> bool:
+    """Print changes from `baseline`, returns True when a scenario regressed."""
+    previous = {result["name"]: result for result in baseline["results"]}
+    regressed = False
+    for result in results:
+        old = previous.get(result["name"])
+        if "error" in result or old is None or not old.get("throughput"):
+            continue
+
+        throughput = result["throughput"] / old["throughput"] - 1
+        cpu = (
+            result["cpu_per_unit_ms"] / old["cpu_per_unit_ms"] - 1
+            if old["cpu_per_unit_ms"]
+            else 0.0
+        )
+        flag = ""
+        if throughput < -threshold or cpu > threshold:
+            flag = "  REGRESSION"
+            regressed = True
+        print(
+            f"{result['name']:<20} throughput {throughput:+7.1%}  "
+            f"cpu/unit {cpu:+7.1%}  "
+            f"p99 {old['latency_p99_ms']:.1f} -> {result['latency_p99_ms']:.1f}ms"
+            f"{flag}"
+        )
+    return regressed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--fanout", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--body-size", type=int, default=10_000)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--scenarios", nargs="*", choices=sorted(SCENARIOS))
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="JSON results of a previous run")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    args = parser.parse_args()
+
+    site = SiteConfig(
+        args.pages,
+        args.fanout,
+        args.latency,
+        args.body_size,
+        args.error_rate,
+        args.seed,
+    )
+    names = args.scenarios or list(SCENARIOS)
+    if "handler_parquet" in names:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            print("pyarrow is not installed, skipping handler_parquet")
+            names.remove("handler_parquet")
+
+    results = []
+    with serve(site) as url, tempfile.TemporaryDirectory() as workdir:
+        params = {
+            "url": url,
+            "site": asdict(site),
+            "concurrency": args.concurrency,
+            "workdir": workdir,
+        }
+        for name in names:
+            with ProcessPoolExecutor(1, mp_context=get_context("spawn")) as pool:
+                try:
+                    result = pool.submit(run_scenario, name, params).result()
+                except Exception as err:
+                    # Keep going, a failed scenario is recorded without figures
+                    results.append({"name": name, "error": repr(err)})
+                    print(f"{name:<20} failed: {err!r}")
+                    continue
+            results.append(result)
+            print(
+                f"{name:<20} {result['throughput']:12,.1f} {result['unit']}/s  "
+                f"p50 {result['latency_p50_ms']:8.2f}ms  "
+                f"p99 {result['latency_p99_ms']:8.2f}ms  "
+                f"cpu {result['cpu_per_unit_ms']:8.3f}ms/{result['unit'][:-1]}  "
+                f"rss {result['peak_rss_mib']:7.1f}MiB"
+            )
+
+        report = {"meta": metadata(params), "results": results}
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
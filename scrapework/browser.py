@@ -0,0 +1,187 @@
+import asyncio
+import queue
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Optional
+
+import httpx
+
+if TYPE_CHECKING:
+    from playwright.async_api import Page as AsyncPage
+    from playwright.sync_api import Page
+
+    from scrapework.request import Request
+
+DEFAULT_BLOCKED_RESOURCES = ("image", "font", "media")
+
+
+def rendered_response(url: str, status_code: Optional[int], content: str):
+    return httpx.Response(
+        status_code or 200,
+        request=httpx.Request("GET", url),
+        content=content.encode("utf-8"),
+        headers={},
+    )
+
+
+class BrowserPool:
+    """Chromium browser kept open for a run, with `pages` reusable pages.
+
+    Every page routes its traffic through the request http client, and
+    requests for `blocked_resources` types (e.g. images, fonts, media) are
+    aborted. Pages are closed and replaced after `max_page_uses` fetches,
+    so memory held by long lived pages is released. The sync Playwright API
+    is bound to the thread that started it, so a pool must be used from a
+    single thread.
+    """
+
+    def __init__(
+        self,
+        pages: int = 1,
+        blocked_resources: Iterable[str] = DEFAULT_BLOCKED_RESOURCES,
+        launch_kwargs: Optional[Dict[str, Any]] = None,
+        max_page_uses: Optional[int] = None,
+    ) -> None:
+        self.size = pages
+        self.blocked_resources = frozenset(blocked_resources)
+        self.launch_kwargs = launch_kwargs or {}
+        self.max_page_uses = max_page_uses
+        self.playwright = None
+        self.browser = None
+        self.context = None
+        self.pages: "queue.Queue[Page]" = queue.Queue()
+        self.uses: Dict[Any, int] = {}
+
+    def start(self) -> None:
+        if self.browser is not None:
+            return
+
+        from playwright.sync_api import sync_playwright
+
+        self.playwright = sync_playwright().start()
+        self.browser = self.playwright.chromium.launch(**self.launch_kwargs)
+        self.context = self.browser.new_context()
+        for _ in range(self.size):
+            self.pages.put(self.context.new_page())
+
+    def release(self, page: "Page") -> None:
+        """Return `page` to the pool, replaced once it was used too often."""
+        uses = self.uses.pop(page, 0) + 1
+        if self.max_page_uses and uses >= self.max_page_uses:
+            page.close()
+            page = self.context.new_page()  # type: ignore
+            uses = 0
+        self.uses[page] = uses
+        self.pages.put(page)
+
+    def fetch(self, request: "Request", client: httpx.Client) -> httpx.Response:
+        self.start()
+        page = self.pages.get()
+
+        def handler(route, browser_request):
+            if browser_request.resource_type in self.blocked_resources:
+                route.abort()
+            else:
+                request.httpx_request_handler(route, browser_request, client)
+
+        try:
+            page.route("**/*", handler)
+            response = page.goto(request.url)
+            content = page.content()
+        finally:
+            page.unroute("**/*", handler)
+            self.release(page)
+
+        return rendered_response(
+            request.url, response.status if response else None, content
+        )
+
+    def close(self) -> None:
+        if self.browser is not None:
+            self.browser.close()
+            self.playwright.stop()  # type: ignore
+        self.browser = None
+        self.playwright = None
+        self.context = None
+        self.pages = queue.Queue()
+        self.uses = {}
+
+
+class AsyncBrowserPool:
+    """Async counterpart of :class:`BrowserPool`, `pages` fetch concurrently."""
+
+    def __init__(
+        self,
+        pages: int = 4,
+        blocked_resources: Iterable[str] = DEFAULT_BLOCKED_RESOURCES,
+        launch_kwargs: Optional[Dict[str, Any]] = None,
+        max_page_uses: Optional[int] = None,
+    ) -> None:
+        self.size = pages
+        self.blocked_resources = frozenset(blocked_resources)
+        self.launch_kwargs = launch_kwargs or {}
+        self.max_page_uses = max_page_uses
+        self.playwright = None
+        self.browser = None
+        self.context = None
+        self.pages: "Optional[asyncio.Queue[AsyncPage]]" = None
+        self.uses: Dict[Any, int] = {}
+        self.lock = asyncio.Lock()
+
+    async def start(self) -> asyncio.Queue:
+        async with self.lock:
+            if self.pages is None:
+                from playwright.async_api import async_playwright
+
+                self.playwright = await async_playwright().start()
+                self.browser = await self.playwright.chromium.launch(
+                    **self.launch_kwargs
+                )
+                self.context = await self.browser.new_context()
+                pages: "asyncio.Queue[AsyncPage]" = asyncio.Queue()
+                for _ in range(self.size):
+                    pages.put_nowait(await self.context.new_page())
+                self.pages = pages
+        return self.pages
+
+    async def release(self, pages: asyncio.Queue, page: "AsyncPage") -> None:
+        uses = self.uses.pop(page, 0) + 1
+        if self.max_page_uses and uses >= self.max_page_uses:
+            await page.close()
+            page = await self.context.new_page()  # type: ignore
+            uses = 0
+        self.uses[page] = uses
+        pages.put_nowait(page)
+
+    async def fetch(
+        self, request: "Request", client: httpx.AsyncClient
+    ) -> httpx.Response:
+        pages = await self.start()
+        page = await pages.get()
+
+        async def handler(route, browser_request):
+            if browser_request.resource_type in self.blocked_resources:
+                await route.abort()
+            else:
+                await request.ahttpx_request_handler(route, browser_request, client)
+
+        try:
+            await page.route("**/*", handler)
+            response = await page.goto(request.url)
+            content = await page.content()
+        finally:
+            await page.unroute("**/*", handler)
+            await self.release(pages, page)
+
+        return rendered_response(
+            request.url, response.status if response else None, content
+        )
+
+    async def close(self) -> None:
+        if self.browser is not None:
+            await self.browser.close()
+            await self.playwright.stop()  # type: ignore
+        self.browser = None
+        self.playwright = None
+        self.context = None
+        self.pages = None
+        self.uses = {}
+        self.lock = asyncio.Lock()
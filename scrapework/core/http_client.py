@@ -1,4 +1,6 @@
+import threading
 from abc import ABC, abstractmethod
+from typing import Any, Dict, Hashable, Optional
 
 import httpx
 
@@ -12,9 +14,121 @@ class HTTPClient(ABC):
     def build_client(cls, **kwargs) -> httpx.Client:
         pass
 
+    @classmethod
+    def build_async_client(cls, **kwargs) -> httpx.AsyncClient:
+        raise NotImplementedError(f"{cls.__name__} does not support async requests")
+
 
 class HttpxClient(HTTPClient):
     @classmethod
     def build_client(cls, **kwargs) -> httpx.Client:
         Logger().get_logger().debug("Building httpx client")
         return httpx.Client(**kwargs)
+
+    @classmethod
+    def build_async_client(cls, **kwargs) -> httpx.AsyncClient:
+        Logger().get_logger().debug("Building async httpx client")
+        return httpx.AsyncClient(**kwargs)
+
+
+def build_proxy_mounts(
+    proxy: Optional[str], transport_cls: type = httpx.HTTPTransport, **kwargs
+) -> Dict[str, Any]:
+    if not proxy:
+        return {}
+
+    return {
+        "https://": transport_cls(proxy=proxy, **kwargs),
+        "http://": transport_cls(proxy=proxy, **kwargs),
+    }
+
+
+def _freeze(value: Any) -> Hashable:
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(v) for v in value)
+    try:
+        hash(value)
+    except TypeError:
+        return id(value)
+    return value
+
+
+class ClientPool:
+    """Long-lived http clients shared by the requests of a scraper run.
+
+    Clients are keyed by client class, proxy and client kwargs, so requests to
+    the same hosts reuse open connections (keep-alive, optional HTTP/2)
+    instead of paying a new TCP+TLS handshake each time.
+    """
+
+    def __init__(
+        self,
+        max_connections: Optional[int] = 100,
+        max_keepalive_connections: Optional[int] = 20,
+        keepalive_expiry: Optional[float] = 5.0,
+        http2: bool = False,
+    ) -> None:
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = http2
+        self.clients: Dict[Hashable, httpx.Client] = {}
+        self.async_clients: Dict[Hashable, httpx.AsyncClient] = {}
+        self._lock = threading.Lock()
+
+    def key(
+        self, cls_client: type[HTTPClient], proxy: Optional[str], client_kwargs: dict
+    ) -> Hashable:
+        return (cls_client, proxy, _freeze(client_kwargs))
+
+    def transport_kwargs(self) -> Dict[str, Any]:
+        return {"limits": self.limits, "http2": self.http2}
+
+    def get_client(
+        self,
+        cls_client: type[HTTPClient],
+        proxy: Optional[str],
+        client_kwargs: dict,
+    ) -> httpx.Client:
+        key = self.key(cls_client, proxy, client_kwargs)
+        with self._lock:
+            if key not in self.clients:
+                self.clients[key] = cls_client.build_client(
+                    mounts=build_proxy_mounts(proxy, **self.transport_kwargs()),
+                    **self.transport_kwargs(),
+                    **client_kwargs,
+                )
+            return self.clients[key]
+
+    def get_async_client(
+        self,
+        cls_client: type[HTTPClient],
+        proxy: Optional[str],
+        client_kwargs: dict,
+    ) -> httpx.AsyncClient:
+        key = self.key(cls_client, proxy, client_kwargs)
+        if key not in self.async_clients:
+            self.async_clients[key] = cls_client.build_async_client(
+                mounts=build_proxy_mounts(
+                    proxy, httpx.AsyncHTTPTransport, **self.transport_kwargs()
+                ),
+                **self.transport_kwargs(),
+                **client_kwargs,
+            )
+        return self.async_clients[key]
+
+    def close(self) -> None:
+        with self._lock:
+            for client in self.clients.values():
+                client.close()
+            self.clients = {}
+
+    async def aclose(self) -> None:
+        for client in self.async_clients.values():
+            await client.aclose()
+        self.async_clients = {}
+        self.close()
@@ -1,33 +1,143 @@
+import atexit
+import datetime
+import json
 import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
+from typing import Dict, List, Optional
+
+# Attributes of every LogRecord, anything else was passed with `extra`
+RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with the fields passed in `extra`."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.datetime.fromtimestamp(record.created)
+            .astimezone()
+            .isoformat(timespec="milliseconds"),
+            "logger": record.name,
+            "level": record.levelname,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class LazyQueueHandler(QueueHandler):
+    """Enqueue records as they are, formatting happens in the listener thread.
+
+    The queue never leaves the process, so records (and their arguments)
+    need not be made picklable first.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
 
 
 class Logger:
-    _instance = None
+    """Logger writing to `<name>.log` (or `filename`) and the console.
+
+    There is one instance per name, so every scraper gets its own logger;
+    modules log to it through ``ctx.logger``, or to the ``default`` one
+    outside of a run. Passing options again reconfigures the logger. With
+    `json`, records are written as JSON lines. With `queue`, records are only
+    put on a queue by the logging thread, a listener thread formats and
+    writes them.
+    """
 
-    def __new__(cls, name: str = "default"):
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-            cls._instance.configure(name)
-        return cls._instance
+    _instances: Dict[str, "Logger"] = {}
+    _lock = threading.Lock()
 
-    def configure(self, name="default", level=logging.INFO):
+    def __new__(cls, name: str = "default", **options):
+        with cls._lock:
+            instance = cls._instances.get(name)
+            if instance is None:
+                instance = cls._instances[name] = super().__new__(cls)
+                instance.handlers: List[logging.Handler] = []
+                instance.listener: Optional[QueueListener] = None
+                instance.options = None
+            if instance.options is None or (options and options != instance.options):
+                instance.configure(name, **options)
+                instance.options = options
+        return instance
 
+    def configure(
+        self,
+        name: str = "default",
+        level: int = logging.INFO,
+        filename: Optional[str] = None,
+        json: bool = False,
+        queue: bool = False,
+    ) -> None:
+        self.close()
         self.logger = logging.getLogger(name)
         self.logger.setLevel(level)
 
-        formatter = logging.Formatter(
-            "%(asctime)s - %(name)s - %(levelname)s - %(message)s", "%Y-%m-%d %H:%M:%S"
+        formatter = (
+            JsonFormatter()
+            if json
+            else logging.Formatter(
+                "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+                "%Y-%m-%d %H:%M:%S",
+            )
         )
 
-        file_handler = logging.FileHandler(f"{name}.log")
-        file_handler.setFormatter(formatter)
-        file_handler.setLevel(level)
-        self.logger.addHandler(file_handler)
-
+        # The file is only created once a record is written
+        file_handler = logging.FileHandler(filename or f"{name}.log", delay=True)
         console_handler = logging.StreamHandler()
-        console_handler.setFormatter(formatter)
-        console_handler.setLevel(level)
-        self.logger.addHandler(console_handler)
+        handlers: List[logging.Handler] = [file_handler, console_handler]
+        for handler in handlers:
+            handler.setFormatter(formatter)
+            handler.setLevel(level)
+
+        if queue:
+            records: SimpleQueue = SimpleQueue()
+            self.listener = QueueListener(
+                records, *handlers, respect_handler_level=True
+            )
+            self.listener.start()
+            handlers = [LazyQueueHandler(records)]
+            self.handlers = [file_handler, console_handler]
+        else:
+            self.handlers = []
+
+        for handler in handlers:
+            self.logger.addHandler(handler)
+        self.handlers += handlers
 
-    def get_logger(self):
+    def get_logger(self) -> logging.Logger:
         return self.logger
+
+    def flush(self) -> None:
+        """Wait for queued records to be written."""
+        if self.listener:
+            self.listener.stop()
+            self.listener.start()
+
+    def close(self) -> None:
+        if self.listener:
+            self.listener.stop()
+            self.listener = None
+        for handler in self.handlers:
+            self.logger.removeHandler(handler)
+            handler.close()
+        self.handlers = []
+
+
+def default_logger() -> logging.Logger:
+    """Logger used outside of a scraper run."""
+    return Logger().get_logger()
+
+
+@atexit.register
+def close_loggers() -> None:
+    for instance in list(Logger._instances.values()):
+        instance.close()
@@ -0,0 +1,403 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional, Tuple
+
+from scrapework.core.collector import MetadataCollector
+from scrapework.executor import callback_ref, resolve_callback
+from scrapework.frontier import Frontier, SeenSet, canonicalize_url
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class CrawlBackend(ABC):
+    """Frontier and seen-set storage shared by several crawl workers.
+
+    Urls are deduplicated by canonical key when added. Workers lease queued
+    urls for `lease_seconds` and mark them complete once processed; leases
+    that expire (e.g. a worker died) make the url available again.
+    """
+
+    lease_seconds: float = 300.0
+
+    @abstractmethod
+    def add(
+        self, key: str, url: str, callback: Optional[str], priority: int = 0
+    ) -> bool:
+        """Queue `url` unless `key` was seen before, return whether it was new."""
+
+    @abstractmethod
+    def lease(self) -> Optional[Tuple[str, str, Optional[str]]]:
+        """Lease the next queued url, returns `(key, url, callback)` or None."""
+
+    @abstractmethod
+    def complete(self, key: str) -> None:
+        pass
+
+    @abstractmethod
+    def seen(self, key: str) -> bool:
+        pass
+
+    @abstractmethod
+    def seen_count(self) -> int:
+        pass
+
+    @abstractmethod
+    def pending_count(self) -> int:
+        """Urls queued, or leased with an expired lease."""
+
+    @abstractmethod
+    def active_count(self) -> int:
+        """Urls queued or leased, expired or not: the crawl is over at 0."""
+
+    @abstractmethod
+    def report(self, worker_id: str, metadata: Dict[str, float]) -> None:
+        """Store the numeric metadata collected by a worker."""
+
+    @abstractmethod
+    def worker_stats(self) -> Dict[str, Dict[str, float]]:
+        pass
+
+    def collector(self) -> MetadataCollector:
+        """Metadata of every worker, numeric values summed."""
+        collector = MetadataCollector()
+        for stats in self.worker_stats().values():
+            for key, value in stats.items():
+                collector.increment(key, value)
+        return collector
+
+
+class SqliteBackend(CrawlBackend):
+    """Crawl backend in a SQLite database, shared by processes of one host."""
+
+    def __init__(self, path: str, lease_seconds: float = 300.0) -> None:
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.local = threading.local()
+        with self.connection() as connection:
+            connection.executescript("""
+                CREATE TABLE IF NOT EXISTS urls (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    key TEXT NOT NULL UNIQUE,
+                    url TEXT NOT NULL,
+                    callback TEXT,
+                    priority INTEGER NOT NULL DEFAULT 0,
+                    state TEXT NOT NULL DEFAULT 'queued',
+                    lease_until REAL
+                );
+                CREATE INDEX IF NOT EXISTS urls_queue
+                    ON urls (state, priority, id);
+                CREATE TABLE IF NOT EXISTS workers (
+                    worker TEXT PRIMARY KEY
+                );
+                CREATE TABLE IF NOT EXISTS stats (
+                    worker TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value REAL NOT NULL,
+                    PRIMARY KEY (worker, key)
+                );
+                """)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {"path": self.path, "lease_seconds": self.lease_seconds}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self.local = threading.local()
+
+    def connection(self) -> sqlite3.Connection:
+        # One connection per process and thread, sqlite3 connections are not
+        # safe to share across either
+        connection = getattr(self.local, "connection", None)
+        if connection is None or self.local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self.local.connection = connection
+            self.local.pid = os.getpid()
+        return connection
+
+    def add(
+        self, key: str, url: str, callback: Optional[str], priority: int = 0
+    ) -> bool:
+        cursor = self.connection().execute(
+            "INSERT OR IGNORE INTO urls (key, url, callback, priority) "
+            "VALUES (?, ?, ?, ?)",
+            (key, url, callback, priority),
+        )
+        return cursor.rowcount == 1
+
+    def lease(self) -> Optional[Tuple[str, str, Optional[str]]]:
+        connection = self.connection()
+        now = time.time()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute(
+                "SELECT id, key, url, callback FROM urls "
+                "WHERE state = 'queued' OR (state = 'leased' AND lease_until < ?) "
+                "ORDER BY state = 'leased', priority, id LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is not None:
+                connection.execute(
+                    "UPDATE urls SET state = 'leased', lease_until = ? WHERE id = ?",
+                    (now + self.lease_seconds, row[0]),
+                )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+        return None if row is None else (row[1], row[2], row[3])
+
+    def complete(self, key: str) -> None:
+        self.connection().execute(
+            "UPDATE urls SET state = 'done', lease_until = NULL WHERE key = ?", (key,)
+        )
+
+    def seen(self, key: str) -> bool:
+        row = (
+            self.connection()
+            .execute("SELECT 1 FROM urls WHERE key = ?", (key,))
+            .fetchone()
+        )
+        return row is not None
+
+    def seen_count(self) -> int:
+        return self.connection().execute("SELECT COUNT(*) FROM urls").fetchone()[0]
+
+    def pending_count(self) -> int:
+        return (
+            self.connection()
+            .execute(
+                "SELECT COUNT(*) FROM urls "
+                "WHERE state = 'queued' OR (state = 'leased' AND lease_until < ?)",
+                (time.time(),),
+            )
+            .fetchone()[0]
+        )
+
+    def active_count(self) -> int:
+        return (
+            self.connection()
+            .execute("SELECT COUNT(*) FROM urls WHERE state IN ('queued', 'leased')")
+            .fetchone()[0]
+        )
+
+    def report(self, worker_id: str, metadata: Dict[str, float]) -> None:
+        connection = self.connection()
+        connection.execute(
+            "INSERT OR IGNORE INTO workers (worker) VALUES (?)", (worker_id,)
+        )
+        connection.executemany(
+            "INSERT OR REPLACE INTO stats (worker, key, value) VALUES (?, ?, ?)",
+            [(worker_id, key, value) for key, value in metadata.items()],
+        )
+
+    def worker_stats(self) -> Dict[str, Dict[str, float]]:
+        connection = self.connection()
+        stats: Dict[str, Dict[str, float]] = {
+            worker: {} for worker, in connection.execute("SELECT worker FROM workers")
+        }
+        for worker, key, value in connection.execute(
+            "SELECT worker, key, value FROM stats"
+        ):
+            stats.setdefault(worker, {})[key] = value
+        return stats
+
+
+# Queue a url unless seen: KEYS seen, sequence, entries, queue; ARGV key,
+# entry, priority. Lower priority first, insertion order within a priority.
+REDIS_ADD = """
+if redis.call('SADD', KEYS[1], ARGV[1]) == 0 then
+    return 0
+end
+local sequence = redis.call('INCR', KEYS[2])
+redis.call('HSET', KEYS[3], ARGV[1], ARGV[2])
+redis.call('ZADD', KEYS[4], tonumber(ARGV[3]) * 4294967296 + sequence, ARGV[1])
+return 1
+"""
+
+# Requeue expired leases, then lease the next url: KEYS queue, leases,
+# entries; ARGV now, lease end. Returns {key, entry} or nil.
+REDIS_LEASE = """
+for _, key in ipairs(redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[1])) do
+    redis.call('ZREM', KEYS[2], key)
+    local entry = cjson.decode(redis.call('HGET', KEYS[3], key))
+    redis.call('ZADD', KEYS[1], entry['priority'] * 4294967296, key)
+end
+local popped = redis.call('ZPOPMIN', KEYS[1])
+if #popped == 0 then
+    return nil
+end
+redis.call('ZADD', KEYS[2], ARGV[2], popped[1])
+return {popped[1], redis.call('HGET', KEYS[3], popped[1])}
+"""
+
+
+class RedisBackend(CrawlBackend):
+    """Crawl backend on a Redis-protocol server, shared by workers on any host.
+
+    `client` is a `redis.Redis` compatible client created with
+    `decode_responses=True`. Adding and leasing urls run as Lua scripts, so
+    a worker dying halfway cannot leave a url seen but not queued, or
+    popped but not leased.
+    """
+
+    def __init__(
+        self, client: Any, prefix: str = "scrapework", lease_seconds: float = 300.0
+    ) -> None:
+        self.client = client
+        self.prefix = prefix
+        self.lease_seconds = lease_seconds
+        self.add_script = client.register_script(REDIS_ADD)
+        self.lease_script = client.register_script(REDIS_LEASE)
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "RedisBackend":
+        import redis
+
+        return cls(redis.Redis.from_url(url, decode_responses=True), **kwargs)
+
+    def name(self, suffix: str) -> str:
+        return f"{self.prefix}:{suffix}"
+
+    def add(
+        self, key: str, url: str, callback: Optional[str], priority: int = 0
+    ) -> bool:
+        entry = json.dumps({"url": url, "callback": callback, "priority": priority})
+        added = self.add_script(
+            keys=[
+                self.name("seen"),
+                self.name("sequence"),
+                self.name("entries"),
+                self.name("queue"),
+            ],
+            args=[key, entry, priority],
+        )
+        return bool(added)
+
+    def lease(self) -> Optional[Tuple[str, str, Optional[str]]]:
+        now = time.time()
+        leased = self.lease_script(
+            keys=[self.name("queue"), self.name("leases"), self.name("entries")],
+            args=[now, now + self.lease_seconds],
+        )
+        if not leased:
+            return None
+
+        key, entry = leased
+        entry = json.loads(entry)
+        return key, entry["url"], entry["callback"]
+
+    def complete(self, key: str) -> None:
+        pipeline = self.client.pipeline()
+        pipeline.zrem(self.name("leases"), key)
+        pipeline.hdel(self.name("entries"), key)
+        pipeline.execute()
+
+    def seen(self, key: str) -> bool:
+        return bool(self.client.sismember(self.name("seen"), key))
+
+    def seen_count(self) -> int:
+        return self.client.scard(self.name("seen"))
+
+    def pending_count(self) -> int:
+        return self.client.zcard(self.name("queue")) + self.client.zcount(
+            self.name("leases"), "-inf", time.time()
+        )
+
+    def active_count(self) -> int:
+        return self.client.zcard(self.name("queue")) + self.client.zcard(
+            self.name("leases")
+        )
+
+    def report(self, worker_id: str, metadata: Dict[str, float]) -> None:
+        pipeline = self.client.pipeline()
+        pipeline.sadd(self.name("workers"), worker_id)
+        if metadata:
+            pipeline.hset(self.name(f"stats:{worker_id}"), mapping=metadata)
+        pipeline.execute()
+
+    def worker_stats(self) -> Dict[str, Dict[str, float]]:
+        return {
+            worker: {
+                key: float(value)
+                for key, value in self.client.hgetall(
+                    self.name(f"stats:{worker}")
+                ).items()
+            }
+            for worker in self.client.smembers(self.name("workers"))
+        }
+
+
+class SharedFrontier(Frontier):
+    """Frontier stored in a :class:`CrawlBackend`.
+
+    Callbacks must be methods of `scraper` (or the default extract), they are
+    stored by name. Forced revisits are not supported: a url is only ever
+    queued once across all workers. While urls are leased by other workers,
+    which may queue more, an idle worker polls every `poll_interval` seconds.
+    """
+
+    shared = True
+
+    def __init__(
+        self, backend: CrawlBackend, scraper: Any, poll_interval: float = 0.1
+    ) -> None:
+        self.backend = backend
+        self.scraper = scraper
+        self.poll_interval = poll_interval
+        self.leased: Dict[str, str] = {}
+
+    def push(self, entry: Any, priority: int = 0) -> None:
+        callback = callback_ref(self.scraper, entry.extract)
+        if callback is not None and not isinstance(callback, str):
+            raise ValueError(
+                "Only scraper methods can be used as callbacks with a shared frontier"
+            )
+        self.backend.add(canonicalize_url(entry.url), entry.url, callback, priority)
+
+    def pop(self) -> Any:
+        from scrapework.scraper import ExtractCallback
+
+        leased = self.backend.lease()
+        if leased is None:
+            raise IndexError("pop from an empty frontier")
+
+        key, url, callback = leased
+        self.leased[url] = key
+        return ExtractCallback(
+            url, resolve_callback(self.scraper, callback) or self.scraper.extract
+        )
+
+    def done(self, entry: Any) -> None:
+        key = self.leased.pop(entry.url, None)
+        if key is not None:
+            self.backend.complete(key)
+
+    def __len__(self) -> int:
+        return self.backend.pending_count()
+
+    def active(self) -> bool:
+        return self.backend.active_count() > 0
+
+
+class SharedSeenSet(SeenSet):
+    def __init__(self, backend: CrawlBackend) -> None:
+        self.backend = backend
+
+    def add(self, url: str) -> None:
+        # Urls are recorded as seen when SharedFrontier queues them
+        pass
+
+    def __contains__(self, url: object) -> bool:
+        return isinstance(url, str) and self.backend.seen(canonicalize_url(url))
+
+    def __len__(self) -> int:
+        return self.backend.seen_count()
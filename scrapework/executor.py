@@ -0,0 +1,199 @@
+import asyncio
+import pickle
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import replace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+from parsel import Selector
+
+from scrapework.core.collector import MetadataCollector
+from scrapework.core.context import Context
+from scrapework.pipeline import as_item_list
+from scrapework.request import Request
+
+# Scraper copy living in a parse worker process, set by the pool initializer
+_worker_scraper: Any = None
+
+
+def callback_ref(scraper: Any, extract: Optional[Callable]) -> Any:
+    """Picklable reference to an extract callback.
+
+    Methods of the scraper are sent by name, so that they resolve to the
+    scraper copy on the other side; other callables are sent as they are.
+    """
+    if extract is None:
+        return None
+    if getattr(extract, "__self__", None) is scraper:
+        return extract.__name__
+    return extract
+
+
+def resolve_callback(scraper: Any, ref: Any) -> Optional[Callable]:
+    if isinstance(ref, str):
+        return getattr(scraper, ref)
+    return ref
+
+
+def discovering(
+    scraper: Any, parse: Callable[[], List[Any]]
+) -> Tuple[List[Any], List[Tuple[str, Optional[Callable], bool, int]]]:
+    """Items of `parse`, with the urls passed to `to_visit` meanwhile.
+
+    The urls are only collected, the caller schedules them from the loop
+    thread.
+    """
+    scraper.page_links.discovered = []
+    try:
+        items = parse()
+        discovered = scraper.page_links.discovered
+    finally:
+        scraper.page_links.discovered = None
+    return items, discovered
+
+
+def extract_in_thread(
+    scraper: Any, ctx: Context, url_with_callback: Any, response: httpx.Response
+) -> Tuple[List[Any], List[Tuple[str, Any, bool, int]], MetadataCollector]:
+    # Collector updates are merged into the run collector by the loop thread
+    ctx = replace(ctx, collector=MetadataCollector())
+    items, discovered = discovering(
+        scraper, lambda: scraper.parse(ctx, url_with_callback, response)
+    )
+    return items, discovered, ctx.collector
+
+
+def init_worker(scraper: Any) -> None:
+    global _worker_scraper
+    _worker_scraper = scraper
+
+
+def extract_in_worker(
+    ref: Any,
+    url: str,
+    status_code: int,
+    headers: List[Tuple[str, str]],
+    content: bytes,
+    variables: Dict[str, Any],
+) -> Tuple[List[Any], List[Tuple[str, Any, bool, int]]]:
+    scraper = _worker_scraper
+    response = httpx.Response(
+        status_code,
+        headers=headers,
+        content=content,
+        request=httpx.Request("GET", url),
+    )
+    ctx = Context(
+        collector=MetadataCollector(),
+        variables=variables,
+        response=response,
+        request=Request(url),
+        logger=scraper.logger,
+    )
+
+    extract = resolve_callback(scraper, ref)
+    items, discovered = discovering(
+        scraper, lambda: as_item_list(extract(ctx, Selector(response.text)))
+    )
+    return items, [
+        (url, callback_ref(scraper, extract), force, priority)
+        for url, extract, force, priority in discovered
+    ]
+
+
+class ParseExecutor:
+    """Runs extract callbacks off the event loop.
+
+    With `kind="process"`, response bodies are shipped to a pool of worker
+    processes holding a copy of the scraper, so parsing uses every core; urls
+    passed to `to_visit` in a worker are sent back and scheduled by the
+    parent. Collector updates made by callbacks in a worker are not sent
+    back. When the scraper cannot be pickled, or with `kind="thread"`, a
+    thread pool is used instead; callbacks then update a collector of their
+    own, merged into the run collector along with scheduling their urls on
+    the loop thread, so run state is never touched from pool threads.
+    """
+
+    def __init__(
+        self, scraper: Any, kind: str = "process", workers: Optional[int] = None
+    ) -> None:
+        if kind not in ("process", "thread"):
+            raise ValueError(f"Unsupported parse executor: {kind}")
+
+        self.scraper = scraper
+        self.logger = scraper.logger
+
+        if kind == "process":
+            try:
+                pickle.dumps(scraper)
+            except Exception as err:
+                self.logger.warning(
+                    f"Scraper cannot be sent to worker processes ({err}), "
+                    "parsing in threads instead"
+                )
+                kind = "thread"
+
+        self.kind = kind
+        self.executor: Executor = (
+            ProcessPoolExecutor(workers, initializer=init_worker, initargs=(scraper,))
+            if kind == "process"
+            else ThreadPoolExecutor(workers)
+        )
+
+    async def extract(
+        self, ctx: Context, url_with_callback: Any, response: httpx.Response
+    ) -> List[Any]:
+        loop = asyncio.get_running_loop()
+
+        memoized = self.scraper.memoized_items(ctx, url_with_callback, response)
+        if memoized is not None:
+            return memoized
+
+        if self.kind == "thread":
+            items, discovered, collector = await loop.run_in_executor(
+                self.executor,
+                extract_in_thread,
+                self.scraper,
+                ctx,
+                url_with_callback,
+                response,
+            )
+            ctx.collector.merge(collector)
+        else:
+            start = time.perf_counter()
+            items, refs = await loop.run_in_executor(
+                self.executor,
+                extract_in_worker,
+                callback_ref(self.scraper, url_with_callback.extract),
+                url_with_callback.url,
+                response.status_code,
+                [
+                    (key, value)
+                    for key, value in response.headers.multi_items()
+                    # The body is shipped decoded
+                    if key.lower() != "content-encoding"
+                ],
+                response.content,
+                ctx.variables,
+            )
+            # Selector construction included, worker timings are not sent back
+            ctx.collector.observe("extract", time.perf_counter() - start)
+            discovered = [
+                (url, resolve_callback(self.scraper, ref), force, priority)
+                for url, ref, force, priority in refs
+            ]
+
+        links = []
+        for url, extract, force, priority in discovered:
+            self.scraper.to_visit(url, extract, force, priority)
+            ref = callback_ref(self.scraper, extract)
+            if ref is None or isinstance(ref, str):
+                links.append((url, ref, priority))
+
+        self.scraper.record_page(ctx, url_with_callback, response, items, links)
+
+        return items
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(cancel_futures=True)
@@ -0,0 +1,179 @@
+import hashlib
+import heapq
+import itertools
+import math
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Deque, Iterator, List, Optional, Set, Tuple
+from urllib.parse import urldefrag
+
+from courlan import normalize_url
+
+
+def canonicalize_url(url: str) -> str:
+    """Canonical form of `url` used for deduplication.
+
+    Drops the fragment, lowercases scheme and host, removes default ports and
+    tracking parameters and sorts the query string.
+    """
+    url, _ = urldefrag(url)
+    try:
+        return normalize_url(url)
+    except Exception:
+        return url
+
+
+class Frontier(ABC):
+    """Queue of urls waiting to be fetched."""
+
+    # Shared frontiers are drained one url at a time by each worker
+    shared: bool = False
+    # Seconds to wait before checking again for urls while `active` but empty
+    poll_interval: Optional[float] = None
+
+    @abstractmethod
+    def push(self, entry: Any, priority: int = 0) -> None:
+        pass
+
+    @abstractmethod
+    def pop(self) -> Any:
+        pass
+
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def active(self) -> bool:
+        """Whether urls may still be popped, now or once in-flight ones finish."""
+        return bool(self)
+
+    def done(self, entry: Any) -> None:
+        """Called once `entry` has been processed, successfully or not."""
+        pass
+
+
+class FifoFrontier(Frontier):
+    """Breadth-first frontier, O(1) push and pop. `priority` is ignored."""
+
+    def __init__(self) -> None:
+        self.queue: Deque[Any] = deque()
+
+    def push(self, entry: Any, priority: int = 0) -> None:
+        self.queue.append(entry)
+
+    def pop(self) -> Any:
+        return self.queue.popleft()
+
+    def __len__(self) -> int:
+        return len(self.queue)
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.queue)
+
+
+class PriorityFrontier(Frontier):
+    """Heap based frontier, lowest priority first, FIFO within a priority."""
+
+    def __init__(self) -> None:
+        self.heap: List[Tuple[int, int, Any]] = []
+        self.counter = itertools.count()
+
+    def push(self, entry: Any, priority: int = 0) -> None:
+        heapq.heappush(self.heap, (priority, next(self.counter), entry))
+
+    def pop(self) -> Any:
+        return heapq.heappop(self.heap)[2]
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+    def __iter__(self) -> Iterator[Any]:
+        return (entry for _, _, entry in sorted(self.heap))
+
+
+class SeenSet(ABC):
+    """Set of canonical urls already scheduled."""
+
+    @abstractmethod
+    def add(self, url: str) -> None:
+        pass
+
+    @abstractmethod
+    def __contains__(self, url: object) -> bool:
+        pass
+
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+
+
+class MemorySeenSet(SeenSet):
+    def __init__(self) -> None:
+        self.urls: Set[str] = set()
+
+    def add(self, url: str) -> None:
+        self.urls.add(canonicalize_url(url))
+
+    def __contains__(self, url: object) -> bool:
+        return isinstance(url, str) and canonicalize_url(url) in self.urls
+
+    def __len__(self) -> int:
+        return len(self.urls)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.urls)
+
+
+class BloomSeenSet(SeenSet):
+    """Fixed-size Bloom filter for very large crawls.
+
+    Memory is bounded by `capacity` and `error_rate`; membership tests may
+    return false positives (a url skipped although never seen) at roughly
+    `error_rate` once `capacity` urls have been added, but never false
+    negatives.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001) -> None:
+        if capacity <= 0:
+            raise ValueError("capacity must be a positive integer")
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1")
+
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def positions(self, url: str) -> Iterator[int]:
+        digest = hashlib.blake2b(
+            canonicalize_url(url).encode(), digest_size=16
+        ).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, url: str) -> None:
+        added = False
+        for position in self.positions(url):
+            byte, bit = divmod(position, 8)
+            if not self.bits[byte] & (1 << bit):
+                self.bits[byte] |= 1 << bit
+                added = True
+        if added:
+            self.count += 1
+
+    def __contains__(self, url: object) -> bool:
+        if not isinstance(url, str):
+            return False
+        return all(
+            self.bits[position // 8] & (1 << (position % 8))
+            for position in self.positions(url)
+        )
+
+    def __len__(self) -> int:
+        return self.count
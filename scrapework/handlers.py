@@ -1,13 +1,31 @@
+import gzip
 import json
 import logging
+import os
+import time
+import types
+import zlib
 from abc import abstractmethod
 from dataclasses import asdict, is_dataclass
-from typing import Any, Dict, Iterable, Union
+from datetime import date, datetime
+from typing import (
+    Any,
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Union,
+    get_args,
+    get_origin,
+)
 
-import boto3
 from pydantic import BaseModel, Field
 
 from scrapework.core.context import Context
+from scrapework.items import Item, ItemBatch
 from scrapework.module import Module
 
 
@@ -27,42 +45,259 @@ class Handler(Module):
     ):
         pass
 
+    def close(self, ctx: Context):
+        """Release resources held for the run, called once the run completes."""
+        pass
 
-def encode_items(items: Union[Dict[str, Any], Iterable[Dict[str, Any]]]):
-    if isinstance(items, BaseModel):
-        items = items.model_dump()
+    def abort(self, ctx: Context):
+        """Called instead of `close` when the run fails, closes by default."""
+        self.close(ctx)
+
+
+def _dump_model(item: BaseModel) -> Dict[str, Any]:
+    return item.model_dump()
+
+
+def _dump_dataclass(item: Any) -> Dict[str, Any]:
+    return asdict(item)
+
+
+def _dump_item(item: Item) -> Dict[str, Any]:
+    return item.to_dict()
+
+
+def _dump_unchanged(item: Any) -> Any:
+    return item
 
-    elif isinstance(items, Iterable) and all(
-        isinstance(item, BaseModel) for item in items
-    ):
-        items = [item.model_dump() for item in items]  # type: ignore
-    elif is_dataclass(items):
-        items = asdict(items)  # type: ignore
-    elif isinstance(items, Iterable) and all(is_dataclass(item) for item in items):
-        items = [asdict(item) for item in items]  # type: ignore
-    # Ensure items are a list of dictionaries or a single dictionary
-    if isinstance(items, Dict):
-        items = [items]  # type: ignore
-    elif isinstance(items, Iterable):
-        items = list(items)
 
-    return items
+_ENCODERS: Dict[type, Callable[[Any], Any]] = {dict: _dump_unchanged}
+
+
+def encoder_for(cls: type) -> Callable[[Any], Any]:
+    """Return the function turning instances of `cls` into plain data.
+
+    The lookup is resolved once per type and cached, so encoding many items
+    costs a single dict lookup each.
+    """
+    encoder = _ENCODERS.get(cls)
+    if encoder is None:
+        if issubclass(cls, dict):
+            encoder = _dump_unchanged
+        elif issubclass(cls, BaseModel):
+            encoder = _dump_model
+        elif issubclass(cls, Item):
+            encoder = _dump_item
+        elif is_dataclass(cls):
+            encoder = _dump_dataclass
+        else:
+            encoder = _dump_unchanged
+        _ENCODERS[cls] = encoder
+    return encoder
+
+
+def is_single_item(items: Any) -> bool:
+    return isinstance(items, (dict, BaseModel, Item)) or (
+        is_dataclass(items) and not isinstance(items, type)
+    )
+
+
+def iter_encoded_items(
+    items: Union[Dict[str, Any], Iterable[Any]],
+) -> Iterator[Dict[str, Any]]:
+    """Lazily encode a single item or an iterable of items, in one pass.
+
+    Items can be dicts, pydantic models, dataclasses or
+    :class:`scrapework.items.Item`, mixed freely, or an
+    :class:`scrapework.items.ItemBatch`. Generators are consumed once.
+    """
+    if is_single_item(items):
+        yield encoder_for(type(items))(items)
+        return
+
+    encoders = _ENCODERS
+    for item in items:
+        cls = type(item)
+        if cls is dict:
+            yield item
+        else:
+            yield (encoders.get(cls) or encoder_for(cls))(item)
+
+
+def encode_items(items: Union[Dict[str, Any], Iterable[Any]]) -> List[Dict[str, Any]]:
+    return list(iter_encoded_items(items))
+
+
+def stdlib_json_dumps(obj: Any) -> bytes:
+    return json.dumps(obj).encode()
+
+
+# Use orjson when it is installed, it is several times faster than json
+try:
+    import orjson
+
+    json_dumps: Callable[[Any], bytes] = orjson.dumps
+except ImportError:
+    json_dumps = stdlib_json_dumps
+
+
+COMPRESSION_SUFFIXES = {None: "", "gzip": ".gz", "zstd": ".zst"}
+
+
+def output_name(
+    filename: str, index: Optional[int] = None, compression: Optional[str] = None
+) -> str:
+    """Name of a (possibly rotated and compressed) output file or object."""
+    if index is not None:
+        root, ext = os.path.splitext(filename)
+        filename = f"{root}-{index:05d}{ext}"
+    return filename + COMPRESSION_SUFFIXES[compression]
+
+
+def import_zstandard():
+    try:
+        import zstandard
+    except ImportError as err:
+        raise ImportError(
+            "zstd compression requires the zstandard package "
+            "(pip install scrapework[zstd])"
+        ) from err
+    return zstandard
+
+
+# S3 rejects multipart parts smaller than 5MiB, except for the last one
+MIN_PART_SIZE = 5 * 1024 * 1024
 
 
 class JsonFileHandler(Handler):
+    """Write items to a JSON file holding a single array.
+
+    The file is opened on the first batch and kept open for the run, every
+    batch is appended to the array and the array is terminated on `close`,
+    so batches streamed with `stream_items` all reach the file.
+    """
+
     filename: str
 
     def __init__(self, filename: str):
         super().__init__()
         self.filename = filename
+        self.file: Optional[BinaryIO] = None
+        self.items_count = 0
+
+    def process_items(
+        self, ctx: Context, items: Union[Dict[str, Any], Iterable[Dict[str, Any]]]
+    ):
+        if self.file is None:
+            self.file = open(self.filename, "wb")
+            self.file.write(b"[")
+            self.items_count = 0
+
+        for item in iter_encoded_items(items):
+            if self.items_count:
+                self.file.write(b",")
+            self.file.write(json_dumps(item))
+            self.items_count += 1
+
+        self.file.flush()
+        ctx.logger.info(f"Items written to {self.filename}")
+
+    def close(self, ctx: Context):
+        if self.file is None:
+            return
+
+        file, self.file = self.file, None
+        file.write(b"]")
+        file.close()
+
+
+class JsonLinesFileHandler(Handler):
+    """Append items to a JSON Lines file, one record per line.
+
+    The file is opened once and kept open for the run, each batch is appended
+    and flushed so a crash only loses the batch in progress. Output can be
+    compressed with `gzip` or `zstd` (requires `zstandard`) and rotated once
+    `max_bytes` of uncompressed data has been written to the current file.
+    """
+
+    filename: str
+    compression: Optional[str] = None
+    max_bytes: Optional[int] = None
+    buffer_size: int = 1024 * 1024
+
+    def __init__(
+        self,
+        filename: str,
+        compression: Optional[str] = None,
+        max_bytes: Optional[int] = None,
+        buffer_size: int = 1024 * 1024,
+        dumps: Optional[Callable[[Any], bytes]] = None,
+    ):
+        super().__init__()
+        if compression not in COMPRESSION_SUFFIXES:
+            raise ValueError(f"Unsupported compression: {compression}")
+
+        self.filename = filename
+        self.compression = compression
+        self.max_bytes = max_bytes
+        self.buffer_size = buffer_size
+        self.dumps = dumps or json_dumps
+        self.file: Optional[BinaryIO] = None
+        self.file_bytes = 0
+        self.file_index = 0
+
+    def current_filename(self) -> str:
+        return output_name(
+            self.filename,
+            self.file_index if self.max_bytes else None,
+            self.compression,
+        )
+
+    def open(self) -> BinaryIO:
+        filename = self.current_filename()
+        raw = open(filename, "ab", buffering=self.buffer_size)
+        self.file_bytes = 0
+
+        if self.compression == "gzip":
+            return gzip.GzipFile(fileobj=raw, mode="ab")  # type: ignore
+
+        if self.compression == "zstd":
+            return import_zstandard().ZstdCompressor().stream_writer(raw)
+
+        return raw
+
+    def rotate(self, ctx: Context):
+        self.close(ctx)
+        self.file_index += 1
 
     def process_items(
         self, ctx: Context, items: Union[Dict[str, Any], Iterable[Dict[str, Any]]]
     ):
+        for item in iter_encoded_items(items):
+            if self.file is None:
+                self.file = self.open()
+
+            line = self.dumps(item) + b"\n"
+            self.file.write(line)
+            self.file_bytes += len(line)
+
+            if self.max_bytes and self.file_bytes >= self.max_bytes:
+                self.rotate(ctx)
+
+        if self.file is not None:
+            self.file.flush()
+        ctx.logger.info(f"Items appended to {self.current_filename()}")
 
-        with open(self.filename, "w") as f:
-            json.dump(encode_items(items), f)
-        self.logger.info(f"Items written to {self.filename}")
+    def close(self, ctx: Context):
+        if self.file is None:
+            return
+
+        file, self.file = self.file, None
+        if isinstance(file, gzip.GzipFile):
+            fileobj = file.fileobj
+            file.close()
+            fileobj.close()  # type: ignore
+        else:
+            file.close()
 
 
 class S3Handler(Handler):
@@ -78,10 +313,348 @@ class S3Handler(Handler):
         self, ctx: Context, items: Union[Dict[str, Any], Iterable[Dict[str, Any]]]
     ):
 
+        import boto3
+
         s3_client = boto3.client("s3")
 
         s3_client.put_object(
-            Body=json.dumps(encode_items(items)),
+            Body=json_dumps(encode_items(items)),
             Bucket=self.s3_bucket,
             Key=self.filename,
         )
+
+
+class S3StreamHandler(Handler):
+    """Stream items to S3 as JSON Lines using multipart uploads.
+
+    One boto3 client is reused for the run. Encoded items are buffered and
+    uploaded as a part whenever `part_size` bytes are pending, so memory stays
+    bounded by the part size. The current object is completed and a new one
+    started once it reaches `max_object_bytes` or `max_object_age` seconds.
+    Objects can be `gzip` or `zstd` compressed.
+    """
+
+    s3_bucket: str
+    filename: str
+    part_size: int = MIN_PART_SIZE
+    max_object_bytes: Optional[int] = None
+    max_object_age: Optional[float] = None
+    compression: Optional[str] = None
+
+    def __init__(
+        self,
+        s3_bucket: str,
+        filename: str,
+        part_size: int = MIN_PART_SIZE,
+        max_object_bytes: Optional[int] = None,
+        max_object_age: Optional[float] = None,
+        compression: Optional[str] = None,
+        client_kwargs: Optional[Dict[str, Any]] = None,
+        dumps: Optional[Callable[[Any], bytes]] = None,
+    ):
+        super().__init__()
+        if part_size < MIN_PART_SIZE:
+            raise ValueError(f"part_size must be at least {MIN_PART_SIZE} bytes")
+        if compression not in COMPRESSION_SUFFIXES:
+            raise ValueError(f"Unsupported compression: {compression}")
+
+        self.s3_bucket = s3_bucket
+        self.filename = filename
+        self.part_size = part_size
+        self.max_object_bytes = max_object_bytes
+        self.max_object_age = max_object_age
+        self.compression = compression
+        self.client_kwargs = client_kwargs or {}
+        self.dumps = dumps or json_dumps
+        self.s3_client = None
+        self.object_index = 0
+        self.reset_upload()
+
+    def reset_upload(self):
+        self.upload_id: Optional[str] = None
+        self.parts: List[Dict[str, Any]] = []
+        self.buffer = bytearray()
+        self.object_bytes = 0
+        self.object_started = time.monotonic()
+        self.compressor = self.build_compressor()
+
+    def build_compressor(self):
+        if self.compression == "gzip":
+            return zlib.compressobj(wbits=31)
+        if self.compression == "zstd":
+            return import_zstandard().ZstdCompressor().compressobj()
+        return None
+
+    def rollover(self) -> bool:
+        return self.object_bytes > 0 and (
+            (self.max_object_bytes and self.object_bytes >= self.max_object_bytes)
+            or (
+                self.max_object_age is not None
+                and time.monotonic() - self.object_started >= self.max_object_age
+            )
+        )
+
+    @property
+    def client(self):
+        if self.s3_client is None:
+            import boto3
+
+            self.s3_client = boto3.client("s3", **self.client_kwargs)
+        return self.s3_client
+
+    def current_key(self) -> str:
+        rotated = self.max_object_bytes or self.max_object_age is not None
+        return output_name(
+            self.filename, self.object_index if rotated else None, self.compression
+        )
+
+    def upload_part(self):
+        if self.upload_id is None:
+            self.upload_id = self.client.create_multipart_upload(
+                Bucket=self.s3_bucket, Key=self.current_key()
+            )["UploadId"]
+
+        part_number = len(self.parts) + 1
+        response = self.client.upload_part(
+            Body=bytes(self.buffer),
+            Bucket=self.s3_bucket,
+            Key=self.current_key(),
+            PartNumber=part_number,
+            UploadId=self.upload_id,
+        )
+        self.parts.append({"ETag": response["ETag"], "PartNumber": part_number})
+        self.buffer = bytearray()
+
+    def complete_upload(self, ctx: Context):
+        if self.compressor is not None:
+            self.buffer += self.compressor.flush()
+
+        if self.buffer or self.parts:
+            self.upload_part()
+            self.client.complete_multipart_upload(
+                Bucket=self.s3_bucket,
+                Key=self.current_key(),
+                MultipartUpload={"Parts": self.parts},
+                UploadId=self.upload_id,
+            )
+            ctx.logger.info(
+                f"Items uploaded to s3://{self.s3_bucket}/{self.current_key()}"
+            )
+            self.object_index += 1
+
+        self.reset_upload()
+
+    def abort_upload(self):
+        if self.upload_id is not None:
+            self.client.abort_multipart_upload(
+                Bucket=self.s3_bucket, Key=self.current_key(), UploadId=self.upload_id
+            )
+        self.reset_upload()
+
+    def upload(self, step: Callable[[], None]) -> None:
+        """Run an upload step, aborting the upload in progress if it fails."""
+        try:
+            step()
+        except Exception:
+            self.abort_upload()
+            raise
+
+    def process_items(
+        self, ctx: Context, items: Union[Dict[str, Any], Iterable[Dict[str, Any]]]
+    ):
+        for item in iter_encoded_items(items):
+            # Items that cannot be serialized raise, leaving the upload as is
+            line = self.dumps(item) + b"\n"
+            self.object_bytes += len(line)
+            if self.compressor is not None:
+                line = self.compressor.compress(line)
+            self.buffer += line
+
+            if len(self.buffer) >= self.part_size:
+                self.upload(self.upload_part)
+
+            if self.rollover():
+                self.upload(lambda: self.complete_upload(ctx))
+
+    def close(self, ctx: Context):
+        self.upload(lambda: self.complete_upload(ctx))
+
+    def abort(self, ctx: Context):
+        # Objects already completed are kept, the one in progress is dropped
+        self.abort_upload()
+
+
+def import_pyarrow():
+    try:
+        import pyarrow
+    except ImportError as err:
+        raise ImportError(
+            "Parquet and Arrow output require the pyarrow package "
+            "(pip install scrapework[parquet])"
+        ) from err
+    return pyarrow
+
+
+def arrow_type(annotation: Any) -> Any:
+    """Arrow type of a python annotation, None when it is left to inference."""
+    pa = import_pyarrow()
+    if annotation is None or isinstance(annotation, pa.DataType):
+        return annotation
+
+    origin = get_origin(annotation)
+    if origin in (Union, types.UnionType):
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        return arrow_type(args[0]) if len(args) == 1 else None
+    if origin is list:
+        args = get_args(annotation)
+        value_type = arrow_type(args[0]) if args else None
+        return None if value_type is None else pa.list_(value_type)
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        fields = {
+            name: arrow_type(field.annotation)
+            for name, field in annotation.model_fields.items()
+        }
+        if None in fields.values():
+            return None
+        return pa.struct(list(fields.items()))
+
+    return {
+        str: pa.string(),
+        int: pa.int64(),
+        float: pa.float64(),
+        bool: pa.bool_(),
+        bytes: pa.binary(),
+        datetime: pa.timestamp("us"),
+        date: pa.date32(),
+    }.get(annotation)
+
+
+def declared_types(schema: Any) -> Optional[Dict[str, Any]]:
+    """Column types declared by a pyarrow schema, an Item or a pydantic model.
+
+    Item fields declare their type with ``Field(type=...)``, either a python
+    annotation or a pyarrow type. Columns typed None are inferred from the
+    first row group.
+    """
+    if schema is None:
+        return None
+    if isinstance(schema, type) and issubclass(schema, Item):
+        return {name: arrow_type(f.get("type")) for name, f in schema.fields.items()}
+    if isinstance(schema, type) and issubclass(schema, BaseModel):
+        return {
+            name: arrow_type(field.annotation)
+            for name, field in schema.model_fields.items()
+        }
+    return {field.name: field.type for field in schema}
+
+
+class ParquetFileHandler(Handler):
+    """Write items to a Parquet file, or an Arrow IPC file, in row groups.
+
+    Items are buffered in an :class:`scrapework.items.ItemBatch`, one list per
+    column, and written as a row group every `row_group_size` items, so
+    memory stays bounded by a row group. Columns are declared by `schema`,
+    a pyarrow schema, an :class:`scrapework.items.Item` or a pydantic model;
+    undeclared types, and the whole schema when none is given, are inferred
+    from the first row group. Columns not in the schema are dropped. Requires
+    `pyarrow`.
+    """
+
+    filename: str
+    row_group_size: int = 50_000
+    compression: Optional[str] = "zstd"
+    format: str = "parquet"
+
+    def __init__(
+        self,
+        filename: str,
+        schema: Any = None,
+        row_group_size: int = 50_000,
+        compression: Optional[str] = "zstd",
+        format: str = "parquet",
+    ):
+        super().__init__()
+        if format not in ("parquet", "arrow"):
+            raise ValueError(f"Unsupported format: {format}")
+
+        self.filename = filename
+        self.types = declared_types(schema)
+        self.row_group_size = row_group_size
+        self.compression = compression
+        self.format = format
+        self.schema: Any = None
+        self.writer: Any = None
+        self.batch = ItemBatch(self.types)
+        self.dropped: set = set()
+
+    def build_schema(self, batch: ItemBatch) -> Any:
+        pa = import_pyarrow()
+        types = self.types or dict.fromkeys(batch.columns)
+        fields = []
+        for name, type_ in types.items():
+            if type_ is None and name in batch.columns:
+                type_ = pa.array(batch.column(name)).type
+            if type_ is None or pa.types.is_null(type_):
+                # Nothing to infer from, values later in the run are kept as text
+                type_ = pa.string()
+            fields.append(pa.field(name, type_))
+        return pa.schema(fields)
+
+    def open(self, schema: Any) -> Any:
+        pa = import_pyarrow()
+        if self.format == "arrow":
+            options = pa.ipc.IpcWriteOptions(compression=self.compression)
+            return pa.ipc.new_file(self.filename, schema, options=options)
+
+        import pyarrow.parquet as pq
+
+        return pq.ParquetWriter(
+            self.filename, schema, compression=self.compression or "none"
+        )
+
+    def write_batch(self, ctx: Context):
+        batch, self.batch = self.batch, ItemBatch(self.types)
+        if not len(batch):
+            return
+
+        pa = import_pyarrow()
+        if self.schema is None:
+            self.schema = self.build_schema(batch)
+            self.writer = self.open(self.schema)
+
+        dropped = set(batch.columns) - set(self.schema.names) - self.dropped
+        if dropped:
+            ctx.logger.warning(f"Columns not in the schema dropped: {dropped}")
+            self.dropped |= dropped
+
+        arrays = [
+            (
+                pa.array(batch.column(field.name), type=field.type)
+                if field.name in batch.columns
+                else pa.nulls(len(batch), type=field.type)
+            )
+            for field in self.schema
+        ]
+        table = pa.Table.from_arrays(arrays, schema=self.schema)
+        if self.format == "arrow":
+            self.writer.write_table(table)
+        else:
+            self.writer.write_table(table, row_group_size=len(batch))
+
+    def process_items(
+        self, ctx: Context, items: Union[Dict[str, Any], Iterable[Dict[str, Any]]]
+    ):
+        if is_single_item(items):
+            items = [items]
+
+        for item in items:
+            self.batch.append(item)
+            if len(self.batch) >= self.row_group_size:
+                self.write_batch(ctx)
+
+    def close(self, ctx: Context):
+        self.write_batch(ctx)
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+            ctx.logger.info(f"Items written to {self.filename}")
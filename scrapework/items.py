@@ -8,16 +8,36 @@ from abc import ABCMeta
 from collections.abc import MutableMapping
 from copy import deepcopy
 from pprint import pformat
-from typing import Dict
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 
 class Field(dict):
     """Container of field metadata"""
 
 
+class _Unset:
+    """Marker of a field without a value."""
+
+    __slots__ = ()
+
+    def __repr__(self):
+        return "<unset>"
+
+    def __reduce__(self):
+        return "UNSET"
+
+
+UNSET = _Unset()
+
+
 class ItemMeta(ABCMeta):
     """Metaclass_ of :class:`Item` that handles field definitions.
 
+    Fields are collected in declaration order, inherited ones first, and each
+    one is given a position in the list holding the values of an instance.
+    Item classes get empty ``__slots__`` (plus any they declare), so
+    instances carry that list and nothing else.
+
     .. _metaclass: https://realpython.com/python-metaclasses
     """
 
@@ -26,16 +46,25 @@ class ItemMeta(ABCMeta):
         new_bases = tuple(base._class for base in bases if hasattr(base, "_class"))
         _class = super().__new__(mcs, "x_" + class_name, new_bases, attrs)
 
-        fields = getattr(_class, "fields", {})
+        fields = {}
+        for base in bases:
+            fields.update(getattr(base, "fields", {}))
+        for n, v in attrs.items():
+            if isinstance(v, Field):
+                fields[n] = v
+
         new_attrs = {}
         for n in dir(_class):
             v = getattr(_class, n)
             if isinstance(v, Field):
-                fields[n] = v
+                fields.setdefault(n, v)
             elif n in attrs:
                 new_attrs[n] = attrs[n]
 
         new_attrs["fields"] = fields
+        new_attrs["_names"] = tuple(fields)
+        new_attrs["_index"] = {n: i for i, n in enumerate(fields)}
+        new_attrs["__slots__"] = tuple(attrs.get("__slots__", ()))
         new_attrs["_class"] = _class
         if classcell is not None:
             new_attrs["__classcell__"] = classcell
@@ -61,29 +90,54 @@ class Item(MutableMapping, metaclass=ItemMeta):
     data is processed internally. Please refer to the :ref:`documentation
     about fields <topics-items-fields>` for additional information.
 
-    Unlike instances of :class:`dict`, instances of :class:`Item` may be
-    :ref:`tracked <topics-leaks-trackrefs>` to debug memory leaks.
+    Values are kept in a list indexed by field, in declaration order, and
+    iterating an item follows that order. Instances have no ``__dict__``:
+    subclasses needing extra private attributes must declare them in
+    ``__slots__``.
     """
 
+    __slots__ = ("_values",)
+
     fields: Dict[str, Field]
+    _names: Tuple[str, ...]
+    _index: Dict[str, int]
+    _values: List[Any]
 
     def __init__(self, *args, **kwargs):
-        self._values = {}
+        values = [UNSET] * len(self._names)
+        object.__setattr__(self, "_values", values)
         if args or kwargs:  # avoid creating dict for most common case
-            for k, v in dict(*args, **kwargs).items():
-                self[k] = v
+            index = self._index
+            for k, v in (dict(*args, **kwargs) if args else kwargs).items():
+                if k not in index:
+                    raise KeyError(
+                        f"{self.__class__.__name__} does not support field: {k}"
+                    )
+                values[index[k]] = v
 
     def __getitem__(self, key):
-        return self._values[key]
+        value = self._values[self._index[key]]
+        if value is UNSET:
+            raise KeyError(key)
+        return value
 
     def __setitem__(self, key, value):
-        if key in self.fields:
-            self._values[key] = value
-        else:
-            raise KeyError(f"{self.__class__.__name__} does not support field: {key}")
+        try:
+            self._values[self._index[key]] = value
+        except KeyError:
+            raise KeyError(
+                f"{self.__class__.__name__} does not support field: {key}"
+            ) from None
 
     def __delitem__(self, key):
-        del self._values[key]
+        index = self._index[key]
+        if self._values[index] is UNSET:
+            raise KeyError(key)
+        self._values[index] = UNSET
+
+    def __contains__(self, key):
+        index = self._index.get(key)
+        return index is not None and self._values[index] is not UNSET
 
     def __getattr__(self, name):
         if name in self.fields:
@@ -96,20 +150,93 @@ class Item(MutableMapping, metaclass=ItemMeta):
         super().__setattr__(name, value)
 
     def __len__(self):
-        return len(self._values)
+        return sum(1 for v in self._values if v is not UNSET)
 
     def __iter__(self):
-        return iter(self._values)
+        return (n for n, v in zip(self._names, self._values) if v is not UNSET)
 
-    def keys(self):
-        return self._values.keys()
+    def __reduce__(self):
+        return self.__class__, (self.to_dict(),)
 
     def __repr__(self):
-        return pformat(dict(self))
+        return pformat(self.to_dict())
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the fields set on this item as a plain dict."""
+        return {n: v for n, v in zip(self._names, self._values) if v is not UNSET}
 
     def copy(self):
-        return self.__class__(self)
+        item = self.__class__.__new__(self.__class__)
+        object.__setattr__(item, "_values", self._values.copy())
+        return item
 
     def deepcopy(self):
         """Return a :func:`~copy.deepcopy` of this item."""
         return deepcopy(self)
+
+
+class ItemBatch:
+    """Columnar container of items, one list of values per field.
+
+    Items are appended row by row and kept as columns, without a dict per
+    item. :class:`Item` instances are copied straight from their value list;
+    dicts, pydantic models and dataclasses are encoded first. Columns are
+    added as new keys show up, rows lacking a key hold :data:`UNSET` in its
+    column. :meth:`rows` rebuilds one dict per item, for row-oriented
+    handlers, and :meth:`column` returns a column with missing values as
+    ``None``, for columnar ones.
+    """
+
+    def __init__(self, names: Optional[Iterable[str]] = None) -> None:
+        self.columns: Dict[str, List[Any]] = {name: [] for name in names or ()}
+        self.size = 0
+
+    @classmethod
+    def from_items(cls, items: Iterable[Any]) -> "ItemBatch":
+        batch = cls()
+        batch.extend(items)
+        return batch
+
+    def add_column(self, name: str) -> List[Any]:
+        column = self.columns[name] = [UNSET] * self.size
+        return column
+
+    def append(self, item: Any) -> None:
+        if isinstance(item, Item):
+            names, values = item._names, item._values
+        else:
+            # Late import, handlers depends on this module
+            from scrapework.handlers import encoder_for
+
+            row = item if type(item) is dict else encoder_for(type(item))(item)
+            names, values = tuple(row), tuple(row.values())
+
+        columns = self.columns
+        for name, value in zip(names, values):
+            column = columns.get(name)
+            if column is None:
+                column = self.add_column(name)
+            column.append(value)
+
+        self.size += 1
+        for column in columns.values():
+            if len(column) < self.size:
+                column.append(UNSET)
+
+    def extend(self, items: Iterable[Any]) -> None:
+        for item in items:
+            self.append(item)
+
+    def column(self, name: str) -> List[Any]:
+        return [None if v is UNSET else v for v in self.columns[name]]
+
+    def rows(self) -> Iterator[Dict[str, Any]]:
+        names = tuple(self.columns)
+        for values in zip(*self.columns.values()):
+            yield {n: v for n, v in zip(names, values) if v is not UNSET}
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return self.rows()
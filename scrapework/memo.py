@@ -0,0 +1,90 @@
+import hashlib
+import pickle
+from types import CodeType
+from typing import Any, Callable, List, Optional, Tuple
+
+from scrapework.revalidation import Link
+
+
+def update_code_digest(digest: Any, code: CodeType) -> None:
+    digest.update(code.co_code)
+    for const in code.co_consts:
+        if isinstance(const, CodeType):
+            # Nested functions and comprehensions
+            update_code_digest(digest, const)
+        else:
+            digest.update(repr(const).encode())
+    digest.update(repr(code.co_names).encode())
+
+
+def callback_fingerprint(callback: Callable) -> str:
+    """Identity of an extract callback, changing whenever its code changes.
+
+    Only the callback's own bytecode is hashed, not the helpers it calls;
+    bump `version` of :class:`ParseMemo` when those change.
+    """
+    func = getattr(callback, "__func__", callback)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{func.__module__}.{func.__qualname__}".encode())
+    code = getattr(func, "__code__", None)
+    if code is not None:
+        update_code_digest(digest, code)
+    return digest.hexdigest()
+
+
+class ParseMemo:
+    """Extracted items memoized by callback and page content.
+
+    Entries are keyed by the callback fingerprint, `version` and a hash of
+    the response body (and of the page url unless `per_url` is False, e.g.
+    to share results between mirrors when items do not depend on the url),
+    and hold the items and the links passed to
+    `to_visit`. They are stored in a :class:`SQLiteCache`, which evicts the
+    least recently used entries beyond `max_entries` / `max_bytes`.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        version: str = "",
+        max_entries: Optional[int] = 100_000,
+        max_bytes: Optional[int] = None,
+        per_url: bool = True,
+    ) -> None:
+        # cache_storage pulls in hishel, only needed once memoization is on
+        from scrapework.cache_storage import SQLiteCache
+
+        self.version = version
+        self.per_url = per_url
+        self.cache = SQLiteCache(path, max_entries=max_entries, max_bytes=max_bytes)
+        self.fingerprints: dict = {}
+
+    def key(self, callback: Callable, url: str, content: bytes) -> str:
+        func = getattr(callback, "__func__", callback)
+        fingerprint = self.fingerprints.get(func)
+        if fingerprint is None:
+            fingerprint = self.fingerprints[func] = callback_fingerprint(func)
+
+        digest = hashlib.blake2b(content, digest_size=16)
+        if self.per_url:
+            digest.update(url.encode())
+        return f"{fingerprint}:{self.version}:{digest.hexdigest()}"
+
+    def get(self, key: str) -> Optional[Tuple[List[Any], List[Link]]]:
+        data = self.cache.get(key)
+        return None if data is None else pickle.loads(data)
+
+    def put(self, key: str, items: List[Any], links: List[Link]) -> bool:
+        """Memoize a parse result, returns False when items cannot be pickled."""
+        try:
+            data = pickle.dumps((items, links), protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            return False
+        self.cache.put(key, data)
+        return True
+
+    def clear(self) -> None:
+        self.cache.clear()
+
+    def close(self) -> None:
+        self.cache.close()
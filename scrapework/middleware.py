@@ -1,14 +1,17 @@
+import itertools
 from abc import abstractmethod
 from random import choice
-from typing import List
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional
 from urllib.parse import urlencode
 
-from fake_useragent import UserAgent
-
+from scrapework.browser import DEFAULT_BLOCKED_RESOURCES, AsyncBrowserPool, BrowserPool
 from scrapework.core.context import Context
 from scrapework.module import Module
 from scrapework.request import Request
 
+if TYPE_CHECKING:
+    from fake_useragent import UserAgent
+
 
 class Proxy:
     url: str
@@ -26,6 +29,13 @@ class RequestMiddleware(Module):
     def process_request(self, ctx: Context, request: Request):
         raise NotImplementedError
 
+    def close(self):
+        """Release resources held for the run, called once the run completes."""
+        pass
+
+    async def aclose(self):
+        self.close()
+
 
 class AnonymousHeaderMiddleware(RequestMiddleware):
     def process_request(self, ctx: Context, request: Request):
@@ -40,8 +50,16 @@ class DefaultHeadersMiddleware(RequestMiddleware):
 
 
 class LoggingMiddleware(RequestMiddleware):
+    """Logs requests, one in `every` of them (none when `every` is 0)."""
+
+    def __init__(self, every: int = 1) -> None:
+        super().__init__()
+        self.every = every
+        self.requests = itertools.count()
+
     def process_request(self, ctx: Context, request: Request):
-        self.logger.info(f"Making request to {request.url}")
+        if self.every > 0 and next(self.requests) % self.every == 0:
+            ctx.logger.info("Making request to %s", request.url)
         return request
 
 
@@ -81,9 +99,11 @@ class ScrapeOpsMiddleware(RequestMiddleware):
 
 
 class FakeUserAgentMiddleware(RequestMiddleware):
-    ua: UserAgent
+    ua: "UserAgent"
 
     def __init__(self) -> None:
+        from fake_useragent import UserAgent
+
         super().__init__()
         self.ua = UserAgent()
 
@@ -106,6 +126,40 @@ class ProxyRotationMiddleware(RequestMiddleware):
 
 
 class PlaywrightMiddleware(RequestMiddleware):
+    """Render pages in Chromium, reusing browsers and pages for the whole run.
+
+    `pages` pages are kept warm (used concurrently by async runs), each one
+    replaced after `max_page_uses` fetches, and requests for
+    `blocked_resources` types are aborted by the browser.
+    """
+
+    browser_pool: BrowserPool
+    async_browser_pool: AsyncBrowserPool
+
+    def __init__(
+        self,
+        pages: int = 4,
+        blocked_resources: Iterable[str] = DEFAULT_BLOCKED_RESOURCES,
+        launch_kwargs: Optional[Dict[str, Any]] = None,
+        max_page_uses: Optional[int] = None,
+    ) -> None:
+        super().__init__()
+        self.browser_pool = BrowserPool(
+            1, blocked_resources, launch_kwargs, max_page_uses
+        )
+        self.async_browser_pool = AsyncBrowserPool(
+            pages, blocked_resources, launch_kwargs, max_page_uses
+        )
+
     def process_request(self, ctx: Context, request: Request):
         request.playwright = True
+        request.browser_pool = self.browser_pool
+        request.async_browser_pool = self.async_browser_pool
         return request
+
+    def close(self):
+        self.browser_pool.close()
+
+    async def aclose(self):
+        await self.async_browser_pool.close()
+        self.close()
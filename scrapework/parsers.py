@@ -1,7 +1,6 @@
 from typing import Any, Dict, Iterable, Union
 
 from parsel import Selector
-from trafilatura import bare_extraction
 
 from scrapework.core.context import Context
 
@@ -30,9 +29,12 @@ class HTMLBodyParser(Parser):
 
 class ArticleParser(Parser):
     def extract(self, _ctx: Context, selector: Selector) -> Dict[str, str]:
-        article = bare_extraction(selector)
+        from trafilatura import bare_extraction
+
+        # trafilatura parses the HTML itself, it does not take a Selector
+        article = bare_extraction(selector.get())
 
         if not article:
             raise ValueError("Article not found")
 
-        return {"text": article.text}
+        return {"text": article["text"]}
@@ -0,0 +1,141 @@
+import asyncio
+import time
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple, Union
+
+from scrapework.handlers import json_dumps
+
+
+def estimated_size(item: Any) -> int:
+    """JSON size of `item`, roughly for items the encoder does not support."""
+    try:
+        return len(json_dumps(item))
+    except TypeError:
+        # Models, dataclasses, or values such as datetimes with stdlib json
+        return len(str(item))
+
+
+def as_item_list(items: Union[None, Dict[str, Any], Iterable[Any]]) -> List[Any]:
+    """Normalize the result of an extract callback to a list of items."""
+    if not items:
+        return []
+    if isinstance(items, dict):
+        return [items]
+    return list(items)
+
+
+class ItemPipeline:
+    """Buffers extracted items and flushes them in batches as pages complete.
+
+    A batch is flushed once it holds `batch_size` items, once its estimated
+    JSON size reaches `batch_bytes`, or once `batch_interval` seconds have
+    passed since the previous flush, whichever comes first. Remaining items
+    are flushed on `close`.
+
+    Items can be added with a `key` (e.g. the url they were extracted from),
+    `commit` is called with the keys of a batch once it is flushed, so keys
+    are never committed before their items are written.
+
+    In async mode a batch is flushed on a worker thread while the crawl
+    continues; the next batch waits for it to finish, which keeps memory
+    bounded when handlers are slower than fetching.
+    """
+
+    def __init__(
+        self,
+        flush: Callable[[List[Any]], None],
+        batch_size: Optional[int] = 100,
+        batch_bytes: Optional[int] = None,
+        batch_interval: Optional[float] = None,
+        commit: Optional[Callable[[List[Hashable]], None]] = None,
+    ) -> None:
+        self.flush_items = flush
+        self.commit = commit
+        self.batch_size = batch_size
+        self.batch_bytes = batch_bytes
+        self.batch_interval = batch_interval
+        self.buffer: List[Any] = []
+        self.keys: List[Hashable] = []
+        self.buffer_bytes = 0
+        self.last_flush = time.monotonic()
+        self.flushing: Optional[asyncio.Task] = None
+
+    def append(
+        self,
+        items: Union[Dict[str, Any], Iterable[Any]],
+        key: Optional[Hashable] = None,
+    ) -> None:
+        items = as_item_list(items)
+        if key is not None and items:
+            self.keys.append(key)
+        for item in items:
+            self.buffer.append(item)
+            if self.batch_bytes:
+                self.buffer_bytes += estimated_size(item)
+
+    def should_flush(self) -> bool:
+        if not self.buffer:
+            return False
+        if self.batch_size and len(self.buffer) >= self.batch_size:
+            return True
+        if self.batch_bytes and self.buffer_bytes >= self.batch_bytes:
+            return True
+        if (
+            self.batch_interval is not None
+            and time.monotonic() - self.last_flush >= self.batch_interval
+        ):
+            return True
+        return False
+
+    def take(self) -> Tuple[List[Any], List[Hashable]]:
+        batch, keys = self.buffer, self.keys
+        self.buffer = []
+        self.keys = []
+        self.buffer_bytes = 0
+        self.last_flush = time.monotonic()
+        return batch, keys
+
+    def flush_batch(self, batch: List[Any], keys: List[Hashable]) -> None:
+        self.flush_items(batch)
+        if self.commit and keys:
+            self.commit(keys)
+
+    def add(
+        self,
+        items: Union[Dict[str, Any], Iterable[Any]],
+        key: Optional[Hashable] = None,
+    ) -> None:
+        self.append(items, key)
+        if self.should_flush():
+            self.flush()
+
+    def flush(self) -> None:
+        if self.buffer:
+            self.flush_batch(*self.take())
+
+    def close(self) -> None:
+        self.flush()
+
+    async def aadd(
+        self,
+        items: Union[Dict[str, Any], Iterable[Any]],
+        key: Optional[Hashable] = None,
+    ) -> None:
+        self.append(items, key)
+        if self.should_flush():
+            await self.aflush()
+
+    async def aflush(self) -> None:
+        await self.wait()
+        if self.buffer:
+            self.flushing = asyncio.create_task(
+                asyncio.to_thread(self.flush_batch, *self.take())
+            )
+
+    async def wait(self) -> None:
+        if self.flushing:
+            flushing, self.flushing = self.flushing, None
+            await flushing
+
+    async def aclose(self) -> None:
+        await self.aflush()
+        await self.wait()
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Iterable, Union
+from typing import Any, Dict, Iterable, Optional, Union
 
 from scrapework.core.logger import Logger
 
@@ -21,5 +21,9 @@ class Processor(ABC):
     def process_items(
         self,
         items: Union[Dict[str, Any], Iterable[Dict[str, Any]]],
-    ):
+    ) -> Optional[Union[Dict[str, Any], Iterable[Dict[str, Any]]]]:
+        """Transform a batch of items before it reaches the handlers.
+
+        Return the processed items, or None to pass the batch on unchanged.
+        """
         pass
@@ -0,0 +1,210 @@
+import logging
+import os
+import sys
+import threading
+import tracemalloc
+from types import CodeType, FrameType
+from typing import Callable, Dict, List, Optional, Tuple
+
+from scrapework.core.logger import default_logger
+
+# Stage of samples and allocations outside every marked function
+OTHER_STAGE = "other"
+
+
+class Profiler:
+    """Statistical CPU sampler and allocation tracker for a run.
+
+    A background thread samples the stack of the thread running the crawl
+    each `interval` seconds, along with those of other threads (e.g. parse
+    threads) currently in a stage, and counts them in collapsed form
+    (``frame;frame;... count``), the input of flamegraph.pl, speedscope and
+    most flamegraph tools. Each
+    stack starts with the stage it belongs to, the innermost of the `stages`
+    functions it goes through (e.g. ``Scraper.parse`` for ``parse``), or
+    ``other``.
+
+    With `allocations`, tracemalloc traces allocations with up to
+    `traceback_limit` frames, and a snapshot is compared with the previous
+    one every `snapshot_every` pages, reporting the `top` allocating lines of
+    each stage. Tracing allocations slows the run down noticeably, sampling
+    does not.
+
+    Results are written to `path`: ``cpu.collapsed`` and ``allocations.txt``.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        stages: Optional[Dict[Callable, str]] = None,
+        interval: float = 0.01,
+        allocations: bool = False,
+        snapshot_every: int = 1000,
+        traceback_limit: int = 16,
+        top: int = 10,
+        logger: Optional[logging.Logger] = None,
+    ) -> None:
+        self.path = path
+        self.interval = interval
+        self.allocations = allocations
+        self.snapshot_every = snapshot_every
+        self.traceback_limit = traceback_limit
+        self.top = top
+        self.logger = logger or default_logger()
+
+        self.stages: Dict[CodeType, str] = {}
+        # (filename, first line, last line, stage) to classify allocations
+        self.stage_lines: List[Tuple[str, int, int, str]] = []
+        for function, stage in (stages or {}).items():
+            self.add_stage(function, stage)
+
+        self.labels: Dict[CodeType, str] = {}
+        self.stacks: Dict[str, int] = {}
+        self.pages = 0
+        self.thread: Optional[threading.Thread] = None
+        self.run_thread_id: Optional[int] = None
+        self.stopped = threading.Event()
+        self.snapshot: Optional[tracemalloc.Snapshot] = None
+        self.reports: List[str] = []
+
+    def add_stage(self, function: Callable, stage: str) -> None:
+        code = getattr(function, "__func__", function).__code__
+        self.stages[code] = stage
+        lines = [line for _, _, line in code.co_lines() if line is not None]
+        self.stage_lines.append((code.co_filename, min(lines), max(lines), stage))
+
+    def start(self) -> None:
+        os.makedirs(self.path, exist_ok=True)
+        if self.allocations:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(self.traceback_limit)
+            self.snapshot = self.take_snapshot()
+
+        self.run_thread_id = threading.get_ident()
+        self.stopped.clear()
+        self.thread = threading.Thread(
+            target=self.sample_loop, name="scrapework-profiler", daemon=True
+        )
+        self.thread.start()
+
+    def sample_loop(self) -> None:
+        while not self.stopped.wait(self.interval):
+            self.sample()
+
+    def label(self, code: CodeType) -> str:
+        label = self.labels.get(code)
+        if label is None:
+            filename = os.path.basename(code.co_filename)
+            label = self.labels[code] = (
+                f"{code.co_qualname} ({filename}:{code.co_firstlineno})"
+            )
+        return label
+
+    def sample(self) -> None:
+        own = threading.get_ident()
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id != own:
+                self.count_stack(frame, idle=thread_id != self.run_thread_id)
+
+    def count_stack(self, frame: Optional[FrameType], idle: bool = False) -> None:
+        """Count a stack, unless it is in no stage and `idle` is set."""
+        stage = None
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            if stage is None:
+                stage = self.stages.get(code)
+            names.append(self.label(code))
+            frame = frame.f_back
+
+        if stage is None and idle:
+            return
+        names.append(stage or OTHER_STAGE)
+        key = ";".join(reversed(names))
+        self.stacks[key] = self.stacks.get(key, 0) + 1
+
+    def page_done(self) -> None:
+        self.pages += 1
+        if self.allocations and self.pages % self.snapshot_every == 0:
+            self.report_allocations()
+
+    def take_snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(
+            [
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, __file__),
+            ]
+        )
+
+    def allocation_stage(self, traceback: tracemalloc.Traceback) -> str:
+        # Frames go from the oldest to the most recent call
+        for frame in reversed(traceback):
+            for filename, first, last, stage in self.stage_lines:
+                if frame.filename == filename and first <= frame.lineno <= last:
+                    return stage
+        return OTHER_STAGE
+
+    def report_allocations(self) -> None:
+        snapshot = self.take_snapshot()
+        if self.snapshot is None:
+            self.snapshot = snapshot
+            return
+
+        # stage -> leaf line -> [size change, count change]
+        stages: Dict[str, Dict[str, List[int]]] = {}
+        for diff in snapshot.compare_to(self.snapshot, "traceback"):
+            if not diff.size_diff:
+                continue
+            stage = self.allocation_stage(diff.traceback)
+            leaf = diff.traceback[-1]
+            lines = stages.setdefault(stage, {})
+            totals = lines.setdefault(f"{leaf.filename}:{leaf.lineno}", [0, 0])
+            totals[0] += diff.size_diff
+            totals[1] += diff.count_diff
+        self.snapshot = snapshot
+
+        report = [f"# After {self.pages} pages"]
+        for stage, lines in sorted(
+            stages.items(), key=lambda entry: -sum(t[0] for t in entry[1].values())
+        ):
+            total = sum(size for size, _ in lines.values())
+            report.append(f"## {stage}: {total / 1024:+.1f} KiB")
+            top = sorted(lines.items(), key=lambda entry: -abs(entry[1][0]))
+            for line, (size, count) in top[: self.top]:
+                report.append(f"  {size / 1024:+10.1f} KiB {count:+8d} blocks  {line}")
+        self.reports.append("\n".join(report))
+
+    def stop(self) -> None:
+        if self.thread is None:
+            return
+
+        self.stopped.set()
+        self.thread.join()
+        self.thread = None
+
+        with open(os.path.join(self.path, "cpu.collapsed"), "w") as file:
+            for stack, count in self.stacks.items():
+                file.write(f"{stack} {count}\n")
+
+        if self.allocations:
+            self.report_allocations()
+            tracemalloc.stop()
+            with open(os.path.join(self.path, "allocations.txt"), "w") as file:
+                file.write("\n\n".join(self.reports) + "\n")
+
+        self.logger.info(f"Profile written to {self.path}: {self.stage_summary()}")
+
+    def stage_totals(self) -> Dict[str, int]:
+        totals: Dict[str, int] = {}
+        for stack, count in self.stacks.items():
+            stage = stack.split(";", 1)[0]
+            totals[stage] = totals.get(stage, 0) + count
+        return totals
+
+    def stage_summary(self) -> str:
+        totals = self.stage_totals()
+        samples = sum(totals.values()) or 1
+        return ", ".join(
+            f"{stage} {count / samples:.0%}"
+            for stage, count in sorted(totals.items(), key=lambda entry: -entry[1])
+        )
@@ -1,13 +1,46 @@
 import datetime
+import os
+import re
 from abc import abstractmethod
+from typing import TYPE_CHECKING, Dict, List, Tuple
 
 import httpx
-from rich.console import Console
-from rich.table import Table
 
+if TYPE_CHECKING:
+    from rich.table import Table
+
+from scrapework.core.collector import Histogram, JobStats, MetadataCollector
 from scrapework.core.context import Context
 from scrapework.module import Module
 
+# Stages timed by the scraper, in crawl order
+STAGES = (
+    "middleware",
+    "connect",
+    "ttfb",
+    "download",
+    "fetch",
+    "selector",
+    "extract",
+    "handle",
+)
+
+
+def ordered_timers(collector: MetadataCollector) -> List[Tuple[str, Histogram]]:
+    """Stage timers in crawl order, followed by custom ones."""
+    timers = collector.timers
+    return [(stage, timers[stage]) for stage in STAGES if stage in timers] + [
+        (stage, timer) for stage, timer in timers.items() if stage not in STAGES
+    ]
+
+
+def escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_ms(seconds: float) -> str:
+    return f"{seconds * 1000:.2f}ms"
+
 
 class Reporter(Module):
 
@@ -23,39 +56,239 @@ class LoggerReporter(Reporter):
         if isinstance(duration, datetime.timedelta):
             duration_str = str(duration.total_seconds())
 
-        self.logger.info(
+        ctx.logger.info(
             f"Processed {ctx.collector.get('items_count')} items in {duration_str} seconds."
         )
 
+        for stage, timer in ordered_timers(ctx.collector):
+            ctx.logger.info(
+                f"{stage}: {timer.count} runs, mean {format_ms(timer.mean)}, "
+                f"p50 {format_ms(timer.quantile(0.5))}, "
+                f"p99 {format_ms(timer.quantile(0.99))}, max {format_ms(timer.max)}"
+            )
+
+        stats = ctx.collector.job_stats
+        if stats.count:
+            ctx.logger.info(
+                f"{stats.count} pages, {stats.failed} failed, "
+                f"{stats.retries} retries, page duration "
+                f"p50 {format_ms(stats.duration.quantile(0.5))}, "
+                f"p99 {format_ms(stats.duration.quantile(0.99))}"
+            )
+
+        statuses = ctx.collector.labeled.get(("responses", "status"))
+        if statuses:
+            ctx.logger.info(
+                "Responses: "
+                + ", ".join(f"{status}: {count}" for status, count in statuses.items())
+            )
+
 
 class RichReporter(Reporter):
+    """Print the run aggregates as tables: totals, slowest pages, domains,
+    errors and stages. Only the `domains` busiest domains are listed."""
+
+    def __init__(self, domains: int = 20):
+        super().__init__()
+        self.domains = domains
+
     def report(self, ctx: Context):
+        from rich.console import Console
 
-        total_items = sum(job.items_count for job in ctx.collector.jobs)
-        total_duration = sum(job.duration.total_seconds() for job in ctx.collector.jobs)
-
-        table = Table(title="Parsing Results", show_footer=True)
-        table.add_column("URL", "Total", style="blue", no_wrap=True)
-        table.add_column(
-            "Duration",
-            str(total_duration),
-            justify="right",
-            style="magenta",
-            no_wrap=True,
-        )
-        table.add_column(
-            "Items", str(total_items), justify="right", style="green", no_wrap=True
+        stats = ctx.collector.job_stats
+        console = Console()
+        console.print(self.summary_table(stats))
+
+        if stats.slowest:
+            console.print(self.slowest_table(stats))
+        if stats.domains:
+            console.print(self.domains_table(stats))
+        if stats.errors:
+            console.print(self.errors_table(stats))
+
+        timers = ordered_timers(ctx.collector)
+        if timers:
+            console.print(self.stages_table(timers))
+
+    def summary_table(self, stats: JobStats) -> "Table":
+        from rich.table import Table
+
+        duration = stats.duration
+        table = Table(title="Parsing Results")
+        for column in ("Pages", "Failed", "Items", "Retries", "Total"):
+            table.add_column(column, justify="right", style="green")
+        for column in ("p50", "p90", "p99", "Max"):
+            table.add_column(column, justify="right", style="magenta")
+
+        table.add_row(
+            str(stats.count),
+            str(stats.failed),
+            str(stats.items),
+            str(stats.retries),
+            f"{duration.sum:.2f}s",
+            format_ms(duration.quantile(0.5)),
+            format_ms(duration.quantile(0.9)),
+            format_ms(duration.quantile(0.99)),
+            format_ms(duration.max),
         )
+        return table
+
+    def slowest_table(self, stats: JobStats) -> "Table":
+        from rich.table import Table
+
+        table = Table(title="Slowest pages")
+        table.add_column("URL", style="blue", no_wrap=True)
+        table.add_column("Duration", justify="right", style="magenta")
+        table.add_column("Status", justify="right")
+        table.add_column("Items", justify="right", style="green")
 
-        for job in ctx.collector.jobs:
+        for job in stats.slowest_jobs():
             table.add_row(
                 job.url,
-                str(job.duration.total_seconds()),
+                format_ms(job.duration.total_seconds()),
+                str(job.status_code or job.error),
                 str(job.items_count),
             )
+        return table
 
-        console = Console()
-        console.print(table)
+    def domains_table(self, stats: JobStats) -> "Table":
+        from rich.table import Table
+
+        table = Table(title="Domains")
+        table.add_column("Domain", style="blue", no_wrap=True)
+        for column in ("Pages", "Failed", "Items"):
+            table.add_column(column, justify="right", style="green")
+        for column in ("p50", "p99"):
+            table.add_column(column, justify="right", style="magenta")
+
+        busiest = sorted(stats.domains.items(), key=lambda entry: -entry[1].jobs)
+        for name, domain in busiest[: self.domains]:
+            table.add_row(
+                name,
+                str(domain.jobs),
+                str(domain.failed),
+                str(domain.items),
+                format_ms(domain.duration.quantile(0.5)),
+                format_ms(domain.duration.quantile(0.99)),
+            )
+        return table
+
+    def errors_table(self, stats: JobStats) -> "Table":
+        from rich.table import Table
+
+        table = Table(title="Errors")
+        table.add_column("Error", style="red")
+        table.add_column("Count", justify="right")
+        for kind, count in sorted(stats.errors.items(), key=lambda entry: -entry[1]):
+            table.add_row(kind, str(count))
+        return table
+
+    def stages_table(self, timers: List[Tuple[str, Histogram]]) -> "Table":
+        from rich.table import Table
+
+        table = Table(title="Stages")
+        table.add_column("Stage", style="blue", no_wrap=True)
+        for column in ("Runs", "Total", "Mean", "p50", "p90", "p99", "Max"):
+            table.add_column(column, justify="right", style="magenta")
+
+        for stage, timer in timers:
+            table.add_row(
+                stage,
+                str(timer.count),
+                f"{timer.sum:.2f}s",
+                format_ms(timer.mean),
+                format_ms(timer.quantile(0.5)),
+                format_ms(timer.quantile(0.9)),
+                format_ms(timer.quantile(0.99)),
+                format_ms(timer.max),
+            )
+        return table
+
+
+class PrometheusReporter(Reporter):
+    """Write the run metrics to `path` in the Prometheus text format.
+
+    Stage timers become a `<prefix>_stage_seconds` histogram, numeric
+    metadata and labeled counters become gauges holding their value at the
+    end of the run, e.g. for the node_exporter textfile collector. With
+    `openmetrics`, the file ends with the `# EOF` marker OpenMetrics expects.
+    The file is replaced atomically.
+    """
+
+    def __init__(
+        self, path: str, prefix: str = "scrapework", openmetrics: bool = False
+    ):
+        super().__init__()
+        self.path = path
+        self.prefix = prefix
+        self.openmetrics = openmetrics
+
+    def metric_name(self, key: str) -> str:
+        return f"{self.prefix}_{re.sub(r'[^a-zA-Z0-9_]', '_', key)}"
+
+    def render(self, ctx: Context) -> str:
+        collector = ctx.collector
+        scraper = ctx.variables.get("name", "")
+        labels: Dict[str, str] = {"scraper": scraper} if scraper else {}
+        lines = []
+
+        def sample(name: str, value: float, **extra: str) -> None:
+            label_str = ",".join(
+                f'{key}="{escape_label(label_value)}"'
+                for key, label_value in {**labels, **extra}.items()
+            )
+            lines.append(
+                f"{name}{{{label_str}}} {value}" if label_str else f"{name} {value}"
+            )
+
+        def histogram(name: str, timer: Histogram, **extra: str) -> None:
+            for bound, count in timer.cumulative():
+                le = "+Inf" if bound == float("inf") else f"{bound:.6g}"
+                sample(f"{name}_bucket", count, **extra, le=le)
+            sample(f"{name}_sum", timer.sum, **extra)
+            sample(f"{name}_count", timer.count, **extra)
+
+        timers = ordered_timers(collector)
+        if timers:
+            name = self.metric_name("stage_seconds")
+            lines.append(f"# HELP {name} Time spent in each stage of the crawl.")
+            lines.append(f"# TYPE {name} histogram")
+            for stage, timer in timers:
+                histogram(name, timer, stage=stage)
+
+        if collector.job_stats.count:
+            name = self.metric_name("page_seconds")
+            lines.append(f"# HELP {name} Time to crawl a page, retries excluded.")
+            lines.append(f"# TYPE {name} histogram")
+            histogram(name, collector.job_stats.duration)
+
+        duration = collector.get("duration")
+        if isinstance(duration, datetime.timedelta):
+            name = self.metric_name("duration_seconds")
+            lines.append(f"# TYPE {name} gauge")
+            sample(name, duration.total_seconds())
+
+        for key, value in collector.counters().items():
+            name = self.metric_name(key)
+            lines.append(f"# TYPE {name} gauge")
+            sample(name, value)
+
+        for (key, label), series in collector.labeled.items():
+            name = self.metric_name(key)
+            lines.append(f"# TYPE {name} gauge")
+            for label_value, value in series.items():
+                sample(name, value, **{label: label_value})
+
+        if self.openmetrics:
+            lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def report(self, ctx: Context):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as file:
+            file.write(self.render(ctx))
+        os.replace(tmp_path, self.path)
+        ctx.logger.info(f"Metrics written to {self.path}")
 
 
 class SlackReporter(Reporter):
@@ -1,12 +1,71 @@
+import asyncio
 import logging
-from typing import Any, Dict
+import time
+from typing import TYPE_CHECKING, Any, Dict, Optional
 
 import httpx
 from httpx import URL, Client, HTTPError, TimeoutException
-from playwright.sync_api import Request as pRequest
-from playwright.sync_api import Route, sync_playwright
 
-from scrapework.core.http_client import HTTPClient, HttpxClient
+from scrapework.browser import AsyncBrowserPool, BrowserPool
+
+from scrapework.core.http_client import (
+    ClientPool,
+    HTTPClient,
+    HttpxClient,
+    build_proxy_mounts,
+)
+
+if TYPE_CHECKING:
+    from playwright.async_api import Request as AsyncRequest
+    from playwright.async_api import Route as AsyncRoute
+    from playwright.sync_api import Request as pRequest
+    from playwright.sync_api import Route
+
+# httpcore trace events (without the .started/.complete suffix) per stage
+TRACE_STAGES = {
+    "connection.connect_tcp": "connect",
+    "connection.connect_unix_socket": "connect",
+    "connection.start_tls": "connect",
+    "http11.send_request_headers": "ttfb",
+    "http11.send_request_body": "ttfb",
+    "http11.receive_response_headers": "ttfb",
+    "http11.receive_response_body": "download",
+    "http2.send_request_headers": "ttfb",
+    "http2.send_request_body": "ttfb",
+    "http2.receive_response_headers": "ttfb",
+    "http2.receive_response_body": "download",
+}
+
+
+class RequestTimings:
+    """Time spent in each stage of a request, from httpcore trace events.
+
+    Stages are `connect` (DNS, TCP and TLS, only when a new connection is
+    opened), `ttfb` (sending the request until the response headers are
+    received) and `download` (reading the body).
+    """
+
+    def __init__(self) -> None:
+        self.started: Dict[str, float] = {}
+        self.durations: Dict[str, float] = {}
+
+    def trace(self, event: str, info: Dict[str, Any]) -> None:
+        name, _, phase = event.rpartition(".")
+        stage = TRACE_STAGES.get(name)
+        if stage is None:
+            return
+
+        if phase == "started":
+            self.started[name] = time.perf_counter()
+        else:
+            start = self.started.pop(name, None)
+            if start is not None:
+                self.durations[stage] = (
+                    self.durations.get(stage, 0.0) + time.perf_counter() - start
+                )
+
+    async def atrace(self, event: str, info: Dict[str, Any]) -> None:
+        self.trace(event, info)
 
 
 class Request:
@@ -22,6 +81,9 @@ class Request:
     client_kwargs: Dict[str, Any] = {}
     request_kwargs: Dict[str, Any] = {}
     playwright: bool = False
+    browser_pool: Optional[BrowserPool] = None
+    async_browser_pool: Optional[AsyncBrowserPool] = None
+    timings: Optional[RequestTimings] = None
 
     def __init__(self, url: str, **kwargs):
         self.url = url
@@ -35,6 +97,7 @@ class Request:
         self.cls_client = kwargs.get("cls_client", HttpxClient)
         self.client_kwargs = kwargs.get("client_kwargs", {})
         self.request_kwargs = kwargs.get("request_kwargs", {})
+        self.timings = kwargs.get("timings")
 
     class Config:
         arbitrary_types_allowed = True
@@ -43,7 +106,7 @@ class Request:
         return str(URL(self.url).join(URL(url)))
 
     def httpx_request_handler(
-        self, route: Route, request: pRequest, client: httpx.Client
+        self, route: "Route", request: "pRequest", client: httpx.Client
     ):
 
         # Extract request details from Playwright's Request object
@@ -72,7 +135,38 @@ class Request:
             self.logger.error(f"Error: {e} fetching {url}")
             route.abort()
 
+    async def ahttpx_request_handler(
+        self,
+        route: "AsyncRoute",
+        request: "AsyncRequest",
+        client: httpx.AsyncClient,
+    ):
+        method = request.method
+        url = request.url
+        headers = dict(request.headers)
+
+        try:
+            response = await client.request(
+                method,
+                url,
+                headers=headers,
+                **self.request_kwargs,
+            )
+
+            await route.fulfill(
+                status=response.status_code,
+                headers=dict(response.headers),
+                body=response.content,
+            )
+        except Exception as e:
+            self.logger.error(f"Error: {e} fetching {url}")
+            await route.abort()
+
     def fetch_playwright(self, httpx_client: Client) -> httpx.Response:
+        if self.browser_pool:
+            return self.browser_pool.fetch(self, httpx_client)
+
+        from playwright.sync_api import sync_playwright
 
         with sync_playwright() as p:
             browser = p.chromium.launch()
@@ -97,38 +191,118 @@ class Request:
             headers={},
         )
 
-    def fetch(self) -> httpx.Response:
-        """
-        Fetches the HTML content of a given URL.
+    def build_mounts(self, transport_cls: type = httpx.HTTPTransport) -> Dict[str, Any]:
+        if self.proxy:
+            self.logger.debug(f"Using proxy: {self.proxy}")
 
-        :param cache: The cache object used for caching the fetched HTML content.
-        :param url: The URL to fetch.
+        return build_proxy_mounts(self.proxy, transport_cls)
 
-        :return: The fetched HTML content as a string, or None if there was an error.
-        """
+    def build_client(self, pool: Optional[ClientPool] = None) -> httpx.Client:
+        if pool:
+            return pool.get_client(self.cls_client, self.proxy, self.client_kwargs)
 
-        if self.proxy:
-            self.logger.debug(f"Using proxy: {self.proxy}")
-            mounts = {
-                "https://": httpx.HTTPTransport(proxy=self.proxy),
-                "http://": httpx.HTTPTransport(proxy=self.proxy),
-            }
-        else:
-            mounts = {}
-        client = self.cls_client.build_client(
+        return self.cls_client.build_client(
             headers=self.headers,
             timeout=self.timeout,
             follow_redirects=self.follow_redirects,
-            mounts=mounts,
+            mounts=self.build_mounts(),
             **self.client_kwargs,
         )
+
+    def build_async_client(
+        self, pool: Optional[ClientPool] = None
+    ) -> httpx.AsyncClient:
+        if pool:
+            return pool.get_async_client(
+                self.cls_client, self.proxy, self.client_kwargs
+            )
+
+        return self.cls_client.build_async_client(
+            headers=self.headers,
+            timeout=self.timeout,
+            follow_redirects=self.follow_redirects,
+            mounts=self.build_mounts(httpx.AsyncHTTPTransport),
+            **self.client_kwargs,
+        )
+
+    def send_kwargs(self, is_async: bool = False) -> Dict[str, Any]:
+        # Passed per request so that pooled clients, built without the request
+        # headers, timeout and redirect policy, still honour them.
+        kwargs = {
+            "headers": self.headers,
+            "timeout": self.timeout,
+            "follow_redirects": self.follow_redirects,
+            **self.request_kwargs,
+        }
+        if self.timings is not None:
+            kwargs["extensions"] = {
+                **kwargs.get("extensions", {}),
+                "trace": self.timings.atrace if is_async else self.timings.trace,
+            }
+        return kwargs
+
+    def fetch(self, pool: Optional[ClientPool] = None) -> httpx.Response:
+        """
+        Fetches the HTML content of a given URL.
+
+        :param pool: Client pool to draw a long-lived client from. Without it,
+            a client is built for this request and closed afterwards.
+
+        :return: The fetched response.
+        """
+
+        client = self.build_client(pool)
         try:
             if self.playwright:
                 return self.fetch_playwright(client)
 
             response: httpx.Response = client.get(
                 self.request_url,
-                **self.request_kwargs,
+                **self.send_kwargs(),
+            )
+
+            response.request.url = URL(self.url)
+            return response
+
+        except TimeoutException as err:
+            self.logger.error(f"TimeoutError fetching {self.url}: {err}")  # type: ignore
+            raise err
+
+        except HTTPError as err:
+            self.logger.error(f"HTTPError fetching {self.url}: {err}")  # type: ignore
+            raise err
+
+        except Exception as err:
+            self.logger.error(f"Exception fetching {self.url}: {err}")  # type: ignore
+            raise err
+
+        finally:
+            if not pool:
+                client.close()
+
+    async def afetch(self, pool: Optional[ClientPool] = None) -> httpx.Response:
+        """
+        Fetches the HTML content of a given URL without blocking the event loop.
+
+        Playwright requests use the async browser pool when one is set, and
+        are otherwise delegated to a worker thread running `fetch`.
+
+        :param pool: Client pool to draw a long-lived client from.
+
+        :return: The fetched response.
+        """
+
+        if self.playwright and not self.async_browser_pool:
+            return await asyncio.to_thread(self.fetch, pool)
+
+        client = self.build_async_client(pool)
+        try:
+            if self.playwright and self.async_browser_pool:
+                return await self.async_browser_pool.fetch(self, client)
+
+            response: httpx.Response = await client.get(
+                self.request_url,
+                **self.send_kwargs(is_async=True),
             )
 
             response.request.url = URL(self.url)
@@ -147,4 +321,5 @@ class Request:
             raise err
 
         finally:
-            client.close()
+            if not pool:
+                await client.aclose()
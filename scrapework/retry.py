@@ -0,0 +1,83 @@
+import random
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+import httpx
+from httpx import Response
+
+from scrapework.scheduler import parse_retry_after
+
+DEFAULT_RETRY_STATUSES = (408, 425, 429, 500, 502, 503, 504)
+DEFAULT_RETRY_EXCEPTIONS: Tuple[type[BaseException], ...] = (httpx.TransportError,)
+
+
+class RetryPolicy:
+    """Decides whether a failed request is retried, and after how long.
+
+    Responses with a status in `statuses` and errors that are instances of
+    `exceptions` are retried up to `retries` times; `overrides` maps a status
+    code or an exception class to its own number of retries. The delay grows
+    exponentially from `backoff` up to `max_backoff`, with full jitter, and is
+    never shorter than the server's `Retry-After`.
+    """
+
+    def __init__(
+        self,
+        retries: int = 2,
+        statuses: Iterable[int] = DEFAULT_RETRY_STATUSES,
+        exceptions: Tuple[type[BaseException], ...] = DEFAULT_RETRY_EXCEPTIONS,
+        backoff: float = 0.5,
+        max_backoff: float = 60.0,
+        jitter: bool = True,
+        overrides: Optional[Dict[Union[int, type[BaseException]], int]] = None,
+    ) -> None:
+        self.retries = retries
+        self.statuses = set(statuses)
+        self.exceptions = exceptions
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.overrides = overrides or {}
+
+    def max_retries(
+        self,
+        retries: int,
+        response: Optional[Response] = None,
+        error: Optional[BaseException] = None,
+    ) -> int:
+        """Number of retries allowed for this outcome, `retries` by default.
+
+        Returns 0 when the outcome is not retryable at all.
+        """
+        if error is not None:
+            for cls in type(error).__mro__:
+                if cls in self.overrides:
+                    return self.overrides[cls]
+            return retries if isinstance(error, self.exceptions) else 0
+
+        if response is not None:
+            if response.status_code in self.overrides:
+                return self.overrides[response.status_code]
+            return retries if response.status_code in self.statuses else 0
+
+        return 0
+
+    def should_retry(
+        self,
+        attempt: int,
+        retries: int,
+        response: Optional[Response] = None,
+        error: Optional[BaseException] = None,
+    ) -> bool:
+        return attempt < self.max_retries(retries, response, error)
+
+    def delay(self, attempt: int, response: Optional[Response] = None) -> float:
+        delay = min(self.max_backoff, self.backoff * 2**attempt)
+        if self.jitter:
+            delay = random.uniform(0, delay)
+
+        if response is not None:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is not None:
+                delay = max(delay, min(retry_after, self.max_backoff))
+
+        return delay
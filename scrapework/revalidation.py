@@ -0,0 +1,83 @@
+import json
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from httpx import Response
+
+# Link found on a page: (url, callback name, priority)
+Link = Tuple[str, Optional[str], int]
+
+
+class ValidatorStore:
+    """Per-url `ETag` / `Last-Modified` validators kept in a SQLite database.
+
+    The links found on each page are stored with its validators, so that a
+    page answering `304 Not Modified` can still schedule them without being
+    parsed again.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS validators (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                links TEXT
+            )
+            """)
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT etag, last_modified FROM validators WHERE url = ?", (url,)
+            ).fetchone()
+
+        headers = {}
+        if row is not None:
+            etag, last_modified = row
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+        return headers
+
+    def update(self, url: str, response: Response, links: List[Link]) -> None:
+        """Store the validators of a full (200) response and its page links."""
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+
+        with self.lock:
+            if etag is None and last_modified is None:
+                # Nothing to revalidate with next time
+                self.connection.execute("DELETE FROM validators WHERE url = ?", (url,))
+                return
+            self.connection.execute(
+                "INSERT OR REPLACE INTO validators (url, etag, last_modified, links) "
+                "VALUES (?, ?, ?, ?)",
+                (url, etag, last_modified, json.dumps(links)),
+            )
+
+    def links(self, url: str) -> List[Link]:
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT links FROM validators WHERE url = ?", (url,)
+            ).fetchone()
+
+        if row is None or not row[0]:
+            return []
+        return [
+            (link_url, callback, priority)
+            for link_url, callback, priority in json.loads(row[0])
+        ]
+
+    def close(self) -> None:
+        with self.lock:
+            self.connection.close()
@@ -0,0 +1,179 @@
+import heapq
+import itertools
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from httpx import Response
+
+
+def domain_of(url: str) -> str:
+    return urlsplit(url).netloc.lower()
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a `Retry-After` header (delay-seconds or HTTP-date)."""
+    if not value:
+        return None
+
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class DomainState:
+    def __init__(self, delay: float) -> None:
+        self.queue: Deque[Any] = deque()
+        self.active = 0
+        self.delay = delay
+        self.next_request = 0.0
+
+
+class PolitenessScheduler:
+    """Per-domain request scheduling between the frontier and the fetcher.
+
+    Urls are queued per domain and handed out round-robin, so one slow or
+    rate limited host does not hold back the others. Each domain gets at most
+    `domain_concurrency` requests in flight and `domain_rate_limit` requests
+    per second. With `auto_throttle`, the delay between requests to a domain
+    follows its response latency (divided by `target_concurrency`) and is
+    increased on 429/503 responses. `Retry-After` headers are always honoured.
+    """
+
+    def __init__(
+        self,
+        domain_concurrency: Optional[int] = None,
+        domain_rate_limit: Optional[float] = None,
+        auto_throttle: bool = False,
+        target_concurrency: float = 1.0,
+        max_delay: float = 60.0,
+    ) -> None:
+        self.domain_concurrency = domain_concurrency
+        self.min_delay = 1.0 / domain_rate_limit if domain_rate_limit else 0.0
+        self.auto_throttle = auto_throttle
+        self.target_concurrency = target_concurrency
+        self.max_delay = max_delay
+        self.domains: Dict[str, DomainState] = {}
+        self.rotation: Deque[str] = deque()
+        self.delayed: List[Tuple[float, int, Any]] = []
+        self.counter = itertools.count()
+        self.queued = 0
+
+    def __len__(self) -> int:
+        return self.queued
+
+    def __bool__(self) -> bool:
+        return self.queued > 0
+
+    def undelayed(self) -> int:
+        """Queued entries not held back by a delay, e.g. a retry backoff."""
+        self.release_delayed(time.monotonic())
+        return self.queued - len(self.delayed)
+
+    def domain(self, url: str) -> DomainState:
+        name = domain_of(url)
+        state = self.domains.get(name)
+        if state is None:
+            state = self.domains[name] = DomainState(self.min_delay)
+        return state
+
+    def push(self, entry: Any, delay: float = 0.0) -> None:
+        """Queue `entry`, holding it back for `delay` seconds if given."""
+        if delay > 0:
+            heapq.heappush(
+                self.delayed, (time.monotonic() + delay, next(self.counter), entry)
+            )
+        else:
+            self.enqueue(entry)
+        self.queued += 1
+
+    def enqueue(self, entry: Any) -> None:
+        name = domain_of(entry.url)
+        state = self.domain(entry.url)
+        if not state.queue:
+            self.rotation.append(name)
+        state.queue.append(entry)
+
+    def release_delayed(self, now: float) -> None:
+        while self.delayed and self.delayed[0][0] <= now:
+            self.enqueue(heapq.heappop(self.delayed)[2])
+
+    def is_ready(self, state: DomainState, now: float) -> bool:
+        if self.domain_concurrency and state.active >= self.domain_concurrency:
+            return False
+        return now >= state.next_request
+
+    def pop(self) -> Optional[Any]:
+        """Next entry allowed to be fetched now, or None."""
+        now = time.monotonic()
+        self.release_delayed(now)
+
+        for _ in range(len(self.rotation)):
+            name = self.rotation.popleft()
+            state = self.domains[name]
+
+            if not self.is_ready(state, now):
+                self.rotation.append(name)
+                continue
+
+            entry = state.queue.popleft()
+            if state.queue:
+                self.rotation.append(name)
+
+            state.active += 1
+            state.next_request = now + state.delay
+            self.queued -= 1
+            return entry
+
+        return None
+
+    def next_ready_in(self) -> Optional[float]:
+        """Seconds until a queued domain may be fetched again.
+
+        None when every queued domain is waiting on in-flight requests.
+        """
+        now = time.monotonic()
+        waits = [
+            max(0.0, state.next_request - now)
+            for state in (self.domains[name] for name in self.rotation)
+            if not (self.domain_concurrency and state.active >= self.domain_concurrency)
+        ]
+        if self.delayed:
+            waits.append(max(0.0, self.delayed[0][0] - now))
+        return min(waits) if waits else None
+
+    def release(
+        self, url: str, response: Optional[Response] = None, latency: float = 0.0
+    ) -> None:
+        """Record the outcome of a request and adapt the domain delay."""
+        state = self.domain(url)
+        state.active = max(0, state.active - 1)
+
+        status_code = response.status_code if response is not None else None
+
+        if self.auto_throttle and response is not None:
+            if status_code in (429, 503):
+                delay = max(state.delay * 2, latency, 1.0)
+            else:
+                target = latency / self.target_concurrency
+                delay = (state.delay + target) / 2
+            state.delay = min(self.max_delay, max(self.min_delay, delay))
+
+        retry_after = (
+            parse_retry_after(response.headers.get("Retry-After"))
+            if response is not None and status_code in (429, 503)
+            else None
+        )
+        if retry_after is not None:
+            state.next_request = max(
+                state.next_request, time.monotonic() + min(retry_after, self.max_delay)
+            )
@@ -1,20 +1,59 @@
+import asyncio
 import datetime
+import itertools
+import logging
+import threading
+import time
 from abc import ABC
-from dataclasses import dataclass
-from typing import Any, Callable, ClassVar, Dict, Iterable, List, Optional, Union
+from dataclasses import dataclass, replace
+from typing import (
+    Any,
+    Callable,
+    ClassVar,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 
-from httpx import Response
+from httpx import Response, ResponseNotRead
 from parsel import Selector
 
+from scrapework.checkpoint import CheckpointLog
 from scrapework.core.collector import JobCollector, MetadataCollector
 from scrapework.core.context import Context
+from scrapework.core.http_client import ClientPool
 from scrapework.core.logger import Logger
+from scrapework.distributed import (
+    CrawlBackend,
+    SharedFrontier,
+    SharedSeenSet,
+    default_worker_id,
+)
+from scrapework.executor import ParseExecutor, callback_ref, resolve_callback
+from scrapework.frontier import (
+    BloomSeenSet,
+    FifoFrontier,
+    Frontier,
+    MemorySeenSet,
+    SeenSet,
+)
 from scrapework.handlers import Handler
+from scrapework.memo import ParseMemo
 from scrapework.middleware import RequestMiddleware
 from scrapework.module import Module
 from scrapework.parsers import Parser
+from scrapework.pipeline import ItemPipeline, as_item_list
+from scrapework.profiling import Profiler
+from scrapework.processors import Processor
+from scrapework.retry import RetryPolicy
+from scrapework.revalidation import ValidatorStore
+from scrapework.scheduler import PolitenessScheduler
 from scrapework.reporter import LoggerReporter, Reporter
-from scrapework.request import Request
+from scrapework.request import Request, RequestTimings
 
 
 # Class to handle url associated with a parser callback, using the default parser if none is provided
@@ -24,6 +63,7 @@ class ExtractCallback:
     extract: Callable[
         [Context, Selector], Union[Dict[str, Any], Iterable[Dict[str, Any]]]
     ]
+    attempt: int = 0
 
 
 class Scraper(ABC):
@@ -31,8 +71,9 @@ class Scraper(ABC):
 
     name: ClassVar[str] = "base_scraper"
     # start_urls: List[str] = []
-    visited_urls: List[str] = []
-    urls_to_visit: List[ExtractCallback] = []
+    # Per-instance crawl state, see build_frontier and build_seen_set
+    visited_urls: SeenSet
+    urls_to_visit: Frontier
     base_url: str = ""
     filename: str = ""
     callback: Optional[
@@ -41,7 +82,86 @@ class Scraper(ABC):
 
     parser: Parser = Parser()
 
+    # Bounded-memory deduplication for very large crawls
+    bloom_filter_capacity: Optional[int] = None
+    bloom_filter_error_rate: float = 0.001
+
+    # Share the frontier and seen-set between workers, see CrawlBackend
+    crawl_backend: Optional[CrawlBackend] = None
+    worker_id: str = ""
+
+    # Checkpoint the frontier and seen urls to resume with `run(resume=True)`
+    checkpoint_path: Optional[str] = None
+    checkpoint_interval: float = 30.0
+    checkpoint_compact_every: int = 100_000
+    checkpoint: Optional[CheckpointLog] = None
+
+    # Incremental recrawls: revalidate pages with conditional requests and
+    # skip parsing those answering 304, see ValidatorStore
+    validators_path: Optional[str] = None
+    validators: Optional[ValidatorStore] = None
+
+    # Memoize extracted items by callback and page content, see ParseMemo
+    parse_memo_path: Optional[str] = None
+    parse_memo_entries: Optional[int] = 100_000
+    parse_memo_bytes: Optional[int] = None
+    # Key memoized items by url too, False shares them between mirrors
+    parse_memo_per_url: bool = True
+    # Bump to invalidate memoized items when parsing code changes
+    parse_version: str = ""
+    parse_memo: Optional[ParseMemo] = None
+
+    # Connection pooling for the clients shared across a run
+    max_connections: Optional[int] = 100
+    max_keepalive_connections: Optional[int] = 20
+    keepalive_expiry: Optional[float] = 5.0
+    http2: bool = False
+    client_pool: Optional[ClientPool] = None
+    scheduler: PolitenessScheduler
+
+    # Per-domain politeness, see PolitenessScheduler
+    domain_concurrency: Optional[int] = None
+    domain_rate_limit: Optional[float] = None
+    auto_throttle: bool = False
+
+    # Retries of failed requests, see RetryPolicy
+    retries: int = 2
+    retry_backoff: float = 0.5
+    retry_policy: RetryPolicy
+
+    # Run extract callbacks in a "process" or "thread" pool during async runs
+    parse_executor: Optional[str] = None
+    parse_workers: Optional[int] = None
+    parse_pool: Optional[ParseExecutor] = None
+
+    # Sample CPU stacks (and trace allocations) per stage into `profile_path`,
+    # see Profiler
+    profile_path: Optional[str] = None
+    profile_interval: float = 0.01
+    profile_allocations: bool = False
+    profile_snapshot_every: int = 1000
+    profiler: Optional[Profiler] = None
+
+    # Logs go to `log_file` (default `<name>.log`) and the console, see Logger.
+    # `log_queue` writes them from a background thread, `log_json` as JSON
+    # lines, and only one request in `log_requests_every` is logged (0: none)
+    log_level: int = logging.INFO
+    log_file: Optional[str] = None
+    log_json: bool = False
+    log_queue: bool = False
+    log_requests_every: int = 1
+
+    # Time the connect / ttfb / download stages of requests, see RequestTimings
+    request_timings: bool = True
+
+    # Stream items to processors and handlers in batches as pages complete
+    stream_items: bool = False
+    batch_size: Optional[int] = 100
+    batch_bytes: Optional[int] = None
+    batch_interval: Optional[float] = None
+
     handlers: List[Handler] = []
+    processors: List[Processor] = []
     middlewares: List[RequestMiddleware] = []
     reporters: List[Reporter] = []
 
@@ -55,10 +175,65 @@ class Scraper(ABC):
         if not self.filename:
             self.filename = f"{self.name}.json"
 
-        self.logger = Logger(self.name).get_logger()
+        self.logger = Logger(
+            self.name,
+            level=self.log_level,
+            filename=self.log_file,
+            json=self.log_json,
+            queue=self.log_queue,
+        ).get_logger()
+        self.request_counter = itertools.count()
+
+        if not self.worker_id:
+            self.worker_id = default_worker_id()
+
+        self.urls_to_visit = self.build_frontier()
+        self.visited_urls = self.build_seen_set()
+        # Processors added with `use` belong to this scraper only
+        self.processors = list(self.processors)
+        # Links passed to to_visit by the page being extracted, per thread
+        self.page_links = threading.local()
 
         self.configuration()
 
+    def build_frontier(self) -> Frontier:
+        if self.crawl_backend:
+            return SharedFrontier(self.crawl_backend, self)
+        return FifoFrontier()
+
+    def build_seen_set(self) -> SeenSet:
+        if self.crawl_backend:
+            return SharedSeenSet(self.crawl_backend)
+        if self.bloom_filter_capacity:
+            return BloomSeenSet(
+                self.bloom_filter_capacity, self.bloom_filter_error_rate
+            )
+        return MemorySeenSet()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Run state stays in the parent when the scraper is sent to parse workers
+        state = self.__dict__.copy()
+        for name in (
+            "urls_to_visit",
+            "visited_urls",
+            "client_pool",
+            "scheduler",
+            "parse_pool",
+            "checkpoint",
+            "validators",
+            "parse_memo",
+            "page_links",
+            "profiler",
+        ):
+            state.pop(name, None)
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self.urls_to_visit = self.build_frontier()
+        self.visited_urls = self.build_seen_set()
+        self.page_links = threading.local()
+
     def use_modules(self) -> List[Module]:
         return []
 
@@ -72,7 +247,7 @@ class Scraper(ABC):
             "name": self.name,
         }
 
-    def use(self, module: Module | List[Module]) -> None:
+    def use(self, module: Module | Processor | List[Module | Processor]) -> None:
         if isinstance(module, list):
             for m in module:
                 self.use(m)
@@ -83,6 +258,8 @@ class Scraper(ABC):
                 self.handlers.append(module)
             case Reporter():
                 self.reporters.append(module)
+            case Processor():
+                self.processors.append(module)
 
     def build_start_urls(self, input) -> List[str]:
         return []
@@ -95,20 +272,306 @@ class Scraper(ABC):
     def process(
         self, ctx: Context, items: Union[Dict[str, Any], Iterable[Dict[str, Any]]]
     ):
+        start = time.perf_counter()
+        for processor in self.processors:
+            processed = processor.process_items(items)
+            if processed is not None:
+                items = processed
+
         for handler in self.handlers:
             handler.process_items(ctx, items)
+        ctx.collector.observe("handle", time.perf_counter() - start)
 
     def report(self, ctx: Context):
         for reporter in self.reporters:
             reporter.report(ctx)
 
-    def run(self, start_urls: Optional[List[str]] = None, input: Optional[Any] = None):
+    def run(
+        self,
+        start_urls: Optional[List[str]] = None,
+        input: Optional[Any] = None,
+        concurrency: Optional[int] = None,
+        resume: bool = False,
+        profile: Optional[str] = None,
+    ):
+        """Crawl `start_urls` (and the urls built from `input`).
+
+        When `concurrency` is set, the crawl is delegated to `arun` and up to
+        `concurrency` requests are in flight at once. With `resume`, the crawl
+        restarts from the `checkpoint_path` checkpoint. With `profile`, a
+        directory overriding `profile_path`, the run is profiled.
+        """
+        if concurrency:
+            return asyncio.run(
+                self.arun(
+                    start_urls,
+                    input,
+                    concurrency=concurrency,
+                    resume=resume,
+                    profile=profile,
+                )
+            )
+
+        ctx = self.setup_run(start_urls, input, resume, profile)
+
+        items = self.restored_items()
+        pipeline = self.build_item_pipeline(ctx) if self.stream_items else None
+
+        begin_time = datetime.datetime.now()
+        failed = True
+        try:
+            while self.urls_to_visit.active() or self.scheduler:
+                url_with_callback = self.next_to_crawl()
+
+                if url_with_callback is None:
+                    time.sleep(
+                        self.scheduler.next_ready_in()
+                        or self.urls_to_visit.poll_interval
+                        or 0
+                    )
+                    continue
+
+                new_items = self.crawl(ctx, url_with_callback)
+
+                if pipeline:
+                    pipeline.add(new_items, url_with_callback.url)
+                else:
+                    items += new_items
+            failed = False
+        finally:
+            self.close_client_pool()
+            for middleware in self.middlewares:
+                middleware.close()
+            try:
+                if pipeline:
+                    pipeline.close()
+            except BaseException:
+                failed = True
+                raise
+            finally:
+                self.close_run(ctx, failed)
+
+        self.complete_run(ctx, items, begin_time)
+
+    async def arun(
+        self,
+        start_urls: Optional[List[str]] = None,
+        input: Optional[Any] = None,
+        concurrency: int = 10,
+        resume: bool = False,
+        profile: Optional[str] = None,
+    ):
+        """Crawl asynchronously with at most `concurrency` requests in flight.
+
+        Middlewares and extract callbacks run on the event loop, each request
+        gets its own `Context` sharing the run collector and variables.
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be a positive integer")
+
+        ctx = self.setup_run(start_urls, input, resume, profile)
+
+        items = self.restored_items()
+        pipeline = self.build_item_pipeline(ctx) if self.stream_items else None
+        pending: Set[asyncio.Task] = set()
+        # Url crawled by each pending task
+        crawling: Dict[asyncio.Task, str] = {}
+        if self.parse_executor:
+            self.parse_pool = ParseExecutor(
+                self, self.parse_executor, self.parse_workers
+            )
+
+        begin_time = datetime.datetime.now()
+        failed = True
+        try:
+            while self.urls_to_visit.active() or self.scheduler or pending:
+                while len(pending) < concurrency:
+                    url_with_callback = self.next_to_crawl()
+                    if url_with_callback is None:
+                        break
+                    task = asyncio.create_task(self.acrawl(ctx, url_with_callback))
+                    crawling[task] = url_with_callback.url
+                    pending.add(task)
+
+                # Wake up when a request completes, a throttled domain is ready
+                # or, with a shared frontier, to poll for urls queued elsewhere
+                timeout = (
+                    self.scheduler.next_ready_in() or self.urls_to_visit.poll_interval
+                    if len(pending) < concurrency
+                    else None
+                )
+
+                if not pending:
+                    await asyncio.sleep(timeout or 0)
+                    continue
+
+                done, pending = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+
+                for task in done:
+                    url = crawling.pop(task)
+                    if pipeline:
+                        await pipeline.aadd(task.result(), url)
+                    else:
+                        items += task.result()
+            failed = False
+        finally:
+            for task in pending:
+                task.cancel()
+            await self.aclose_client_pool()
+            if self.parse_pool:
+                self.parse_pool.shutdown()
+                self.parse_pool = None
+            for middleware in self.middlewares:
+                await middleware.aclose()
+            try:
+                if pipeline:
+                    await pipeline.aclose()
+            except BaseException:
+                failed = True
+                raise
+            finally:
+                self.close_run(ctx, failed)
+
+        self.complete_run(ctx, items, begin_time)
+
+    def close_run(self, ctx: Context, failed: bool) -> None:
+        """Persist and close the run state, even when flushing items failed."""
+        if self.checkpoint:
+            self.checkpoint.close()
+        if self.validators:
+            self.validators.close()
+        if self.parse_memo:
+            self.parse_memo.close()
+        self.stop_profiler()
+        if failed:
+            self.abort_handlers(ctx)
+
+    def next_to_crawl(self) -> Optional[ExtractCallback]:
+        if self.urls_to_visit.shared:
+            # Lease one url at a time, leaving the rest to other workers;
+            # retries waiting on a backoff do not count
+            if not self.scheduler.undelayed() and self.urls_to_visit:
+                try:
+                    self.scheduler.push(self.urls_to_visit.pop())
+                except IndexError:
+                    pass
+        else:
+            while self.urls_to_visit:
+                self.scheduler.push(self.urls_to_visit.pop())
+
+        return self.scheduler.pop()
+
+    def crawl(
+        self, ctx: Context, url_with_callback: ExtractCallback
+    ) -> List[Dict[str, Any]]:
+        iter_begin_time = datetime.datetime.now()
+
+        start = time.monotonic()
+        response, error = None, None
+        try:
+            response = self.make_request(ctx, url_with_callback.url)
+        except Exception as err:
+            error = err
+        finally:
+            self.scheduler.release(
+                url_with_callback.url, response, time.monotonic() - start
+            )
+
+        if error is None and self.is_not_modified(response):
+            return self.handle_not_modified(
+                ctx, url_with_callback, response, iter_begin_time
+            )
+
+        if error is not None or not self.is_success(response):
+            return self.handle_failure(
+                ctx, url_with_callback, response, error, iter_begin_time
+            )
+
+        return self.process_response(ctx, url_with_callback, response, iter_begin_time)
+
+    async def acrawl(
+        self, ctx: Context, url_with_callback: ExtractCallback
+    ) -> List[Dict[str, Any]]:
+        iter_begin_time = datetime.datetime.now()
+        request_ctx = replace(ctx)
+
+        start = time.monotonic()
+        response, error = None, None
+        try:
+            response = await self.amake_request(request_ctx, url_with_callback.url)
+        except Exception as err:
+            error = err
+        finally:
+            self.scheduler.release(
+                url_with_callback.url, response, time.monotonic() - start
+            )
+
+        if error is None and self.is_not_modified(response):
+            return self.handle_not_modified(
+                request_ctx, url_with_callback, response, iter_begin_time
+            )
+
+        if error is not None or not self.is_success(response):
+            return self.handle_failure(
+                request_ctx, url_with_callback, response, error, iter_begin_time
+            )
+
+        if self.parse_pool is None:
+            return self.process_response(
+                request_ctx, url_with_callback, response, iter_begin_time
+            )
+
+        new_items = await self.parse_pool.extract(
+            request_ctx, url_with_callback, response
+        )
+
+        return self.record_job(
+            request_ctx, url_with_callback, response, new_items, iter_begin_time
+        )
+
+    def setup_run(
+        self,
+        start_urls: Optional[List[str]] = None,
+        input: Optional[Any] = None,
+        resume: bool = False,
+        profile: Optional[str] = None,
+    ) -> Context:
         self.logger.info("Scraping started")
 
         if not start_urls and not input:
             raise ValueError("Either start_urls or input must be provided")
 
-        start_urls = start_urls or []
+        ctx = Context(
+            variables=self.variables(),
+            collector=MetadataCollector(),
+            logger=self.logger,
+        )
+
+        self.validators = (
+            ValidatorStore(self.validators_path) if self.validators_path else None
+        )
+
+        self.parse_memo = (
+            ParseMemo(
+                self.parse_memo_path,
+                version=self.parse_version,
+                max_entries=self.parse_memo_entries,
+                max_bytes=self.parse_memo_bytes,
+                per_url=self.parse_memo_per_url,
+            )
+            if self.parse_memo_path
+            else None
+        )
+
+        self.checkpoint = self.build_checkpoint()
+        if self.checkpoint:
+            self.restore_checkpoint(ctx, resume)
+        elif resume:
+            raise ValueError("Resuming a run requires a checkpoint_path")
+
+        start_urls = list(start_urls or [])
 
         if input:
             start_urls += self.build_start_urls(input)
@@ -116,53 +579,351 @@ class Scraper(ABC):
         for url in start_urls:
             self.to_visit(url)
 
-        ctx = Context(
-            variables=self.variables(),
-            collector=MetadataCollector(),
+        self.client_pool = self.build_client_pool()
+        self.scheduler = self.build_scheduler()
+        self.retry_policy = self.build_retry_policy()
+
+        profile = profile or self.profile_path
+        self.profiler = self.build_profiler(profile) if profile else None
+        if self.profiler:
+            self.profiler.start()
+
+        return ctx
+
+    def build_profiler(self, path: str) -> Profiler:
+        """Profiler attributing samples to the stages timed by the collector."""
+        return Profiler(
+            path,
+            stages={
+                Scraper.build_request: "middleware",
+                Request.fetch: "fetch",
+                Request.afetch: "fetch",
+                Scraper.parse: "parse",
+                Scraper.process: "handle",
+            },
+            interval=self.profile_interval,
+            allocations=self.profile_allocations,
+            snapshot_every=self.profile_snapshot_every,
+            logger=self.logger,
         )
 
-        items = []
+    def stop_profiler(self) -> None:
+        if self.profiler:
+            self.profiler.stop()
+            self.profiler = None
 
-        begin_time = datetime.datetime.now()
-        while self.urls_to_visit:
-            iter_begin_time = datetime.datetime.now()
-            url_with_callback = self.urls_to_visit.pop(0)
+    def build_checkpoint(self) -> Optional[CheckpointLog]:
+        if not self.checkpoint_path:
+            return None
+        return CheckpointLog(
+            self.checkpoint_path,
+            interval=self.checkpoint_interval,
+            compact_every=self.checkpoint_compact_every,
+        )
 
-            response = self.make_request(ctx, url_with_callback.url)
+    def restore_checkpoint(self, ctx: Context, resume: bool) -> None:
+        checkpoint: CheckpointLog = self.checkpoint  # type: ignore
+        state = checkpoint.open(resume)
+        checkpoint.collector = ctx.collector
 
-            if not response:
-                raise ValueError("Request failed")
+        for key, value in state.stats.items():
+            ctx.collector.set(key, value)
 
-            if response.status_code != 200:
-                raise ValueError(
-                    f"Request failed with status code {response.status_code}"
-                )
+        for url in state.seen:
+            self.visited_urls.add(url)
 
-            self.visited_urls.append(url_with_callback.url)
+        for url, callback, priority in state.pending_entries():
+            extract = resolve_callback(self, callback) or self.extract
+            self.urls_to_visit.push(ExtractCallback(url, extract), priority)
 
-            new_items = url_with_callback.extract(ctx, Selector(response.text))
+        checkpoint.restored_items = state.all_items()
+        if resume:
+            self.logger.info(
+                f"Resuming from {len(state.seen)} seen and "
+                f"{len(state.pending)} pending urls"
+            )
 
-            # TODO: self.process(ctx, new_items)
+    def restored_items(self) -> List[Dict[str, Any]]:
+        if not self.checkpoint:
+            return []
+        items, self.checkpoint.restored_items = self.checkpoint.restored_items, []
+        return items
 
-            # append new_items to items, Items can be a list or a dict or None
-            if new_items:
-                if isinstance(new_items, dict):
-                    items.append(new_items)
-                else:
-                    items += new_items
+    def complete_url(
+        self, url_with_callback: ExtractCallback, new_items: List[Dict[str, Any]]
+    ) -> None:
+        """Record that `url_with_callback` was processed, successfully or not."""
+        self.urls_to_visit.done(url_with_callback)
 
-            iter_end_time = datetime.datetime.now()
-            items_count = len(items)
-            ctx.collector.set("items_count", items_count)
-            ctx.collector.jobs.append(
-                JobCollector(
-                    url=url_with_callback.url,
-                    duration=iter_end_time - iter_begin_time,
-                    items_count=len(list(new_items)),
-                )
+        # Streamed pages with items are committed by the pipeline, once the
+        # batch holding their items is flushed
+        if self.checkpoint and not (self.stream_items and new_items):
+            self.checkpoint.done(
+                url_with_callback.url, None if self.stream_items else new_items
+            )
+
+    def is_success(self, response: Optional[Response]) -> bool:
+        return response is not None and response.status_code == 200
+
+    def is_not_modified(self, response: Optional[Response]) -> bool:
+        return (
+            self.validators is not None
+            and response is not None
+            and response.status_code == 304
+        )
+
+    def handle_not_modified(
+        self,
+        ctx: Context,
+        url_with_callback: ExtractCallback,
+        response: Response,
+        iter_begin_time: datetime.datetime,
+    ) -> List[Dict[str, Any]]:
+        """Schedule the links of an unchanged page without parsing it again."""
+        for url, callback, priority in self.validators.links(  # type: ignore
+            url_with_callback.url
+        ):
+            self.to_visit(url, resolve_callback(self, callback), priority=priority)
+
+        ctx.collector.increment("unchanged_count")
+        return self.record_job(ctx, url_with_callback, response, [], iter_begin_time)
+
+    def handle_failure(
+        self,
+        ctx: Context,
+        url_with_callback: ExtractCallback,
+        response: Optional[Response],
+        error: Optional[Exception],
+        iter_begin_time: datetime.datetime,
+    ) -> List[Dict[str, Any]]:
+        """Retry a failed request later, or record it as failed.
+
+        Retries are pushed back to the scheduler with a backoff delay, so they
+        never hold a slot while waiting.
+        """
+        url = url_with_callback.url
+        attempt = url_with_callback.attempt
+        retries = ctx.request.retries if ctx.request else self.retry_policy.retries
+        status_code = response.status_code if response is not None else None
+        reason = (
+            f"{type(error).__name__}: {error}"
+            if error is not None
+            else f"status code {status_code}"
+        )
+
+        if self.retry_policy.should_retry(attempt, retries, response, error):
+            delay = self.retry_policy.delay(attempt, response)
+            self.logger.warning(
+                f"Request to {url} failed with {reason}, retrying in {delay:.2f}s"
+            )
+            ctx.collector.increment("retries_count")
+            self.scheduler.push(replace(url_with_callback, attempt=attempt + 1), delay)
+            return []
+
+        self.complete_url(url_with_callback, [])
+        self.logger.error(f"Request to {url} failed with {reason}")
+        ctx.collector.increment("failed_count")
+        ctx.collector.record_job(
+            JobCollector(
+                url=url,
+                duration=datetime.datetime.now() - iter_begin_time,
+                items_count=0,
+                status_code=status_code,
+                error=reason,
+                retries=attempt,
+            )
+        )
+        if self.profiler:
+            self.profiler.page_done()
+        return []
+
+    def build_retry_policy(self) -> RetryPolicy:
+        return RetryPolicy(retries=self.retries, backoff=self.retry_backoff)
+
+    def build_scheduler(self) -> PolitenessScheduler:
+        return PolitenessScheduler(
+            domain_concurrency=self.domain_concurrency,
+            domain_rate_limit=self.domain_rate_limit,
+            auto_throttle=self.auto_throttle,
+        )
+
+    def build_client_pool(self) -> ClientPool:
+        return ClientPool(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+            http2=self.http2,
+        )
+
+    def close_client_pool(self) -> None:
+        if self.client_pool:
+            self.client_pool.close()
+            self.client_pool = None
+
+    async def aclose_client_pool(self) -> None:
+        if self.client_pool:
+            await self.client_pool.aclose()
+            self.client_pool = None
+
+    def build_item_pipeline(self, ctx: Context) -> ItemPipeline:
+        return ItemPipeline(
+            lambda batch: self.process(ctx, batch),
+            batch_size=self.batch_size,
+            batch_bytes=self.batch_bytes,
+            batch_interval=self.batch_interval,
+            # Pages are committed along with the batch holding their items
+            commit=self.checkpoint.commit if self.checkpoint else None,
+        )
+
+    def process_response(
+        self,
+        ctx: Context,
+        url_with_callback: ExtractCallback,
+        response: Response,
+        iter_begin_time: datetime.datetime,
+    ) -> List[Dict[str, Any]]:
+        new_items = self.extract_items(ctx, url_with_callback, response)
+
+        return self.record_job(
+            ctx, url_with_callback, response, new_items, iter_begin_time
+        )
+
+    def extract_items(
+        self, ctx: Context, url_with_callback: ExtractCallback, response: Response
+    ) -> List[Dict[str, Any]]:
+        if not self.validators and not self.parse_memo:
+            return self.parse(ctx, url_with_callback, response)
+
+        memoized = self.memoized_items(ctx, url_with_callback, response)
+        if memoized is not None:
+            return memoized
+
+        self.page_links.links = []
+        try:
+            items = self.parse(ctx, url_with_callback, response)
+            links = self.page_links.links
+        finally:
+            self.page_links.links = None
+
+        self.record_page(ctx, url_with_callback, response, items, links)
+        return items
+
+    def parse(
+        self, ctx: Context, url_with_callback: ExtractCallback, response: Response
+    ) -> List[Dict[str, Any]]:
+        start = time.perf_counter()
+        selector = Selector(response.text)
+        parsed = time.perf_counter()
+        # Items can be a list or a dict or None
+        items = as_item_list(url_with_callback.extract(ctx, selector))
+        ctx.collector.observe("selector", parsed - start)
+        ctx.collector.observe("extract", time.perf_counter() - parsed)
+        return items
+
+    def memoized_items(
+        self, ctx: Context, url_with_callback: ExtractCallback, response: Response
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Items memoized for this page content, scheduling its links again."""
+        if not self.parse_memo:
+            return None
+
+        memoized = self.parse_memo.get(
+            self.parse_memo.key(
+                url_with_callback.extract, url_with_callback.url, response.content
+            )
+        )
+        if memoized is None:
+            ctx.collector.increment("parse_memo_misses")
+            return None
+
+        items, links = memoized
+        for url, callback, priority in links:
+            self.to_visit(url, resolve_callback(self, callback), priority=priority)
+        ctx.collector.increment("parse_memo_hits")
+
+        if self.validators:
+            self.validators.update(url_with_callback.url, response, links)
+            ctx.collector.increment("changed_count")
+        return items
+
+    def record_page(
+        self,
+        ctx: Context,
+        url_with_callback: ExtractCallback,
+        response: Response,
+        items: List[Dict[str, Any]],
+        links: List[Tuple[str, Optional[str], int]],
+    ) -> None:
+        """Store what a page parse produced for later runs."""
+        if self.parse_memo:
+            self.parse_memo.put(
+                self.parse_memo.key(
+                    url_with_callback.extract, url_with_callback.url, response.content
+                ),
+                items,
+                links,
+            )
+        if self.validators:
+            self.validators.update(url_with_callback.url, response, links)
+            ctx.collector.increment("changed_count")
+
+    def record_job(
+        self,
+        ctx: Context,
+        url_with_callback: ExtractCallback,
+        response: Response,
+        new_items: List[Dict[str, Any]],
+        iter_begin_time: datetime.datetime,
+    ) -> List[Dict[str, Any]]:
+        self.complete_url(url_with_callback, new_items)
+
+        iter_end_time = datetime.datetime.now()
+        ctx.collector.increment("items_count", len(new_items))
+        ctx.collector.record_job(
+            JobCollector(
+                url=url_with_callback.url,
+                duration=iter_end_time - iter_begin_time,
+                items_count=len(new_items),
+                status_code=response.status_code,
+                retries=url_with_callback.attempt,
             )
+        )
+        if self.profiler:
+            self.profiler.page_done()
 
-        self.process(ctx, items)
+        return new_items
+
+    def abort_handlers(self, ctx: Context) -> None:
+        """Let handlers flush or discard their output after a failed run."""
+        for handler in self.handlers:
+            try:
+                handler.abort(ctx)
+            except Exception as err:
+                self.logger.error(
+                    f"Failed to abort {handler.__class__.__name__}: {err}"
+                )
+
+    def complete_run(
+        self,
+        ctx: Context,
+        items: Union[Dict[str, Any], Iterable[Dict[str, Any]]],
+        begin_time: datetime.datetime,
+    ):
+        if not self.stream_items:
+            try:
+                self.process(ctx, items)
+            except BaseException:
+                self.abort_handlers(ctx)
+                raise
+
+        for handler in self.handlers:
+            handler.close(ctx)
+
+        if self.checkpoint:
+            self.checkpoint.finish()
+
+        if self.crawl_backend:
+            self.crawl_backend.report(self.worker_id, ctx.collector.counters())
 
         end_time = datetime.datetime.now()
 
@@ -170,29 +931,136 @@ class Scraper(ABC):
         self.logger.info("Scraping complete")
 
         self.report(ctx)
+        Logger(self.name).flush()
 
     def to_visit(
-        self, url: str, extract: Optional[Callable] = None, force=False
+        self, url: str, extract: Optional[Callable] = None, force=False, priority=0
     ) -> None:
+        discovered = getattr(self.page_links, "discovered", None)
+        if discovered is not None:
+            # Running in a parse worker, the loop thread schedules the url
+            discovered.append((url, extract, force, priority))
+            return
+
+        links = getattr(self.page_links, "links", None)
+        if links is not None:
+            callback = callback_ref(self, extract)
+            if callback is None or isinstance(callback, str):
+                links.append((url, callback, priority))
+
         if url in self.visited_urls and not force:
             return
 
         if not extract:
             extract = self.extract
 
-        self.urls_to_visit.append(ExtractCallback(url, extract))
+        self.visited_urls.add(url)
+        self.urls_to_visit.push(ExtractCallback(url, extract), priority)
 
-    def make_request(self, ctx: Context, url: str) -> Optional[Response]:
-        request = Request(url=url, logger=self.logger)
+        if self.checkpoint:
+            callback = callback_ref(self, extract)
+            if not isinstance(callback, str):
+                raise ValueError(
+                    "Only scraper methods can be used as callbacks with a checkpoint"
+                )
+            self.checkpoint.push(url, callback, priority)
 
-        self.logger.info(f"Making request to {url}")
+    def build_request(self, ctx: Context, url: str) -> Request:
+        start = time.perf_counter()
+        request = Request(url=url, logger=self.logger, retries=self.retries)
+        if self.request_timings:
+            request.timings = RequestTimings()
+        if self.validators:
+            request.headers.update(self.validators.conditional_headers(url))
 
         for middleware in self.middlewares:
             request = middleware.process_request(ctx, request)
 
-        response = request.fetch()
+        ctx.request = request
+        ctx.collector.observe("middleware", time.perf_counter() - start)
+
+        return request
+
+    def record_fetch(
+        self,
+        ctx: Context,
+        request: Request,
+        response: Optional[Response],
+        duration: float,
+    ) -> None:
+        """Record the stage timings and counters of a request."""
+        collector = ctx.collector
+        collector.observe("fetch", duration)
+        if request.timings is not None:
+            for stage, seconds in request.timings.durations.items():
+                collector.observe(stage, seconds)
+
+        if response is None:
+            return
+
+        collector.increment_label("responses", "status", response.status_code)
+        try:
+            collector.increment("bytes_in", len(response.content))
+        except ResponseNotRead:
+            # Streamed responses, e.g. from a playwright route
+            pass
+        from_cache = response.extensions.get("from_cache")
+        if from_cache is not None:
+            collector.increment("cache_hits" if from_cache else "cache_misses")
+
+    def should_log_request(self) -> bool:
+        """Whether to log the request being made, one in `log_requests_every`."""
+        every = self.log_requests_every
+        return (
+            every > 0
+            and next(self.request_counter) % every == 0
+            and self.logger.isEnabledFor(logging.INFO)
+        )
+
+    def make_request(self, ctx: Context, url: str) -> Optional[Response]:
+        request = self.build_request(ctx, url)
+        log = self.should_log_request()
+        if log:
+            self.logger.info("Making request to %s", url, extra={"url": url})
 
-        self.logger.info(f"Received response with status code {response.status_code}")
+        start = time.perf_counter()
+        response = None
+        try:
+            response = request.fetch(self.client_pool)
+        finally:
+            self.record_fetch(ctx, request, response, time.perf_counter() - start)
+
+        if log:
+            self.logger.info(
+                "Received response with status code %s",
+                response.status_code,
+                extra={"url": url, "status_code": response.status_code},
+            )
+
+        ctx.response = response
+        ctx.request = request
+
+        return response
+
+    async def amake_request(self, ctx: Context, url: str) -> Optional[Response]:
+        request = self.build_request(ctx, url)
+        log = self.should_log_request()
+        if log:
+            self.logger.info("Making request to %s", url, extra={"url": url})
+
+        start = time.perf_counter()
+        response = None
+        try:
+            response = await request.afetch(self.client_pool)
+        finally:
+            self.record_fetch(ctx, request, response, time.perf_counter() - start)
+
+        if log:
+            self.logger.info(
+                "Received response with status code %s",
+                response.status_code,
+                extra={"url": url, "status_code": response.status_code},
+            )
 
         ctx.response = response
         ctx.request = request
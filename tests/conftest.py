@@ -0,0 +1,20 @@
+import pytest
+
+from scrapework.core.logger import Logger
+from scrapework.scraper import Scraper
+
+
+@pytest.fixture(scope="session", autouse=True)
+def default_log_file(tmp_path_factory):
+    """Keep the ``default`` logger's file out of the working directory."""
+    path = tmp_path_factory.mktemp("logs") / "default.log"
+    Logger(filename=str(path))
+    yield path
+
+
+@pytest.fixture(autouse=True)
+def scraper_log_file(tmp_path, monkeypatch):
+    """Scrapers log to the test's tmp_path rather than `<name>.log`."""
+    path = tmp_path / "scraper.log"
+    monkeypatch.setattr(Scraper, "log_file", str(path))
+    yield path
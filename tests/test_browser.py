@@ -0,0 +1,240 @@
+import asyncio
+import sys
+import types
+
+import httpx
+import pytest
+
+from scrapework.browser import AsyncBrowserPool, BrowserPool
+from scrapework.request import Request
+
+# Resources a fake page loads on goto: the document and an image
+RESOURCES = [("document", ""), ("image", "logo.png")]
+
+
+class FakeRoute:
+    def __init__(self, page, resource_type):
+        self.page = page
+        self.resource_type = resource_type
+
+    def abort(self):
+        self.page.aborted.append(self.resource_type)
+
+    def fulfill(self, status, headers, body):
+        self.page.fulfilled.append(self.resource_type)
+        if self.resource_type == "document":
+            self.page.status, self.page.body = status, body.decode()
+
+
+class FakeBrowserRequest:
+    method = "GET"
+    headers = {}
+
+    def __init__(self, url, resource_type):
+        self.url = url
+        self.resource_type = resource_type
+
+
+class FakePage:
+    route_class = FakeRoute
+
+    def __init__(self):
+        self.handlers = []
+        self.aborted = []
+        self.fulfilled = []
+        self.visits = 0
+        self.closed = False
+
+    def route(self, pattern, handler):
+        self.handlers.append(handler)
+
+    def unroute(self, pattern, handler):
+        self.handlers.remove(handler)
+
+    def requests(self, url):
+        self.visits += 1
+        for resource_type, path in RESOURCES:
+            yield self.route_class(self, resource_type), FakeBrowserRequest(
+                url + path, resource_type
+            )
+
+    def goto(self, url):
+        for route, request in self.requests(url):
+            self.handlers[-1](route, request)
+        return types.SimpleNamespace(status=self.status)
+
+    def content(self):
+        return self.body
+
+    def close(self):
+        self.closed = True
+
+
+class FakeAsyncRoute(FakeRoute):
+    async def abort(self):
+        super().abort()
+
+    async def fulfill(self, status, headers, body):
+        super().fulfill(status, headers, body)
+
+
+class FakeAsyncPage(FakePage):
+    route_class = FakeAsyncRoute
+
+    async def route(self, pattern, handler):
+        super().route(pattern, handler)
+
+    async def unroute(self, pattern, handler):
+        super().unroute(pattern, handler)
+
+    async def goto(self, url):
+        for route, request in self.requests(url):
+            await self.handlers[-1](route, request)
+        return types.SimpleNamespace(status=self.status)
+
+    async def content(self):
+        return self.body
+
+    async def close(self):
+        super().close()
+
+
+class FakePlaywright:
+    """Stands for the playwright object, its browser and browser context."""
+
+    def __init__(self, page_class):
+        self.page_class = page_class
+        self.pages = []
+        self.launched = 0
+        self.closed = False
+        self.stopped = False
+        self.chromium = self
+
+    def launch(self, **kwargs):
+        self.launched += 1
+        return self
+
+    def new_context(self):
+        return self
+
+    def new_page(self):
+        page = self.page_class()
+        self.pages.append(page)
+        return page
+
+    def close(self):
+        self.closed = True
+
+    def stop(self):
+        self.stopped = True
+
+
+class FakeAsyncPlaywright(FakePlaywright):
+    async def start(self):
+        return self
+
+    async def launch(self, **kwargs):
+        return super().launch(**kwargs)
+
+    async def new_context(self):
+        return self
+
+    async def new_page(self):
+        return super().new_page()
+
+    async def close(self):
+        super().close()
+
+    async def stop(self):
+        super().stop()
+
+
+@pytest.fixture
+def playwright(monkeypatch):
+    fake = FakePlaywright(FakePage)
+    fake_async = FakeAsyncPlaywright(FakeAsyncPage)
+    sync_api = types.ModuleType("playwright.sync_api")
+    sync_api.sync_playwright = lambda: types.SimpleNamespace(start=lambda: fake)
+    async_api = types.ModuleType("playwright.async_api")
+    async_api.async_playwright = lambda: fake_async
+    monkeypatch.setitem(sys.modules, "playwright.sync_api", sync_api)
+    monkeypatch.setitem(sys.modules, "playwright.async_api", async_api)
+    return types.SimpleNamespace(sync=fake, asynchronous=fake_async)
+
+
+def handler(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(200, text=f"<p>{request.url}</p>")
+
+
+def test_browser_pool_reuses_pages(playwright):
+    pool = BrowserPool(pages=2)
+    with httpx.Client(transport=httpx.MockTransport(handler)) as client:
+        responses = [pool.fetch(Request(f"http://test/{i}"), client) for i in range(4)]
+
+    assert [response.text for response in responses] == [
+        f"<p>http://test/{i}</p>" for i in range(4)
+    ]
+    assert playwright.sync.launched == 1
+    assert [page.visits for page in playwright.sync.pages] == [2, 2]
+    page = playwright.sync.pages[0]
+    # Blocked resources are aborted, the rest go through the http client
+    assert page.aborted == ["image", "image"]
+    assert page.fulfilled == ["document", "document"]
+    assert page.handlers == []
+
+    pool.close()
+    assert playwright.sync.closed and playwright.sync.stopped
+    assert pool.browser is None and pool.pages.empty()
+
+
+def test_browser_pool_routes_resources_not_blocked(playwright):
+    pool = BrowserPool(blocked_resources=["font"])
+    with httpx.Client(transport=httpx.MockTransport(handler)) as client:
+        pool.fetch(Request("http://test/"), client)
+
+    page = playwright.sync.pages[0]
+    assert page.aborted == []
+    assert page.fulfilled == ["document", "image"]
+    pool.close()
+
+
+def test_browser_pool_recycles_pages(playwright):
+    pool = BrowserPool(pages=1, max_page_uses=2)
+    with httpx.Client(transport=httpx.MockTransport(handler)) as client:
+        for i in range(5):
+            pool.fetch(Request(f"http://test/{i}"), client)
+
+    pages = playwright.sync.pages
+    assert [page.visits for page in pages] == [2, 2, 1]
+    assert [page.closed for page in pages] == [True, True, False]
+    pool.close()
+
+
+def test_async_browser_pool(playwright):
+    async def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, text=f"<p>{request.url}</p>")
+
+    pool = AsyncBrowserPool(pages=2, max_page_uses=2)
+
+    async def crawl():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            responses = await asyncio.gather(
+                *[pool.fetch(Request(f"http://test/{i}"), client) for i in range(4)]
+            )
+        await pool.close()
+        return responses
+
+    responses = asyncio.run(crawl())
+    assert sorted(response.text for response in responses) == [
+        f"<p>http://test/{i}</p>" for i in range(4)
+    ]
+    fake = playwright.asynchronous
+    assert fake.launched == 1
+    pages = fake.pages
+    # Two pages used concurrently, each replaced after its second fetch
+    assert len(pages) == 4
+    assert [page.visits for page in pages[:2]] == [2, 2]
+    assert all(page.closed for page in pages[:2])
+    assert pages[0].aborted == ["image", "image"]
+    assert fake.closed and fake.stopped
+    assert pool.pages is None and pool.uses == {}
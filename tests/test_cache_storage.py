@@ -0,0 +1,223 @@
+import asyncio
+import time
+
+import hishel
+import httpcore
+import httpx
+
+from scrapework.cache import CacheMiddleware
+from scrapework.cache_storage import (
+    AsyncMemoryTierStorage,
+    AsyncSQLiteCacheStorage,
+    MemoryCache,
+    MemoryTierStorage,
+    SQLiteCache,
+    SQLiteCacheStorage,
+)
+from scrapework.core.collector import MetadataCollector
+
+
+def test_sqlite_cache_round_trip(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite"))
+    cache.put("a", b"x" * 10_000)
+    cache.put("a", b"y" * 10_000)
+
+    assert cache.get("a") == b"y" * 10_000
+    assert cache.get("missing") is None
+    assert cache.count == 1
+    # Bodies are stored compressed
+    assert cache.total_bytes < 1_000
+    cache.close()
+
+    reopened = SQLiteCache(str(tmp_path / "cache.sqlite"))
+    assert reopened.get("a") == b"y" * 10_000
+    assert reopened.count == 1
+
+
+def test_sqlite_cache_evicts_least_recently_used(tmp_path):
+    cache = SQLiteCache(
+        str(tmp_path / "cache.sqlite"), max_entries=10, touch_interval=0
+    )
+    for i in range(10):
+        cache.put(str(i), b"value")
+        time.sleep(0.001)
+    cache.get("0")
+    cache.put("10", b"value")
+
+    assert cache.count == 9
+    assert cache.get("0") == b"value"
+    assert cache.get("1") is None
+    assert cache.get("10") == b"value"
+
+
+def test_sqlite_cache_bounded_by_bytes(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite"), max_bytes=5_000)
+    for i in range(100):
+        cache.put(str(i), bytes(range(256)) * 4)
+
+    assert cache.total_bytes <= 5_000
+    assert cache.get("99") is not None
+
+
+def test_sqlite_cache_ttl(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite"), ttl=0.01)
+    cache.put("a", b"value")
+    time.sleep(0.02)
+
+    assert cache.get("a") is None
+    assert cache.count == 0
+
+
+def test_sqlite_cache_storage_serves_hits(tmp_path):
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url)
+        return httpx.Response(200, text="cached body")
+
+    storage = SQLiteCacheStorage(SQLiteCache(str(tmp_path / "cache.sqlite")))
+    with hishel.CacheClient(
+        storage=storage, transport=httpx.MockTransport(handler)
+    ) as client:
+        client.get("http://test/", extensions={"force_cache": True})
+        response = client.get("http://test/", extensions={"force_cache": True})
+
+    assert response.text == "cached body"
+    assert response.extensions["from_cache"]
+    assert len(calls) == 1
+
+
+def build_stored(body: bytes):
+    response = httpcore.Response(200, content=body)
+    response.read()
+    return response, httpcore.Request("GET", "http://test/"), None
+
+
+def test_memory_cache_lru_and_counters():
+    collector = MetadataCollector()
+    memory = MemoryCache(max_entries=2)
+    memory.collector = collector
+    memory.put("a", *build_stored(b"a"))
+    memory.put("b", *build_stored(b"b"))
+    assert memory.get("a")[0].read() == b"a"
+    memory.put("c", *build_stored(b"c"))
+
+    assert memory.get("b") is None
+    assert memory.get("c")[0].read() == b"c"
+    # Every hit hands out a response that can be read again
+    assert memory.get("a")[0].read() == b"a"
+    assert collector.get("cache_memory_hits") == 3
+    assert collector.get("cache_memory_misses") == 1
+    assert collector.get("cache_memory_evictions") == 1
+
+
+def test_memory_cache_bounded_by_bytes():
+    memory = MemoryCache(max_entries=None, max_bytes=250)
+    for key in "abc":
+        memory.put(key, *build_stored(b"x" * 100))
+    memory.put("big", *build_stored(b"x" * 1000))
+
+    assert len(memory) == 2
+    assert memory.get("a") is None
+    assert memory.get("big") is None
+
+
+def test_memory_tier_in_front_of_disk_cache(tmp_path):
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url)
+        return httpx.Response(200, text=str(request.url))
+
+    collector = MetadataCollector()
+    memory = MemoryCache(max_entries=1)
+    memory.collector = collector
+    disk = SQLiteCacheStorage(SQLiteCache(str(tmp_path / "cache.sqlite")))
+    storage = MemoryTierStorage(memory, disk)
+    with hishel.CacheClient(
+        storage=storage, transport=httpx.MockTransport(handler)
+    ) as client:
+        for url in ["http://test/a", "http://test/a", "http://test/b"]:
+            client.get(url, extensions={"force_cache": True})
+        # Evicted from memory, served from disk and promoted again
+        assert client.get("http://test/a", extensions={"force_cache": True}).text == (
+            "http://test/a"
+        )
+        assert client.get("http://test/a", extensions={"force_cache": True}).text == (
+            "http://test/a"
+        )
+
+    assert len(calls) == 2
+    assert collector.get("cache_memory_hits") == 2
+
+
+def test_async_memory_tier_stores_streamed_responses(tmp_path):
+    async def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, text=str(request.url))
+
+    async def crawl():
+        memory = MemoryCache(max_entries=10)
+        disk = AsyncSQLiteCacheStorage(SQLiteCache(str(tmp_path / "cache.sqlite")))
+        async with hishel.AsyncCacheClient(
+            storage=AsyncMemoryTierStorage(memory, disk),
+            transport=httpx.MockTransport(handler),
+        ) as client:
+            first = await client.get("http://test/a")
+            second = await client.get("http://test/a", extensions={"force_cache": True})
+        return first, second, memory
+
+    first, second, memory = asyncio.run(crawl())
+    assert first.text == second.text == "http://test/a"
+    assert len(memory) == 1
+
+
+def test_async_memory_tier_serves_from_memory(tmp_path):
+    calls = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url)
+        return httpx.Response(200, text=str(request.url))
+
+    collector = MetadataCollector()
+    memory = MemoryCache(max_entries=1)
+    memory.collector = collector
+
+    async def crawl():
+        disk = AsyncSQLiteCacheStorage(SQLiteCache(str(tmp_path / "cache.sqlite")))
+        texts = []
+        async with hishel.AsyncCacheClient(
+            storage=AsyncMemoryTierStorage(memory, disk),
+            transport=httpx.MockTransport(handler),
+        ) as client:
+            # Stored, served from memory, evicted, then served from disk and
+            # promoted again, and served from memory
+            for url in ["a", "a", "b", "a", "a"]:
+                response = await client.get(
+                    f"http://test/{url}", extensions={"force_cache": True}
+                )
+                texts.append(response.text)
+        return texts
+
+    texts = asyncio.run(crawl())
+    assert texts == [f"http://test/{url}" for url in ["a", "a", "b", "a", "a"]]
+    assert len(calls) == 2
+    assert collector.get("cache_memory_hits") == 2
+
+
+def test_cache_middleware_sqlite_options(tmp_path):
+    middleware = CacheMiddleware(
+        str(tmp_path / "cache"),
+        backend="sqlite",
+        compression_level=None,
+        touch_interval=0,
+        mmap_size=0,
+    )
+    cache = middleware.storage.cache
+    assert cache.compression_level is None
+    assert cache.touch_interval == 0
+    assert cache.mmap_size == 0
+
+    cache.put("a", b"x" * 1000)
+    # Stored as is
+    assert cache.total_bytes >= 1000
+    assert cache.get("a") == b"x" * 1000
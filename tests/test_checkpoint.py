@@ -0,0 +1,126 @@
+import pytest
+from test_scraper import PAGES, LinkScraper, build_scraper
+
+from scrapework.checkpoint import CheckpointLog
+
+
+def test_checkpoint_log_replays_state(tmp_path):
+    path = str(tmp_path / "crawl.checkpoint")
+    log = CheckpointLog(path)
+    log.open()
+    log.push("http://test/", "extract")
+    log.push("http://test/a", None, priority=1)
+    log.done("http://test/", [{"url": "http://test/"}])
+    log.flush()
+
+    # A record cut short by a crash is ignored
+    with open(path, "a") as file:
+        file.write('{"op": "push", "url"')
+
+    state = CheckpointLog(path).load()
+    assert list(state.seen) == ["http://test/", "http://test/a"]
+    assert state.pending_entries() == [("http://test/a", None, 1)]
+    assert state.all_items() == [{"url": "http://test/"}]
+
+
+def test_checkpoint_log_compacts(tmp_path):
+    path = str(tmp_path / "crawl.checkpoint")
+    log = CheckpointLog(path, compact_every=4)
+    log.open()
+    for i in range(10):
+        log.push(f"http://test/{i}", None)
+        log.done(f"http://test/{i}")
+    log.push("http://test/last", None)
+    log.close()
+
+    with open(path) as file:
+        lines = file.readlines()
+    assert len(lines) == 11
+    state = CheckpointLog(path).load()
+    assert len(state.seen) == 11
+    assert state.pending_entries() == [("http://test/last", None, 0)]
+
+
+class CrashingScraper(LinkScraper):
+    def extract(self, ctx, selector):
+        if str(ctx.request.url).endswith("/b"):
+            raise RuntimeError("crash")
+        return super().extract(ctx, selector)
+
+
+@pytest.mark.parametrize("concurrency", [1, 3])
+@pytest.mark.parametrize("stream_items", [False, True])
+def test_run_resumes_from_checkpoint(tmp_path, stream_items, concurrency):
+    path = str(tmp_path / "crawl.checkpoint")
+    items = []
+    runs = []
+
+    def process(ctx, new_items):
+        items.extend(new_items)
+        runs.append(ctx)
+
+    crashing = CrashingScraper()
+    crashing.middlewares = build_scraper().middlewares
+    crashing.handlers = []
+    crashing.reporters = []
+    crashing.checkpoint_path = path
+    crashing.stream_items = stream_items
+    crashing.batch_size = 1
+    crashing.process = process
+    with pytest.raises(RuntimeError):
+        crashing.run(["http://test/"], concurrency=concurrency)
+
+    scraper = build_scraper()
+    scraper.checkpoint_path = path
+    scraper.stream_items = stream_items
+    scraper.batch_size = 1
+    scraper.process = process
+    scraper.run(["http://test/"], concurrency=concurrency, resume=True)
+
+    # Every page's items exactly once
+    assert sorted(item["url"] for item in items) == sorted(PAGES)
+    refetched = [job.url for job in runs[-1].collector.job_stats.slowest_jobs()]
+    if concurrency == 1:
+        assert refetched == ["http://test/b"]
+    else:
+        # Pages still in flight when the run crashed are fetched again
+        assert "http://test/b" in refetched and "http://test/" not in refetched
+
+
+def test_resume_requires_checkpoint_path():
+    with pytest.raises(ValueError):
+        build_scraper().run(["http://test/"], concurrency=1, resume=True)
+
+
+@pytest.mark.parametrize("concurrency", [None, 3])
+def test_streamed_pages_committed_with_their_batch(tmp_path, concurrency):
+    path = str(tmp_path / "crawl.checkpoint")
+    written = []
+
+    def failing_process(ctx, batch):
+        if any(item["url"] == "http://test/b" for item in batch):
+            raise RuntimeError("handler failed")
+        written.extend(batch)
+
+    crashing = build_scraper()
+    crashing.checkpoint_path = path
+    crashing.stream_items = True
+    crashing.batch_size = 1
+    crashing.process = failing_process
+    with pytest.raises(RuntimeError):
+        crashing.run(["http://test/"], concurrency=concurrency)
+
+    # /b was crawled but its batch was never written, it is not done
+    state = CheckpointLog(path).load()
+    done = [url for url in state.seen if url not in state.pending]
+    assert sorted(done) == sorted(item["url"] for item in written)
+    assert "http://test/b" in state.pending
+
+    scraper = build_scraper()
+    scraper.checkpoint_path = path
+    scraper.stream_items = True
+    scraper.batch_size = 1
+    scraper.process = lambda ctx, batch: written.extend(batch)
+    scraper.run(["http://test/"], concurrency=concurrency, resume=True)
+
+    assert sorted(item["url"] for item in written) == sorted(PAGES)
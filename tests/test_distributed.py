@@ -0,0 +1,191 @@
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+
+from scrapework.distributed import RedisBackend, SqliteBackend
+from scrapework.middleware import RequestMiddleware
+
+from test_scraper import PAGES, MockClient, build_scraper
+
+
+async def slow_handler(request: httpx.Request) -> httpx.Response:
+    await asyncio.sleep(0.3)
+    return httpx.Response(200, text=PAGES[str(request.url)])
+
+
+class SlowClient(MockClient):
+    @classmethod
+    def build_async_client(cls, **kwargs) -> httpx.AsyncClient:
+        kwargs.pop("mounts", None)
+        return httpx.AsyncClient(transport=httpx.MockTransport(slow_handler), **kwargs)
+
+
+class SlowClientMiddleware(RequestMiddleware):
+    def process_request(self, ctx, request):
+        request.cls_client = SlowClient
+        return request
+
+
+@pytest.fixture(params=["sqlite", "redis"])
+def backend(request, tmp_path):
+    if request.param == "sqlite":
+        return SqliteBackend(str(tmp_path / "crawl.db"), lease_seconds=0.2)
+
+    fakeredis = pytest.importorskip("fakeredis")
+    return RedisBackend(fakeredis.FakeRedis(decode_responses=True), lease_seconds=0.2)
+
+
+def test_backend_deduplicates_and_orders(backend):
+    assert backend.add("a", "http://test/a", None)
+    assert not backend.add("a", "http://test/a", None)
+    assert backend.add("b", "http://test/b", "parse", priority=-1)
+    assert backend.add("c", "http://test/c", None)
+
+    assert backend.seen("a")
+    assert not backend.seen("d")
+    assert backend.seen_count() == 3
+    assert backend.pending_count() == 3
+
+    assert backend.lease() == ("b", "http://test/b", "parse")
+    assert backend.lease() == ("a", "http://test/a", None)
+    backend.complete("a")
+    assert backend.pending_count() == 1
+    # Still leased, the crawl is not over
+    assert backend.active_count() == 2
+
+
+def test_backend_expired_lease_is_requeued(backend):
+    backend.add("a", "http://test/a", None)
+    assert backend.lease()[0] == "a"
+    assert backend.lease() is None
+
+    time.sleep(0.3)
+    assert backend.pending_count() == 1
+    assert backend.lease()[0] == "a"
+    backend.complete("a")
+
+    time.sleep(0.3)
+    assert backend.lease() is None
+    assert backend.pending_count() == 0
+
+
+def test_backend_merges_worker_stats(backend):
+    backend.report("w1", {"items_count": 2, "failed_count": 1})
+    backend.report("w2", {"items_count": 3})
+
+    assert set(backend.worker_stats()) == {"w1", "w2"}
+    collector = backend.collector()
+    assert collector.get("items_count") == 5
+    assert collector.get("failed_count") == 1
+
+
+def test_workers_share_a_crawl(tmp_path):
+    backend = SqliteBackend(str(tmp_path / "crawl.db"))
+    items = []
+    for worker_id in ["w1", "w2"]:
+        scraper = build_scraper()
+        scraper.crawl_backend = backend
+        scraper.worker_id = worker_id
+        scraper.urls_to_visit = scraper.build_frontier()
+        scraper.visited_urls = scraper.build_seen_set()
+        scraper.process = lambda ctx, new_items: items.extend(new_items)
+        scraper.run(["http://test/"], concurrency=2)
+
+    # The second worker finds every url already crawled
+    assert sorted(item["url"] for item in items) == sorted(PAGES)
+    assert backend.pending_count() == 0
+    assert set(backend.worker_stats()) == {"w1", "w2"}
+
+
+def test_workers_crawl_concurrently(backend):
+    backend.lease_seconds = 30
+    urls = {"w1": [], "w2": []}
+    threads = []
+    for worker_id, worker_urls in urls.items():
+        scraper = build_scraper()
+        scraper.middlewares = [SlowClientMiddleware()]
+        scraper.crawl_backend = backend
+        scraper.worker_id = worker_id
+        scraper.urls_to_visit = scraper.build_frontier()
+        scraper.visited_urls = scraper.build_seen_set()
+        scraper.process = (
+            lambda ctx, items, worker_urls=worker_urls: worker_urls.extend(
+                item["url"] for item in items
+            )
+        )
+        threads.append(
+            threading.Thread(
+                target=scraper.run, args=(["http://test/"],), kwargs={"concurrency": 1}
+            )
+        )
+
+    threads[0].start()
+    # The second worker starts while the first holds the only url
+    while not (backend.pending_count() == 0 and backend.active_count() == 1):
+        time.sleep(0.01)
+    threads[1].start()
+    for thread in threads:
+        thread.join(timeout=10)
+
+    assert sorted(urls["w1"] + urls["w2"]) == sorted(PAGES)
+    assert urls["w1"] and urls["w2"]
+    assert backend.active_count() == 0
+
+
+class RetryAfterClient(MockClient):
+    """Asks to retry the first request to /a a second later."""
+
+    fetched: list = []
+
+    @classmethod
+    def respond(cls, request: httpx.Request) -> httpx.Response:
+        url = str(request.url)
+        cls.fetched.append(url)
+        if url == "http://test/a" and cls.fetched.count(url) == 1:
+            return httpx.Response(503, headers={"Retry-After": "1"})
+        return httpx.Response(200, text=PAGES[url])
+
+    @classmethod
+    def build_client(cls, **kwargs) -> httpx.Client:
+        kwargs.pop("mounts", None)
+        return httpx.Client(transport=httpx.MockTransport(cls.respond), **kwargs)
+
+    @classmethod
+    def build_async_client(cls, **kwargs) -> httpx.AsyncClient:
+        async def respond(request):
+            return cls.respond(request)
+
+        kwargs.pop("mounts", None)
+        return httpx.AsyncClient(transport=httpx.MockTransport(respond), **kwargs)
+
+
+class RetryAfterMiddleware(RequestMiddleware):
+    def process_request(self, ctx, request):
+        request.cls_client = RetryAfterClient
+        return request
+
+
+@pytest.mark.parametrize("concurrency", [None, 1])
+def test_worker_leases_while_a_url_is_retrying(tmp_path, concurrency):
+    RetryAfterClient.fetched = []
+    scraper = build_scraper()
+    scraper.middlewares = [RetryAfterMiddleware()]
+    scraper.crawl_backend = SqliteBackend(str(tmp_path / "crawl.db"))
+    scraper.urls_to_visit = scraper.build_frontier()
+    scraper.visited_urls = scraper.build_seen_set()
+    items = []
+    scraper.process = lambda ctx, new_items: items.extend(new_items)
+
+    scraper.run(["http://test/"], concurrency=concurrency)
+
+    assert sorted(item["url"] for item in items) == sorted(PAGES)
+    # /b is leased and fetched while /a waits on its Retry-After
+    assert RetryAfterClient.fetched == [
+        "http://test/",
+        "http://test/a",
+        "http://test/b",
+        "http://test/a",
+    ]
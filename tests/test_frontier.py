@@ -0,0 +1,53 @@
+from scrapework.frontier import (
+    BloomSeenSet,
+    FifoFrontier,
+    MemorySeenSet,
+    PriorityFrontier,
+    canonicalize_url,
+)
+
+
+def test_canonicalize_url():
+    assert canonicalize_url("HTTP://Example.com:80/a?b=2&a=1#top") == (
+        "http://example.com/a?a=1&b=2"
+    )
+
+
+def test_fifo_frontier():
+    frontier = FifoFrontier()
+    for url in ["a", "b", "c"]:
+        frontier.push(url)
+
+    assert len(frontier) == 3
+    assert [frontier.pop() for _ in range(3)] == ["a", "b", "c"]
+    assert not frontier
+
+
+def test_priority_frontier():
+    frontier = PriorityFrontier()
+    frontier.push("low", priority=10)
+    frontier.push("first", priority=0)
+    frontier.push("second", priority=0)
+
+    assert [frontier.pop() for _ in range(3)] == ["first", "second", "low"]
+
+
+def test_memory_seen_set_canonicalizes():
+    seen = MemorySeenSet()
+    seen.add("http://example.com/a?b=2&a=1")
+
+    assert "http://EXAMPLE.com/a?a=1&b=2#section" in seen
+    assert "http://example.com/b" not in seen
+    assert len(seen) == 1
+
+
+def test_bloom_seen_set():
+    seen = BloomSeenSet(capacity=1000, error_rate=0.01)
+    urls = [f"http://example.com/{i}" for i in range(1000)]
+    for url in urls:
+        seen.add(url)
+
+    assert all(url in seen for url in urls)
+    false_positives = sum(f"http://example.org/{i}" in seen for i in range(1000))
+    assert false_positives < 50
+    assert len(seen) <= 1000
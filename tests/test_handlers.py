@@ -1,9 +1,26 @@
+import gzip
 import json
+from dataclasses import dataclass
+from typing import Optional
 from unittest.mock import patch
 
+import boto3
+import pytest
+from pydantic import BaseModel
+
 from scrapework.core.collector import MetadataCollector
 from scrapework.core.context import Context
-from scrapework.handlers import JsonFileHandler, S3Handler
+from scrapework.handlers import (
+    JsonFileHandler,
+    JsonLinesFileHandler,
+    ParquetFileHandler,
+    S3Handler,
+    S3StreamHandler,
+    encode_items,
+    json_dumps,
+)
+from scrapework.items import Field, Item
+from test_scraper import PAGES, build_scraper
 
 
 def build_context():
@@ -20,7 +37,7 @@ def test_process_items_with_s3_backend():
 
         mock_s3_client.assert_called_once_with("s3")
         mock_s3_client.return_value.put_object.assert_called_once_with(
-            Body=json.dumps(items), Bucket="my-bucket", Key="example.json"
+            Body=json_dumps(items), Bucket="my-bucket", Key="example.json"
         )
 
 
@@ -34,3 +51,242 @@ def test_process_items_with_json_file_backend():
         pipeline.process_items(build_context(), items)
         assert mock_open.call_count == 1
         assert mock_open.call_args_list[0][0][0] == filename
+
+
+def test_json_lines_file_handler_appends(tmp_path):
+    filename = str(tmp_path / "output.jsonl")
+    handler = JsonLinesFileHandler(filename=filename)
+    ctx = build_context()
+
+    handler.process_items(ctx, [{"name": "item1"}, {"name": "item2"}])
+    handler.process_items(ctx, {"name": "item3"})
+    handler.close(ctx)
+
+    with open(filename) as f:
+        assert [json.loads(line)["name"] for line in f] == ["item1", "item2", "item3"]
+
+
+def test_json_lines_file_handler_gzip_rotation(tmp_path):
+    filename = str(tmp_path / "output.jsonl")
+    handler = JsonLinesFileHandler(filename=filename, compression="gzip", max_bytes=40)
+    ctx = build_context()
+
+    handler.process_items(ctx, [{"name": f"item{i}"} for i in range(5)])
+    handler.close(ctx)
+
+    names = []
+    for path in sorted(tmp_path.iterdir()):
+        assert path.name.endswith(".jsonl.gz")
+        with gzip.open(path, "rt") as f:
+            names += [json.loads(line)["name"] for line in f]
+
+    assert len(list(tmp_path.iterdir())) == 2
+    assert names == [f"item{i}" for i in range(5)]
+
+
+def test_s3_stream_handler_multipart_upload():
+    moto = pytest.importorskip("moto")
+
+    with moto.mock_aws():
+        s3 = boto3.client("s3", region_name="us-east-1")
+        s3.create_bucket(Bucket="my-bucket")
+
+        handler = S3StreamHandler(
+            s3_bucket="my-bucket",
+            filename="example.jsonl",
+            client_kwargs={"region_name": "us-east-1"},
+        )
+        ctx = build_context()
+        items = [{"name": f"item{i}", "body": "x" * 3 * 1024 * 1024} for i in range(3)]
+
+        handler.process_items(ctx, items[:2])
+        assert len(handler.parts) == 1
+
+        handler.process_items(ctx, items[2:])
+        handler.close(ctx)
+
+        body = s3.get_object(Bucket="my-bucket", Key="example.jsonl")["Body"].read()
+        assert [json.loads(line)["name"] for line in body.splitlines()] == [
+            "item0",
+            "item1",
+            "item2",
+        ]
+
+
+def test_s3_stream_handler_keeps_upload_on_bad_item():
+    moto = pytest.importorskip("moto")
+
+    with moto.mock_aws():
+        s3 = boto3.client("s3", region_name="us-east-1")
+        s3.create_bucket(Bucket="my-bucket")
+
+        handler = S3StreamHandler(
+            s3_bucket="my-bucket",
+            filename="example.jsonl",
+            client_kwargs={"region_name": "us-east-1"},
+        )
+        ctx = build_context()
+        items = [{"name": f"item{i}", "body": "x" * 3 * 1024 * 1024} for i in range(2)]
+        handler.process_items(ctx, items)
+        assert len(handler.parts) == 1
+
+        with pytest.raises(TypeError):
+            handler.process_items(ctx, [{"name": "item2"}, {"name": object()}])
+        assert len(handler.parts) == 1
+
+        handler.close(ctx)
+
+        body = s3.get_object(Bucket="my-bucket", Key="example.jsonl")["Body"].read()
+        assert [json.loads(line)["name"] for line in body.splitlines()] == [
+            "item0",
+            "item1",
+            "item2",
+        ]
+
+
+def test_s3_stream_handler_rollover_gzip():
+    moto = pytest.importorskip("moto")
+
+    with moto.mock_aws():
+        s3 = boto3.client("s3", region_name="us-east-1")
+        s3.create_bucket(Bucket="my-bucket")
+
+        handler = S3StreamHandler(
+            s3_bucket="my-bucket",
+            filename="example.jsonl",
+            max_object_bytes=40,
+            compression="gzip",
+            client_kwargs={"region_name": "us-east-1"},
+        )
+        ctx = build_context()
+
+        handler.process_items(ctx, [{"name": f"item{i}"} for i in range(5)])
+        handler.close(ctx)
+
+        keys = [
+            obj["Key"] for obj in s3.list_objects_v2(Bucket="my-bucket")["Contents"]
+        ]
+        assert keys == ["example-00000.jsonl.gz", "example-00001.jsonl.gz"]
+
+        names = []
+        for key in keys:
+            body = s3.get_object(Bucket="my-bucket", Key=key)["Body"].read()
+            names += [
+                json.loads(line)["name"] for line in gzip.decompress(body).splitlines()
+            ]
+        assert names == [f"item{i}" for i in range(5)]
+
+
+class Product(Item):
+    name = Field()
+
+
+class ProductModel(BaseModel):
+    name: str
+
+
+@dataclass
+class ProductData:
+    name: str
+
+
+def test_encode_items_mixed_generator():
+    def generate():
+        yield {"name": "dict"}
+        yield ProductModel(name="model")
+        yield ProductData(name="dataclass")
+        yield Product(name="item")
+
+    assert encode_items(generate()) == [
+        {"name": "dict"},
+        {"name": "model"},
+        {"name": "dataclass"},
+        {"name": "item"},
+    ]
+
+
+def test_encode_single_items():
+    assert encode_items({"name": "dict"}) == [{"name": "dict"}]
+    assert encode_items(ProductData(name="dataclass")) == [{"name": "dataclass"}]
+    assert encode_items(Product(name="item")) == [{"name": "item"}]
+
+
+class Book(Item):
+    title = Field(type=str)
+    price = Field(type=float)
+    tags = Field(type=list[str])
+    isbn = Field()
+
+
+class BookModel(BaseModel):
+    title: str
+    price: Optional[float] = None
+
+
+def test_parquet_handler_writes_row_groups(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    filename = str(tmp_path / "books.parquet")
+
+    handler = ParquetFileHandler(filename, schema=Book, row_group_size=2)
+    handler.process_items(
+        build_context(),
+        (Book(title=f"book{i}", price=i * 1.5, tags=["a"]) for i in range(4)),
+    )
+    handler.process_items(build_context(), {"title": "book4", "isbn": "123"})
+    handler.close(build_context())
+
+    parquet = pq.ParquetFile(filename)
+    assert parquet.metadata.num_row_groups == 3
+    assert parquet.schema_arrow.field("price").type == "double"
+    assert parquet.schema_arrow.field("isbn").type == "string"
+    table = parquet.read()
+    assert table.column("title").to_pylist() == [f"book{i}" for i in range(5)]
+    assert table.column("tags").to_pylist()[-2:] == [["a"], None]
+    assert table.column("isbn").to_pylist()[-1] == "123"
+
+
+def test_arrow_handler_infers_schema(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    filename = str(tmp_path / "books.arrow")
+
+    handler = ParquetFileHandler(filename, format="arrow", compression=None)
+    handler.process_items(
+        build_context(),
+        [BookModel(title="Dune", price=9.5), {"title": "Emma", "extra": 1}],
+    )
+    handler.close(build_context())
+
+    table = pa.ipc.open_file(filename).read_all()
+    assert table.schema.names == ["title", "price", "extra"]
+    assert table.to_pylist() == [
+        {"title": "Dune", "price": 9.5, "extra": None},
+        {"title": "Emma", "price": None, "extra": 1},
+    ]
+
+
+def test_parquet_handler_pydantic_schema(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    filename = str(tmp_path / "books.parquet")
+
+    handler = ParquetFileHandler(filename, schema=BookModel)
+    handler.process_items(build_context(), [{"title": "Dune", "pages": 10}])
+    handler.close(build_context())
+
+    table = pq.read_table(filename)
+    assert table.schema.names == ["title", "price"]
+    assert table.schema.field("price").type == "double"
+    assert table.to_pylist() == [{"title": "Dune", "price": None}]
+
+
+def test_json_file_handler_streamed_batches(tmp_path):
+    filename = str(tmp_path / "items.json")
+    scraper = build_scraper()
+    scraper.stream_items = True
+    scraper.batch_size = 1
+    scraper.handlers = [JsonFileHandler(filename)]
+
+    scraper.run(["http://test/"], concurrency=1)
+
+    with open(filename) as f:
+        items = json.load(f)
+    assert sorted(item["url"] for item in items) == sorted(PAGES)
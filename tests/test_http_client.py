@@ -0,0 +1,19 @@
+from scrapework.core.http_client import ClientPool, HttpxClient
+
+
+def test_client_pool_reuses_clients():
+    pool = ClientPool(max_connections=10)
+
+    client = pool.get_client(HttpxClient, None, {"verify": False})
+
+    assert pool.get_client(HttpxClient, None, {"verify": False}) is client
+    assert (
+        pool.get_client(HttpxClient, "http://proxy:8080", {"verify": False})
+        is not client
+    )
+    assert pool.get_client(HttpxClient, None, {}) is not client
+
+    pool.close()
+
+    assert client.is_closed
+    assert pool.clients == {}
@@ -0,0 +1,58 @@
+import subprocess
+import sys
+
+# Optional dependencies only imported once the feature needing them is used
+LAZY_MODULES = (
+    "boto3",
+    "fake_useragent",
+    "hishel",
+    "playwright",
+    "pyarrow",
+    "trafilatura",
+)
+
+# Dependencies every run needs, imported first as the yardstick
+REQUIRED_MODULES = ("httpx", "parsel", "pydantic", "courlan")
+
+# Cumulative import time of scrapework.scraper, on top of REQUIRED_MODULES,
+# relative to theirs. Absolute times vary with the machine load, the ratio
+# measured 0.43 to 0.49 here; importing hishel or moto eagerly brings it to
+# 0.78 and 0.85.
+IMPORT_BUDGET = 0.7
+
+
+def import_scraper() -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            f"import sys, {', '.join(REQUIRED_MODULES)}, scrapework.scraper; "
+            "print(' '.join(sys.modules))",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def test_optional_dependencies_are_imported_lazily():
+    modules = set(import_scraper().stdout.split())
+
+    assert [module for module in LAZY_MODULES if module in modules] == []
+
+
+def test_import_time():
+    ratios = []
+    for _ in range(5):
+        cumulative = {}
+        for line in import_scraper().stderr.splitlines():
+            # import time: self [us] | cumulative | imported package
+            parts = line.split("|")
+            if len(parts) == 3 and parts[1].strip().isdigit():
+                cumulative[parts[2].strip()] = int(parts[1])
+        required = sum(cumulative[module] for module in REQUIRED_MODULES)
+        ratios.append(cumulative["scrapework.scraper"] / required)
+
+    assert min(ratios) < IMPORT_BUDGET
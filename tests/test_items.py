@@ -0,0 +1,74 @@
+import copy
+import pickle
+
+import pytest
+
+from scrapework.handlers import encode_items
+from scrapework.items import UNSET, Field, Item, ItemBatch
+
+
+class Product(Item):
+    name = Field()
+    price = Field(serializer=float)
+
+
+class Book(Product):
+    isbn = Field()
+
+
+def test_item_fields_in_declaration_order():
+    assert Book._names == ("name", "price", "isbn")
+    assert Book.fields["price"] == {"serializer": float}
+    assert not hasattr(Book(), "__dict__")
+
+
+def test_item_mapping():
+    book = Book(isbn="123", name="Dune")
+    assert book["name"] == "Dune"
+    assert list(book) == ["name", "isbn"]
+    assert len(book) == 2
+    assert "isbn" in book and "price" not in book and "other" not in book
+    assert book.get("price") is None
+
+    with pytest.raises(KeyError):
+        book["price"]
+    with pytest.raises(KeyError, match="does not support field"):
+        book["other"] = 1
+    with pytest.raises(AttributeError, match="Use item"):
+        book.name = "Emma"
+
+    del book["isbn"]
+    assert book.to_dict() == {"name": "Dune"}
+    with pytest.raises(KeyError):
+        del book["isbn"]
+
+
+def test_item_copy_and_pickle():
+    book = Book(name="Dune", price=9.5, isbn=["123"])
+
+    shallow = book.copy()
+    shallow["price"] = 10.0
+    assert book["price"] == 9.5
+    assert shallow["isbn"] is book["isbn"]
+
+    deep = book.deepcopy()
+    assert deep == book and deep["isbn"] is not book["isbn"]
+
+    restored = pickle.loads(pickle.dumps(Book(name="Dune")))
+    assert type(restored) is Book and restored.to_dict() == {"name": "Dune"}
+    assert copy.copy(restored) == restored
+
+
+def test_item_batch_columns():
+    batch = ItemBatch.from_items(
+        [Book(name="Dune", isbn="123"), {"name": "Emma", "pages": 300}]
+    )
+
+    assert len(batch) == 2
+    assert batch.columns["name"] == ["Dune", "Emma"]
+    assert batch.columns["price"] == [UNSET, UNSET]
+    assert batch.column("pages") == [None, 300]
+    assert encode_items(batch) == [
+        {"name": "Dune", "isbn": "123"},
+        {"name": "Emma", "pages": 300},
+    ]
@@ -0,0 +1,71 @@
+import json
+
+from scrapework.core.logger import Logger
+from scrapework.handlers import JsonFileHandler
+from scrapework.middleware import LoggingMiddleware
+from test_scraper import PAGES, LinkScraper, MockClientMiddleware
+
+
+def test_json_queue_logger(tmp_path):
+    path = tmp_path / "queued.log"
+    log = Logger("queued", filename=str(path), json=True, queue=True)
+    assert Logger("queued") is log
+
+    log.get_logger().info("Fetched %s", "http://test/", extra={"status_code": 200})
+    log.flush()
+
+    entry = json.loads(path.read_text())
+    assert entry["message"] == "Fetched http://test/"
+    assert entry["level"] == "INFO"
+    assert entry["logger"] == "queued"
+    assert entry["status_code"] == 200
+    log.close()
+
+
+def test_scrapers_have_their_own_loggers(tmp_path):
+    class SampledScraper(LinkScraper):
+        name = "sampled_scraper"
+        log_file = str(tmp_path / "sampled.log")
+        log_json = True
+        log_queue = True
+        log_requests_every = 2
+
+    scraper = SampledScraper()
+    scraper.middlewares = [MockClientMiddleware()]
+    scraper.handlers = []
+    scraper.reporters = []
+    scraper.run(["http://test/"], concurrency=1)
+
+    assert scraper.logger.name == "sampled_scraper"
+    entries = [
+        json.loads(line) for line in (tmp_path / "sampled.log").read_text().splitlines()
+    ]
+    requests = [entry for entry in entries if entry["message"].startswith("Making")]
+    # Requests 0 and 2 of 3
+    assert len(requests) == (len(PAGES) + 1) // 2
+    assert requests[0]["url"] == "http://test/"
+    assert entries[-1]["message"] == "Scraping complete"
+    Logger("sampled_scraper").close()
+
+
+def test_modules_log_to_the_scraper_logger(tmp_path):
+    class ModuleLogScraper(LinkScraper):
+        name = "module_log_scraper"
+        log_file = str(tmp_path / "modules.log")
+        log_json = True
+        log_requests_every = 0
+
+    scraper = ModuleLogScraper()
+    scraper.middlewares = [LoggingMiddleware(every=0), MockClientMiddleware()]
+    scraper.handlers = [JsonFileHandler(str(tmp_path / "items.json"))]
+    scraper.reporters = []
+    scraper.run(["http://test/"], concurrency=1)
+
+    messages = [
+        json.loads(line)["message"]
+        for line in (tmp_path / "modules.log").read_text().splitlines()
+    ]
+    # every=0 disables request logging instead of dividing by zero
+    assert not any(message.startswith("Making") for message in messages)
+    assert f"Items written to {tmp_path / 'items.json'}" in messages
+    Logger("module_log_scraper").close()
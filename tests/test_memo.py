@@ -0,0 +1,74 @@
+from test_scraper import PAGES, LinkScraper, build_scraper
+
+from scrapework.memo import ParseMemo, callback_fingerprint
+
+
+def extract_v1(ctx, selector):
+    return [{"title": title} for title in selector.css("h1::text").getall()]
+
+
+def extract_v2(ctx, selector):
+    return [{"title": title.upper()} for title in selector.css("h1::text").getall()]
+
+
+def test_callback_fingerprint_follows_code():
+    assert callback_fingerprint(extract_v1) == callback_fingerprint(extract_v1)
+    assert callback_fingerprint(extract_v1) != callback_fingerprint(extract_v2)
+    scraper = LinkScraper()
+    assert callback_fingerprint(scraper.extract) == callback_fingerprint(
+        LinkScraper().extract
+    )
+
+
+def test_parse_memo_keys(tmp_path):
+    memo = ParseMemo(str(tmp_path / "memo.db"))
+    key = memo.key(extract_v1, "http://test/", b"<h1>a</h1>")
+    memo.put(key, [{"title": "a"}], [("http://test/a", None, 0)])
+
+    assert memo.get(key) == ([{"title": "a"}], [("http://test/a", None, 0)])
+    assert memo.key(extract_v1, "http://mirror/", b"<h1>a</h1>") != key
+    assert memo.key(extract_v2, "http://test/", b"<h1>a</h1>") != key
+    assert (
+        ParseMemo(str(tmp_path / "memo.db"), version="2").key(
+            extract_v1, "http://test/", b"<h1>a</h1>"
+        )
+        != key
+    )
+
+    shared = ParseMemo(str(tmp_path / "shared.db"), per_url=False)
+    assert shared.key(extract_v1, "http://test/", b"x") == shared.key(
+        extract_v1, "http://mirror/", b"x"
+    )
+
+    memo.clear()
+    assert memo.get(key) is None
+    # Items that cannot be pickled are not memoized
+    assert not memo.put(key, [lambda: None], [])
+
+
+class CountingScraper(LinkScraper):
+    calls = 0
+
+    def extract(self, ctx, selector):
+        CountingScraper.calls += 1
+        return super().extract(ctx, selector)
+
+
+def test_run_reuses_memoized_items(tmp_path):
+    runs = []
+    for _ in range(2):
+        scraper = CountingScraper()
+        scraper.middlewares = build_scraper().middlewares
+        scraper.handlers = []
+        scraper.reporters = []
+        scraper.parse_memo_path = str(tmp_path / "memo.db")
+        scraper.process = lambda ctx, items: runs.append((ctx, items))
+        scraper.run(["http://test/"], concurrency=2)
+
+    (first, first_items), (second, second_items) = runs
+    assert CountingScraper.calls == 3
+    assert first.collector.get("parse_memo_misses") == 3
+    assert second.collector.get("parse_memo_hits") == 3
+    # Links of memoized pages are still followed
+    assert sorted(second_items, key=str) == sorted(first_items, key=str)
+    assert len(second_items) == len(PAGES)
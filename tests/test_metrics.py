@@ -0,0 +1,134 @@
+import datetime
+import random
+
+import pytest
+from rich.console import Console
+
+from scrapework.core.collector import (
+    OTHER_DOMAINS,
+    Histogram,
+    JobCollector,
+    JobStats,
+    MetadataCollector,
+)
+from scrapework.core.context import Context
+from scrapework.reporter import PrometheusReporter, RichReporter
+from test_scraper import PAGES, build_scraper
+
+
+def test_histogram_quantiles():
+    values = [random.uniform(0.001, 1.0) for _ in range(10_000)]
+    histogram = Histogram()
+    for value in values:
+        histogram.observe(value)
+
+    values.sort()
+    for q in (0.5, 0.9, 0.99):
+        assert histogram.quantile(q) == pytest.approx(
+            values[int(q * len(values))], rel=0.15
+        )
+    assert histogram.count == len(values)
+    assert histogram.max == values[-1]
+    assert len(histogram.counts) == len(histogram.bounds) + 1
+
+
+def test_histogram_merge():
+    first, second = Histogram(), Histogram()
+    first.observe(0.01)
+    second.observe(100.0)
+    first.merge(second)
+
+    assert first.count == 2
+    assert first.quantile(1.0) == 100.0
+    assert list(first.cumulative())[-1] == (float("inf"), 2)
+
+
+def test_run_records_stage_timers():
+    scraper = build_scraper()
+    reporter = PrometheusReporter("unused")
+    reports = []
+    scraper.reporters = [reporter]
+    reporter.report = lambda ctx: reports.append(ctx)
+
+    scraper.run(["http://test/"], concurrency=2)
+
+    collector = reports[0].collector
+    assert collector.timers["fetch"].count == len(PAGES)
+    assert collector.timers["extract"].count == len(PAGES)
+    assert collector.timers["selector"].count == len(PAGES)
+    assert collector.timers["handle"].count == 1
+    assert collector.labeled[("responses", "status")] == {"200": len(PAGES)}
+    assert collector.get("bytes_in") == sum(len(page) for page in PAGES.values())
+
+
+def test_prometheus_reporter(tmp_path):
+    collector = MetadataCollector()
+    collector.observe("fetch", 0.2)
+    collector.increment("items_count", 3)
+    collector.increment_label("responses", "status", 404)
+    path = tmp_path / "metrics.prom"
+
+    PrometheusReporter(str(path), openmetrics=True).report(
+        Context(collector=collector, variables={"name": "quotes"})
+    )
+
+    lines = path.read_text().splitlines()
+    assert "# TYPE scrapework_stage_seconds histogram" in lines
+    assert (
+        'scrapework_stage_seconds_bucket{scraper="quotes",stage="fetch",le="+Inf"} 1'
+        in lines
+    )
+    assert 'scrapework_stage_seconds_count{scraper="quotes",stage="fetch"} 1' in lines
+    assert 'scrapework_items_count{scraper="quotes"} 3' in lines
+    assert 'scrapework_responses{scraper="quotes",status="404"} 1' in lines
+    assert lines[-1] == "# EOF"
+
+
+def test_job_stats_constant_memory():
+    stats = JobStats(slowest=3, failures=2, max_domains=5)
+    for i in range(1000):
+        stats.add(
+            JobCollector(
+                url=f"http://site{i % 10}.test/page/{i}",
+                duration=datetime.timedelta(milliseconds=i),
+                items_count=2,
+                status_code=500 if i % 100 == 0 else 200,
+                error="status code 500" if i % 100 == 0 else None,
+            )
+        )
+
+    assert (stats.count, stats.failed, stats.items) == (1000, 10, 2000)
+    assert [job.url for job in stats.slowest_jobs()] == [
+        f"http://site{i % 10}.test/page/{i}" for i in (999, 998, 997)
+    ]
+    assert [job.url for job in stats.failures] == [
+        "http://site0.test/page/800",
+        "http://site0.test/page/900",
+    ]
+    assert stats.statuses == {500: 10, 200: 990}
+    assert len(stats.domains) == 6
+    assert stats.domains[OTHER_DOMAINS].jobs == 500
+    assert stats.duration.quantile(0.5) == pytest.approx(0.5, rel=0.15)
+
+
+def test_rich_reporter_renders_aggregates():
+    collector = MetadataCollector()
+    collector.record_job(
+        JobCollector(
+            url="http://test/a",
+            duration=datetime.timedelta(seconds=1),
+            items_count=1,
+            status_code=200,
+        )
+    )
+    console = Console(record=True, width=200)
+    reporter = RichReporter()
+    for table in (
+        reporter.summary_table(collector.job_stats),
+        reporter.slowest_table(collector.job_stats),
+        reporter.domains_table(collector.job_stats),
+    ):
+        console.print(table)
+
+    output = console.export_text()
+    assert "http://test/a" in output and "1000.00ms" in output
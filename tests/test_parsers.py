@@ -1,7 +1,7 @@
 from parsel import Selector
 
 from scrapework.core.context import Context
-from scrapework.parsers import HTMLBodyParser, Parser
+from scrapework.parsers import ArticleParser, HTMLBodyParser, Parser
 
 
 def test_extract_body() -> None:
@@ -22,3 +22,14 @@ def test_extract_not_implemented():
         assert False, "Expected NotImplementedError to be raised"
     except NotImplementedError:
         pass
+
+
+def test_extract_article() -> None:
+    paragraph = "A paragraph of the article, long enough to be kept. " * 10
+    selector = Selector(
+        f"<html><body><nav>Menu</nav><article><h1>Title</h1>"
+        f"<p>{paragraph}</p><p>{paragraph}</p></article></body></html>"
+    )
+    result = ArticleParser().extract(Context(), selector)
+    assert paragraph.strip() in result["text"]
+    assert "Menu" not in result["text"]
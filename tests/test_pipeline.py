@@ -0,0 +1,70 @@
+import asyncio
+
+from scrapework.handlers import json_dumps
+from scrapework.pipeline import ItemPipeline, estimated_size
+
+
+def test_flush_by_batch_size():
+    batches = []
+    pipeline = ItemPipeline(batches.append, batch_size=2)
+
+    pipeline.add({"id": 1})
+    assert batches == []
+
+    pipeline.add([{"id": 2}, {"id": 3}])
+    assert batches == [[{"id": 1}, {"id": 2}, {"id": 3}]]
+
+    pipeline.add({"id": 4})
+    pipeline.close()
+    assert batches[-1] == [{"id": 4}]
+
+
+def test_flush_by_batch_bytes():
+    batches = []
+    pipeline = ItemPipeline(batches.append, batch_size=None, batch_bytes=30)
+
+    pipeline.add({"text": "a" * 10})
+    assert batches == []
+
+    pipeline.add({"text": "b" * 10})
+    assert len(batches) == 1
+
+
+def test_async_flush_on_close():
+    batches = []
+    pipeline = ItemPipeline(batches.append, batch_size=2)
+
+    async def produce():
+        for i in range(5):
+            await pipeline.aadd({"id": i})
+        await pipeline.aclose()
+
+    asyncio.run(produce())
+
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+
+
+def test_commit_keys_of_flushed_batch():
+    batches, commits = [], []
+    pipeline = ItemPipeline(batches.append, batch_size=2, commit=commits.append)
+
+    pipeline.add([{"id": 1}], "a")
+    pipeline.add([], "empty")
+    assert commits == []
+
+    pipeline.add([{"id": 2}], "b")
+    pipeline.add([{"id": 3}], "c")
+    assert commits == [["a", "b"]]
+
+    async def close():
+        await pipeline.aclose()
+
+    asyncio.run(close())
+    assert batches[-1] == [{"id": 3}]
+    assert commits == [["a", "b"], ["c"]]
+
+
+def test_estimated_size():
+    assert estimated_size({"id": 1}) == len(json_dumps({"id": 1}))
+    # Values the encoder does not support are estimated from their text
+    assert estimated_size({"at": object()}) > 0
@@ -0,0 +1,45 @@
+import sys
+
+from scrapework.profiling import OTHER_STAGE, Profiler
+from test_scraper import build_scraper
+
+
+def test_profiler_counts_stacks_by_stage(tmp_path):
+    def parse(profiler):
+        profiler.count_stack(sys._getframe())
+
+    profiler = Profiler(str(tmp_path), stages={parse: "parse"})
+    parse(profiler)
+    parse(profiler)
+    profiler.count_stack(sys._getframe())
+    profiler.count_stack(sys._getframe(), idle=True)
+
+    stacks = list(profiler.stacks.items())
+    assert len(stacks) == 2
+    assert stacks[0][0].startswith("parse;")
+    assert stacks[0][0].endswith(
+        f"{parse.__qualname__} (test_profiling.py:{parse.__code__.co_firstlineno})"
+    )
+    assert stacks[0][1] == 2
+    assert stacks[1][0].startswith(f"{OTHER_STAGE};")
+    assert profiler.stage_totals() == {"parse": 2, OTHER_STAGE: 1}
+
+
+def test_run_writes_profile(tmp_path):
+    scraper = build_scraper()
+    scraper.profile_interval = 0.001
+    scraper.profile_allocations = True
+    scraper.profile_snapshot_every = 2
+
+    scraper.run(["http://test/"], concurrency=2, profile=str(tmp_path))
+
+    assert scraper.profiler is None
+    stacks = (tmp_path / "cpu.collapsed").read_text().splitlines()
+    stages = {"middleware", "fetch", "parse", "handle", OTHER_STAGE}
+    for line in stacks:
+        stack, count = line.rsplit(" ", 1)
+        assert stack.split(";", 1)[0] in stages
+        assert int(count) > 0
+
+    allocations = (tmp_path / "allocations.txt").read_text()
+    assert "# After 2 pages" in allocations
@@ -0,0 +1,32 @@
+import httpx
+
+from scrapework.retry import RetryPolicy
+
+
+def test_retry_statuses_and_exceptions():
+    policy = RetryPolicy(retries=2)
+
+    assert policy.should_retry(0, 2, response=httpx.Response(503))
+    assert policy.should_retry(1, 2, response=httpx.Response(503))
+    assert not policy.should_retry(2, 2, response=httpx.Response(503))
+    assert not policy.should_retry(0, 2, response=httpx.Response(404))
+    assert policy.should_retry(0, 2, error=httpx.ConnectTimeout("timeout"))
+    assert not policy.should_retry(0, 2, error=ValueError("bug"))
+
+
+def test_retry_overrides():
+    policy = RetryPolicy(retries=2, overrides={404: 1, httpx.ConnectError: 5})
+
+    assert policy.should_retry(0, 2, response=httpx.Response(404))
+    assert not policy.should_retry(1, 2, response=httpx.Response(404))
+    assert policy.should_retry(4, 2, error=httpx.ConnectError("refused"))
+
+
+def test_backoff_delay():
+    policy = RetryPolicy(backoff=1.0, max_backoff=10.0, jitter=False)
+
+    assert [policy.delay(attempt) for attempt in range(5)] == [1, 2, 4, 8, 10]
+    assert policy.delay(0, httpx.Response(429, headers={"Retry-After": "5"})) == 5
+
+    jittered = RetryPolicy(backoff=1.0)
+    assert all(0 <= jittered.delay(3) <= 8 for _ in range(20))
@@ -0,0 +1,65 @@
+import httpx
+from test_scraper import PAGES, LinkScraper, MockClientMiddleware
+
+from scrapework.core.http_client import HTTPClient
+
+ETAGS = {url: '"v1"' for url in PAGES}
+
+
+def conditional_handler(request: httpx.Request) -> httpx.Response:
+    url = str(request.url)
+    etag = ETAGS[url]
+    if request.headers.get("If-None-Match") == etag:
+        return httpx.Response(304, headers={"ETag": etag})
+    return httpx.Response(200, text=PAGES[url], headers={"ETag": etag})
+
+
+class ConditionalClient(HTTPClient):
+    @classmethod
+    def build_async_client(cls, **kwargs) -> httpx.AsyncClient:
+        kwargs.pop("mounts", None)
+        return httpx.AsyncClient(
+            transport=httpx.MockTransport(conditional_handler), **kwargs
+        )
+
+
+class ConditionalClientMiddleware(MockClientMiddleware):
+    def process_request(self, ctx, request):
+        request.cls_client = ConditionalClient
+        return request
+
+
+def recrawl(path):
+    scraper = LinkScraper()
+    scraper.middlewares = [ConditionalClientMiddleware()]
+    scraper.handlers = []
+    scraper.reporters = []
+    scraper.validators_path = path
+    runs = []
+    scraper.process = lambda ctx, items: runs.append((ctx, items))
+    scraper.run(["http://test/"], concurrency=2)
+    return runs[0]
+
+
+def test_recrawl_skips_unchanged_pages(tmp_path):
+    path = str(tmp_path / "validators.db")
+
+    ctx, items = recrawl(path)
+    assert len(items) == 3
+    assert ctx.collector.get("changed_count") == 3
+
+    ctx, items = recrawl(path)
+    assert items == []
+    assert ctx.collector.get("unchanged_count") == 3
+    # Links of unchanged pages are still followed
+    stats = ctx.collector.job_stats
+    assert sorted(job.url for job in stats.slowest_jobs()) == sorted(PAGES)
+
+    ETAGS["http://test/a"] = '"v2"'
+    try:
+        ctx, items = recrawl(path)
+    finally:
+        ETAGS["http://test/a"] = '"v1"'
+    assert [item["url"] for item in items] == ["http://test/a"]
+    assert ctx.collector.get("changed_count") == 1
+    assert ctx.collector.get("unchanged_count") == 2
@@ -0,0 +1,74 @@
+import httpx
+
+from scrapework.scheduler import PolitenessScheduler, parse_retry_after
+from scrapework.scraper import ExtractCallback
+
+
+def entry(url: str) -> ExtractCallback:
+    return ExtractCallback(url, lambda ctx, selector: {})
+
+
+def test_interleaves_domains():
+    scheduler = PolitenessScheduler()
+    for url in ["http://a/1", "http://a/2", "http://a/3", "http://b/1"]:
+        scheduler.push(entry(url))
+
+    urls = [scheduler.pop().url for _ in range(4)]
+
+    assert urls == ["http://a/1", "http://b/1", "http://a/2", "http://a/3"]
+    assert not scheduler
+
+
+def test_domain_concurrency():
+    scheduler = PolitenessScheduler(domain_concurrency=1)
+    scheduler.push(entry("http://a/1"))
+    scheduler.push(entry("http://a/2"))
+
+    assert scheduler.pop().url == "http://a/1"
+    assert scheduler.pop() is None
+    assert scheduler.next_ready_in() is None
+
+    scheduler.release("http://a/1")
+
+    assert scheduler.pop().url == "http://a/2"
+
+
+def test_domain_rate_limit():
+    scheduler = PolitenessScheduler(domain_rate_limit=2)
+    scheduler.push(entry("http://a/1"))
+    scheduler.push(entry("http://a/2"))
+
+    assert scheduler.pop().url == "http://a/1"
+    assert scheduler.pop() is None
+    assert 0.4 < scheduler.next_ready_in() <= 0.5
+
+
+def test_retry_after_and_auto_throttle():
+    scheduler = PolitenessScheduler(auto_throttle=True)
+    scheduler.push(entry("http://a/1"))
+    scheduler.push(entry("http://a/2"))
+    scheduler.pop()
+
+    response = httpx.Response(429, headers={"Retry-After": "30"})
+    scheduler.release("http://a/1", response, latency=0.2)
+
+    assert scheduler.pop() is None
+    assert 29 < scheduler.next_ready_in() <= 30
+    assert scheduler.domains["a"].delay == 1.0
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("120") == 120
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+
+
+def test_undelayed_skips_retries_waiting():
+    scheduler = PolitenessScheduler()
+    scheduler.push(entry("http://a/1"), delay=60)
+    assert scheduler and scheduler.undelayed() == 0
+
+    scheduler.push(entry("http://b/1"))
+    assert len(scheduler) == 2
+    assert scheduler.undelayed() == 1
@@ -0,0 +1,283 @@
+import asyncio
+import os
+import threading
+
+import httpx
+import pytest
+
+from scrapework.core.context import Context
+from scrapework.core.http_client import HTTPClient
+from scrapework.handlers import Handler, JsonLinesFileHandler
+from scrapework.middleware import RequestMiddleware
+from scrapework.processors import Processor
+from scrapework.request import Request
+from scrapework.scraper import Scraper
+
+PAGES = {
+    "http://test/": '<body><a href="/a">a</a><a href="/b">b</a></body>',
+    "http://test/a": "<body><p>A</p></body>",
+    "http://test/b": "<body><p>B</p></body>",
+}
+
+
+class ConcurrencyTracker:
+    in_flight = 0
+    max_in_flight = 0
+
+
+async def mock_handler(request: httpx.Request) -> httpx.Response:
+    ConcurrencyTracker.in_flight += 1
+    ConcurrencyTracker.max_in_flight = max(
+        ConcurrencyTracker.max_in_flight, ConcurrencyTracker.in_flight
+    )
+    await asyncio.sleep(0.01)
+    ConcurrencyTracker.in_flight -= 1
+    return httpx.Response(200, text=PAGES[str(request.url)])
+
+
+def sync_mock_handler(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(200, text=PAGES[str(request.url)])
+
+
+class MockClient(HTTPClient):
+    # Sync clients built, to check they are pooled
+    clients: list = []
+
+    @classmethod
+    def build_client(cls, **kwargs) -> httpx.Client:
+        kwargs.pop("mounts", None)
+        client = httpx.Client(
+            transport=httpx.MockTransport(sync_mock_handler), **kwargs
+        )
+        cls.clients.append(client)
+        return client
+
+    @classmethod
+    def build_async_client(cls, **kwargs) -> httpx.AsyncClient:
+        kwargs.pop("mounts", None)
+        return httpx.AsyncClient(transport=httpx.MockTransport(mock_handler), **kwargs)
+
+
+class MockClientMiddleware(RequestMiddleware):
+    def process_request(self, ctx: Context, request: Request):
+        request.cls_client = MockClient
+        return request
+
+
+class CollectHandler(Handler):
+    def __init__(self):
+        super().__init__()
+        self.items = []
+
+    def process_items(self, ctx, items):
+        self.items.extend(items)
+
+
+class LinkScraper(Scraper):
+    name = "link_scraper"
+
+    def extract(self, ctx, selector):
+        for href in selector.css("a::attr(href)").getall():
+            self.to_visit(ctx.urljoin(href))
+        return {"url": str(ctx.request.url), "text": selector.css("p::text").get()}
+
+
+def build_scraper() -> LinkScraper:
+    scraper = LinkScraper()
+    scraper.middlewares = [MockClientMiddleware()]
+    scraper.handlers = []
+    scraper.reporters = []
+    return scraper
+
+
+def test_run_with_concurrency():
+    ConcurrencyTracker.max_in_flight = 0
+    scraper = build_scraper()
+    items = []
+    scraper.process = lambda ctx, new_items: items.extend(new_items)
+
+    scraper.run(["http://test/"], concurrency=2)
+
+    assert sorted(item["url"] for item in items) == sorted(PAGES)
+    assert {item["text"] for item in items} == {None, "A", "B"}
+    assert ConcurrencyTracker.max_in_flight == 2
+    assert len(scraper.visited_urls) == len(PAGES)
+
+
+def test_run_with_streaming_items():
+    scraper = build_scraper()
+    scraper.stream_items = True
+    scraper.batch_size = 2
+    batches = []
+    scraper.process = lambda ctx, batch: batches.append(batch)
+
+    scraper.run(["http://test/"], concurrency=1)
+
+    assert [len(batch) for batch in batches] == [2, 1]
+
+
+def test_sync_run_reuses_pooled_client():
+    MockClient.clients = []
+    scraper = build_scraper()
+    items = []
+    scraper.process = lambda ctx, new_items: items.extend(new_items)
+
+    scraper.run(["http://test/"])
+
+    assert sorted(item["url"] for item in items) == sorted(PAGES)
+    assert len(MockClient.clients) == 1
+    assert MockClient.clients[0].is_closed
+    assert scraper.client_pool is None
+
+
+@pytest.mark.parametrize("concurrency", [None, 1])
+def test_failed_run_closes_handlers(tmp_path, concurrency):
+    class FailingScraper(LinkScraper):
+        def extract(self, ctx, selector):
+            if str(ctx.request.url) == "http://test/b":
+                raise ValueError("broken page")
+            return super().extract(ctx, selector)
+
+    class AbortHandler(CollectHandler):
+        aborted = False
+
+        def abort(self, ctx):
+            self.aborted = True
+
+    filename = str(tmp_path / "items.jsonl")
+    lines = JsonLinesFileHandler(filename)
+    aborted = AbortHandler()
+    scraper = FailingScraper()
+    scraper.middlewares = [MockClientMiddleware()]
+    scraper.handlers = [lines, aborted]
+    scraper.reporters = []
+    scraper.stream_items = True
+    scraper.batch_size = 1
+
+    with pytest.raises(ValueError, match="broken page"):
+        scraper.run(["http://test/"], concurrency=concurrency)
+
+    assert lines.file is None
+    with open(filename) as f:
+        assert len(f.readlines()) == 2
+    assert aborted.aborted
+    assert len(aborted.items) == 2
+
+
+def test_run_retries_and_records_failures():
+    attempts = {}
+
+    async def flaky_handler(request: httpx.Request) -> httpx.Response:
+        url = str(request.url)
+        attempts[url] = attempts.get(url, 0) + 1
+        if url == "http://test/a" and attempts[url] < 3:
+            return httpx.Response(503)
+        if url == "http://test/b":
+            return httpx.Response(500)
+        return httpx.Response(200, text=PAGES[url])
+
+    class FlakyClient(MockClient):
+        @classmethod
+        def build_async_client(cls, **kwargs) -> httpx.AsyncClient:
+            kwargs.pop("mounts", None)
+            return httpx.AsyncClient(
+                transport=httpx.MockTransport(flaky_handler), **kwargs
+            )
+
+    class FlakyClientMiddleware(RequestMiddleware):
+        def process_request(self, ctx: Context, request: Request):
+            request.cls_client = FlakyClient
+            return request
+
+    scraper = build_scraper()
+    scraper.middlewares = [FlakyClientMiddleware()]
+    scraper.retry_backoff = 0.001
+    items = []
+    scraper.process = lambda ctx, new_items: items.extend(new_items)
+    reports = []
+    scraper.report = lambda ctx: reports.append(ctx)
+
+    scraper.run(["http://test/"], concurrency=2)
+
+    assert sorted(item["url"] for item in items) == ["http://test/", "http://test/a"]
+    assert attempts == {"http://test/": 1, "http://test/a": 3, "http://test/b": 3}
+
+    collector = reports[0].collector
+    assert collector.get("retries_count") == 4
+    assert collector.get("failed_count") == 1
+    failed = collector.job_stats.failures
+    assert collector.job_stats.errors == {"status code 500": 1}
+    assert [(job.url, job.status_code, job.retries) for job in failed] == [
+        ("http://test/b", 500, 2)
+    ]
+
+
+class PidScraper(LinkScraper):
+    def extract(self, ctx, selector):
+        return {**super().extract(ctx, selector), "pid": os.getpid()}
+
+
+@pytest.mark.parametrize("parse_executor", ["process", "thread"])
+def test_run_with_parse_executor(parse_executor):
+    scraper = PidScraper()
+    scraper.middlewares = [MockClientMiddleware()]
+    scraper.reporters = []
+    scraper.handlers = [CollectHandler()]
+    scraper.parse_executor = parse_executor
+    scraper.parse_workers = 2
+
+    scraper.run(["http://test/"], concurrency=2)
+
+    items = scraper.handlers[0].items
+    assert sorted(item["url"] for item in items) == sorted(PAGES)
+    in_parent = all(item["pid"] == os.getpid() for item in items)
+    assert in_parent == (parse_executor == "thread")
+    assert scraper.parse_pool is None
+
+
+class CountingScraper(LinkScraper):
+    def extract(self, ctx, selector):
+        ctx.collector.increment("parsed_pages")
+        ctx.collector.observe("callback", 0.01)
+        return super().extract(ctx, selector)
+
+
+def test_thread_parse_executor_keeps_run_state_on_loop_thread():
+    scraper = CountingScraper()
+    scraper.middlewares = [MockClientMiddleware()]
+    scraper.handlers = [CollectHandler()]
+    scraper.parse_executor = "thread"
+    scraper.parse_workers = 2
+    reports = []
+    scraper.report = lambda ctx: reports.append(ctx)
+
+    pushes = []
+    push = scraper.urls_to_visit.push
+
+    def tracked_push(*args):
+        pushes.append(threading.get_ident())
+        push(*args)
+
+    scraper.urls_to_visit.push = tracked_push
+    scraper.run(["http://test/"], concurrency=2)
+
+    assert sorted(item["url"] for item in scraper.handlers[0].items) == sorted(PAGES)
+    # Links found in pool threads are scheduled by the loop thread
+    assert len(pushes) == len(PAGES)
+    assert set(pushes) == {threading.get_ident()}
+    collector = reports[0].collector
+    assert collector.get("parsed_pages") == len(PAGES)
+    assert collector.timers["callback"].count == len(PAGES)
+
+
+class UpperProcessor(Processor):
+    def process_items(self, items):
+        return [{**item, "text": (item["text"] or "").upper()} for item in items]
+
+
+def test_processors_are_per_scraper():
+    first, second = build_scraper(), build_scraper()
+    first.use(UpperProcessor())
+
+    assert len(first.processors) == 1
+    assert second.processors == [] and LinkScraper.processors == []